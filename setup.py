@@ -26,4 +26,5 @@ setup(
     ],
     keywords='matplotlib annotation',
     install_requires=['numpy', 'matplotlib'],
+    extras_require={'arrow': ['pyarrow'], 'stats': ['scipy']},
 )
@@ -4,6 +4,9 @@
 
 import numpy as np
 
+from .pairwise import pairwise_pvalues
+from .plotdata import compute_count_labels, compute_comparison_bars
+
 
 def _patch_size(patch, orient='v'):
     """
@@ -103,7 +106,8 @@ def _bar_end_midpoint(patch, ax, orient='v'):
 def add_count_labels(ax, count=0, pct=False, as_pct=True,
                      orient='v', loc='above', offset=0.01,
                      color='black', palette=None,
-                     fontsize=11, **kwargs):
+                     fontsize=11, avoid_overlap=None, min_fontsize=6,
+                     **kwargs):
     """
     Add count labels to a bar or count plot.
 
@@ -128,94 +132,394 @@ def add_count_labels(ax, count=0, pct=False, as_pct=True,
         Cycle of text label colors.
         Useful for situations where the bars are plotted with a `hue` attribute
         and the labels are plotted inside the bars.
+    avoid_overlap : 'hide' | 'shrink' | 'nudge', optional
+        Resolve overlapping labels; see avoid_label_overlap. Labels of
+        larger bars take priority.
+    min_fontsize : float, optional
+        Smallest font size labels are shrunk to before being hidden.
     kwargs : key, value mappings
         Other keyword arguments are passed to ax.text
 
+    Returns
+    -------
+    texts : list of matplotlib Text
+
     TODO: add format string
     TODO: improve percentage handling
     """
 
-    # Input validation
-    if orient not in 'v h'.split():
-        raise Exception("Orientation must be 'v' or 'h'")
-    if loc not in 'above inside'.split():
-        msg = "Loc must be one of 'above', 'inside'"
-        raise Exception(msg)
+    # sort by x position for palette cycling
+    patches = _sorted_patches(ax, orient)
+    values = [_patch_size(patch, orient) for patch in patches]
+    centers = [_patch_center(patch, orient) for patch in patches]
 
-    # Constants
-    if orient == 'v':
-        ha = 'center'
-        if loc == 'above' or loc == 'base':
-            va = 'bottom'
-        else:
-            va = 'top'
-    else:
-        va = 'center'
-        if loc == 'above' or loc == 'base':
-            ha = 'left'
-        else:
-            ha = 'right'
+    data = compute_count_labels(values, centers, ax.get_xlim(), ax.get_ylim(),
+                                count=count, pct=pct, as_pct=as_pct,
+                                orient=orient, loc=loc, offset=offset)
+    texts = render_count_labels(data, ax, color=color, palette=palette,
+                                fontsize=fontsize, **kwargs)
 
-    # sort by x position for palette cycling
+    if avoid_overlap is not None:
+        avoid_label_overlap(ax, texts, priority=np.nan_to_num(values),
+                            orient=orient, how=avoid_overlap,
+                            min_fontsize=min_fontsize)
+
+    return texts
+
+
+def _sorted_patches(ax, orient='v'):
     if orient == 'v':
-        patches = sorted(ax.patches, key=lambda p: p.get_x())
+        return sorted(ax.patches, key=lambda p: p.get_x())
     else:
-        patches = sorted(ax.patches, key=lambda p: p.get_y())
+        return sorted(ax.patches, key=lambda p: p.get_y())
 
-    for i, patch in enumerate(patches):
-        value = _patch_size(patch, orient)
-        if np.isnan(value):
-            value = 0
 
-        if pct:
-            if as_pct:
-                label = '%.1f%%' % (value * 100)
-                fontsize = fontsize
+def render_count_labels(data, ax, color='black', palette=None,
+                        fontsize=11, **kwargs):
+    """
+    Draw labels computed by svplot.plotdata.compute_count_labels.
 
-            else:
-                label = str(int(value * count))
-                fontsize = fontsize
-        else:
-            label = str(int(value))
-            fontsize = fontsize
+    Parameters
+    ----------
+    data : svplot.plotdata.LabelData
+    ax : matplotlib Axes
+    color : matplotlib color, optional
+        Text color.
+    palette : list of matplotlib colors, optional
+        Cycle of text label colors.
+    fontsize : int, optional
+    kwargs : key, value mappings
+        Other keyword arguments are passed to ax.text
 
+    Returns
+    -------
+    texts : list of matplotlib Text
+    """
+
+    texts = []
+    for i, (xpos, ypos, label) in enumerate(zip(data.x, data.y,
+                                                data.labels)):
         if palette is not None:
             color = palette[i % len(palette)]
 
-        # Position label
-        xpos, ypos = _bar_end_midpoint(patch, ax, orient)
-        if orient == 'v':
-            if loc == 'above' or loc == 'base':
-                ypos = ypos + offset
-            else:
-                ypos = ypos - offset
-        else:
-            if loc == 'above' or loc == 'base':
-                xpos = xpos + offset
-            else:
-                xpos = xpos - offset
+        texts.append(ax.text(xpos, ypos,
+                             label, color=color,
+                             ha=data.ha, va=data.va,
+                             fontsize=fontsize,
+                             transform=ax.transAxes,
+                             **kwargs))
+
+    return texts
+
+
+# Fraction of the box width (height) left of (below) the anchor point
+_HA_FRACTION = {'left': 0, 'center': 0.5, 'right': 1}
+_VA_FRACTION = {'bottom': 0, 'baseline': 0, 'center': 0.5,
+                'center_baseline': 0.5, 'top': 1}
+
+
+def _get_renderer(fig):
+    if hasattr(fig.canvas, 'get_renderer'):
+        return fig.canvas.get_renderer()
+    return fig._get_renderer()
+
+
+def _label_extents(ax, texts, pad=1):
+    """
+    Display-space boxes and anchors of many labels in one pass.
+
+    Sizes are measured once per distinct (string, font) and anchors are
+    transformed together, so no per-label layout is run.
+
+    Returns
+    -------
+    boxes : np.ndarray, shape (n, 4)
+        x0, y0, x1, y1 in pixels.
+    anchors : np.ndarray, shape (n, 2)
+    """
+
+    renderer = _get_renderer(ax.figure)
+
+    def _measure(string, prop):
+        w, h, _ = renderer.get_text_width_height_descent(string, prop,
+                                                         ismath=False)
+        return w, h
+
+    sizes = {}
+    line_heights = {}
+    extents = np.empty((len(texts), 2))
+    for i, text in enumerate(texts):
+        prop = text.get_fontproperties()
+        key = (text.get_text(), hash(prop))
+        if key not in sizes:
+            # Text boxes are at least one line tall; lay out one label per
+            # font to get the line height matplotlib uses
+            if key[1] not in line_heights:
+                line_heights[key[1]] = text.get_window_extent(renderer).height
+            w, h = _measure(text.get_text(), prop)
+            sizes[key] = (w, max(h, line_heights[key[1]]))
+        extents[i] = sizes[key]
+
+    positions = np.array([text.get_position() for text in texts],
+                         dtype=np.float64)
+    transforms = {id(text.get_transform()) for text in texts}
+    if len(transforms) == 1:
+        anchors = texts[0].get_transform().transform(positions)
+    else:
+        anchors = np.array([text.get_transform().transform(pos)
+                            for text, pos in zip(texts, positions)])
+
+    fx = np.array([_HA_FRACTION[text.get_ha()] for text in texts])
+    fy = np.array([_VA_FRACTION[text.get_va()] for text in texts])
+    w, h = extents[:, 0] + 2 * pad, extents[:, 1] + 2 * pad
+
+    x0 = anchors[:, 0] - fx * w
+    y0 = anchors[:, 1] - fy * h
+    boxes = np.column_stack([x0, y0, x0 + w, y0 + h])
+    return boxes, anchors
+
+
+def _text_box(renderer, text, anchor, height, pad=1):
+    """
+    Display-space box of one label of known line height.
+    """
 
-        ax.text(xpos, ypos,
-                label, color=color,
-                ha=ha, va=va,
-                fontsize=fontsize,
-                transform=ax.transAxes,
-                **kwargs)
+    w, _, _ = renderer.get_text_width_height_descent(
+        text.get_text(), text.get_fontproperties(), ismath=False)
+    w, h = w + 2 * pad, height + 2 * pad
+    x0 = anchor[0] - _HA_FRACTION[text.get_ha()] * w
+    y0 = anchor[1] - _VA_FRACTION[text.get_va()] * h
+    return np.array([x0, y0, x0 + w, y0 + h])
+
+
+class _GridHash:
+    """
+    Uniform grid of placed boxes for constant-time neighbor queries.
+
+    Cells are at least as large as the largest box, so each box touches at
+    most four cells and each query inspects only nearby boxes.
+    """
+
+    def __init__(self, cell_w, cell_h):
+        self.cell_w = max(cell_w, 1e-9)
+        self.cell_h = max(cell_h, 1e-9)
+        self.cells = {}
+        self.boxes = []
+        # Highest occupied cell index along each axis
+        self.max_cell = [-np.inf, -np.inf]
+
+    def _cells(self, box):
+        i0, i1 = int(box[0] // self.cell_w), int(box[2] // self.cell_w)
+        j0, j1 = int(box[1] // self.cell_h), int(box[3] // self.cell_h)
+        return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+    def add(self, box):
+        k = len(self.boxes)
+        self.boxes.append(box)
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(k)
+            self.max_cell = [max(self.max_cell[0], cell[0]),
+                             max(self.max_cell[1], cell[1])]
+
+    def strip(self, box, axis):
+        """
+        Placed boxes overlapping `box` across `axis` and ending past its
+        start along `axis`, sorted by their start along `axis`.
+        """
+
+        cell = (self.cell_w, self.cell_h)
+        across = 1 - axis
+        a0 = int(box[across] // cell[across])
+        a1 = int(box[across + 2] // cell[across])
+        b0 = int(box[axis] // cell[axis])
+        b1 = int(max(b0, self.max_cell[axis]))
+
+        found = set()
+        for a in range(a0, a1 + 1):
+            for b in range(b0, b1 + 1):
+                c = (a, b) if axis == 1 else (b, a)
+                for k in self.cells.get(c, ()):
+                    other = self.boxes[k]
+                    if (box[across] < other[across + 2] and
+                            other[across] < box[across + 2] and
+                            other[axis + 2] > box[axis]):
+                        found.add(k)
+        return sorted((self.boxes[k] for k in found), key=lambda o: o[axis])
+
+    def collisions(self, box):
+        found = set()
+        for cell in self._cells(box):
+            for k in self.cells.get(cell, ()):
+                other = self.boxes[k]
+                if (box[0] < other[2] and other[0] < box[2] and
+                        box[1] < other[3] and other[1] < box[3]):
+                    found.add(k)
+        return [self.boxes[k] for k in found]
+
+
+def _shrink_scale(box, anchor, other):
+    """
+    Largest scale about `anchor` at which `box` clears `other`.
+    """
+
+    bounds = [0.0]
+    for lo, hi, a, olo, ohi in ((box[0], box[2], anchor[0], other[0],
+                                 other[2]),
+                                (box[1], box[3], anchor[1], other[1],
+                                 other[3])):
+        # Scaled high edge at or below the other's low edge
+        if hi > a and olo >= a:
+            bounds.append((olo - a) / (hi - a))
+        # Scaled low edge at or above the other's high edge
+        if lo < a and ohi <= a:
+            bounds.append((a - ohi) / (a - lo))
+    return min(max(bounds), 1.0)
+
+
+def avoid_label_overlap(ax, texts, priority=None, orient='v', how='hide',
+                        min_fontsize=6, pad=1):
+    """
+    Resolve collisions between text labels.
+
+    Label extents are measured in one batched pass and placed in priority
+    order into a grid hash, so each label is checked only against nearby
+    placed labels (about O(n log n) overall, rather than O(n^2)).
+
+    Parameters
+    ----------
+    ax : matplotlib Axes
+    texts : list of matplotlib Text
+    priority : arraylike of float, optional
+        Labels with higher priority are placed first and kept as is.
+        Defaults to the order of `texts`.
+    orient : 'v' | 'h', optional
+        Bar orientation; 'nudge' moves labels along the value axis, up for
+        vertical bars and right for horizontal bars.
+    how : 'hide' | 'shrink' | 'nudge', optional
+        - hide: hide labels that overlap a placed label
+        - shrink: reduce the font size until the label fits, down to
+          `min_fontsize`, else hide
+        - nudge: move the label past the labels it overlaps
+    min_fontsize : float, optional
+    pad : float, optional
+        Padding around each label, in pixels.
+
+    Returns
+    -------
+    adjusted : np.ndarray of bool
+        Labels that were hidden, shrunk or moved.
+    """
+
+    if orient not in 'v h'.split():
+        raise Exception("Orientation must be 'v' or 'h'")
+    if how not in 'hide shrink nudge'.split():
+        raise Exception("Overlap handling must be one of 'hide', 'shrink', "
+                        "'nudge'")
+
+    adjusted = np.zeros(len(texts), dtype=bool)
+    if not texts:
+        return adjusted
+
+    boxes, anchors = _label_extents(ax, texts, pad)
+    if priority is None:
+        order = np.arange(len(texts))
+    else:
+        order = np.argsort(-np.asarray(priority, dtype=np.float64),
+                           kind='mergesort')
+    # Already hidden labels neither move nor block others
+    order = [i for i in order if texts[i].get_visible()]
+    if not order:
+        return adjusted
+
+    renderer = _get_renderer(ax.figure)
+    sizes = boxes[:, 2:] - boxes[:, :2]
+    grid = _GridHash(sizes[:, 0].max(), sizes[:, 1].max())
+
+    for i in order:
+        box, anchor = boxes[i], anchors[i]
+        hits = grid.collisions(box)
+        if not hits:
+            grid.add(box)
+            continue
+
+        adjusted[i] = True
+        text = texts[i]
+
+        if how == 'shrink':
+            fontsize = text.get_fontsize()
+            height = box[3] - box[1] - 2 * pad
+            # Glyph widths are hinted rather than linear in font size, so
+            # re-measure the shrunk label
+            for _ in range(3):
+                scale = min(_shrink_scale(box, anchor, other)
+                            for other in hits)
+                fontsize *= scale
+                height *= scale
+                if fontsize < min_fontsize:
+                    break
+                text.set_fontsize(fontsize)
+                box = _text_box(renderer, text, anchor, height, pad)
+                hits = grid.collisions(box)
+                if not hits:
+                    break
+            if fontsize >= min_fontsize and not hits:
+                grid.add(box)
+                continue
+
+        elif how == 'nudge':
+            # Sweep the placed labels along the value axis for the first
+            # gap the label fits in
+            axis = 1 if orient == 'v' else 0
+            size = box[axis + 2] - box[axis]
+            start = box[axis]
+            for other in grid.strip(box, axis):
+                if other[axis] >= start + size:
+                    break
+                start = max(start, other[axis + 2])
+
+            shift = start - box[axis]
+            moved = box.copy()
+            moved[[axis, axis + 2]] += shift
+            new_anchor = anchor.copy()
+            new_anchor[axis] += shift
+            text.set_position(
+                text.get_transform().inverted().transform(new_anchor))
+            grid.add(moved)
+            continue
+
+        text.set_visible(False)
+
+    return adjusted
 
 
 def add_comparison_bars(ax, p=None, orient='v',
                         bar_offset=0.02, top_offset=0.1,
                         fontsize=12, pval_offset=0.01,
-                        color='black', **kwargs):
+                        color='black', test=None, counts=None, totals=None,
+                        samples=None, correction=None, fmt='p={:.3f}',
+                        **kwargs):
     """
     Add count labels to a bar or count plot.
 
+    Bars are compared in adjacent pairs, (0, 1), (2, 3), ...
+
     Parameters
     ----------
     ax : matplotlib Axes
         Axes object to annotate.
     p : arraylike of float, optional
         Pairwise p-values to annotate with
+    test : 'fisher' | 'chi2' | 'mannwhitney', optional
+        Compute `p` for all pairs in one batch instead; see
+        svplot.pairwise.pairwise_pvalues.
+    counts, totals : arraylike of int, optional
+        Successes and trials of each bar, for 'fisher' and 'chi2'.
+    samples : list of arraylike, optional
+        Observations of each bar, for 'mannwhitney'.
+    correction : 'bonferroni' | 'holm' | 'fdr_bh', optional
+        Multiple-testing correction of the computed p-values.
+    fmt : str or callable, optional
+        Format of p-value labels, e.g. 'p={:.1e}' or 'stars'.
     orient : 'v' | 'h', optional
         Orientation of the plot (vertical or horizontal).
     bar_offset : float, optional
@@ -234,68 +538,43 @@ def add_comparison_bars(ax, p=None, orient='v',
         Other keyword arguments are passed to ax.plot
     """
 
-    # Input validation
-    if orient not in 'v h'.split():
-        raise Exception("Orientation must be 'v' or 'h'")
-
-    # Constants
-    if orient == 'v':
-        ha = 'center'
-        va = 'bottom'
-    else:
-        va = 'center'
-        ha = 'left'
+    if test is not None:
+        if p is not None:
+            raise Exception('Provide either `p` or `test`, not both')
+        p = pairwise_pvalues(test, counts=counts, totals=totals,
+                             samples=samples, correction=correction)
 
     # sort by x position for palette cycling and comparison bar pairing
-    if orient == 'v':
-        patches = sorted(ax.patches, key=lambda p: p.get_x())
-    else:
-        patches = sorted(ax.patches, key=lambda p: p.get_y())
-
-    patch_pairs = zip(patches[0::2], patches[1::2])
+    patches = _sorted_patches(ax, orient)
+    values = [_patch_size(patch, orient) for patch in patches]
+    centers = [_patch_center(patch, orient) for patch in patches]
 
-    for i, (l_patch, r_patch) in enumerate(patch_pairs):
-        l_xpos, l_ypos = _bar_end_midpoint(l_patch, ax, orient)
-        r_xpos, r_ypos = _bar_end_midpoint(r_patch, ax, orient)
+    data = compute_comparison_bars(values, centers,
+                                   ax.get_xlim(), ax.get_ylim(), p=p,
+                                   orient=orient, bar_offset=bar_offset,
+                                   top_offset=top_offset,
+                                   pval_offset=pval_offset, fmt=fmt)
+    render_comparison_bars(data, ax, fontsize=fontsize, **kwargs)
 
-        if orient == 'v':
-            max_val = max(l_ypos, r_ypos)
-            top_pos = max_val + top_offset
 
-            # Plot vertical lines
-            ax.plot([l_xpos, l_xpos], [l_ypos + bar_offset, top_pos],
-                    'k-', transform=ax.transAxes, **kwargs)
-            ax.plot([r_xpos, r_xpos], [r_ypos + bar_offset, top_pos],
-                    'k-', transform=ax.transAxes, **kwargs)
-
-            # Plot crossbar
-            ax.plot([l_xpos, r_xpos], [top_pos, top_pos],
-                    'k-', transform=ax.transAxes, **kwargs)
-
-        else:
-            max_val = max(l_xpos, r_xpos)
-            top_pos = max_val + top_offset
-
-            # Plot vertical lines
-            ax.plot([l_xpos + bar_offset, top_pos], [l_ypos, l_ypos],
-                    'k-', transform=ax.transAxes, **kwargs)
-            ax.plot([r_xpos + bar_offset, top_pos], [r_ypos, r_ypos],
-                    'k-', transform=ax.transAxes, **kwargs)
-
-            # Plot crossbar
-            ax.plot([top_pos, top_pos], [l_ypos, r_ypos],
-                    'k-', transform=ax.transAxes, **kwargs)
+def render_comparison_bars(data, ax, fontsize=12, **kwargs):
+    """
+    Draw brackets computed by svplot.plotdata.compute_comparison_bars.
 
-        # Add p-value annotations
-        if p is not None:
-            label = 'p={:.3f}'.format(p[i])
+    Parameters
+    ----------
+    data : svplot.plotdata.BracketData
+    ax : matplotlib Axes
+    fontsize : int, optional
+        p-value label font size
+    kwargs : key, value mappings
+        Other keyword arguments are passed to ax.plot
+    """
 
-            if orient == 'v':
-                xpos = np.mean([l_xpos, r_xpos])
-                ypos = top_pos + pval_offset
-            else:
-                xpos = top_pos + pval_offset
-                ypos = np.mean([l_ypos, r_ypos])
+    # Two legs and a crossbar per pair
+    for xs, ys in data.segments.reshape(-1, 2, 2):
+        ax.plot(xs, ys, 'k-', transform=ax.transAxes, **kwargs)
 
-            ax.text(xpos, ypos, label, ha=ha, va=va, fontsize=fontsize,
-                    transform=ax.transAxes)
+    for xpos, ypos, label in zip(data.text_x, data.text_y, data.text_labels):
+        ax.text(xpos, ypos, label, ha=data.ha, va=data.va,
+                fontsize=fontsize, transform=ax.transAxes)
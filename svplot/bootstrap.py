@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Bootstrap confidence bands for binned distribution curves.
+
+Rows are never resampled. A curve depends on the data only through its bin
+counts, so each replicate resamples the counts directly: under the Poisson
+bootstrap every variant gets a Poisson(1) weight, making a bin's replicate
+count Poisson(count); under the multinomial bootstrap a group's variants
+are redrawn across its bins. All replicates of a group form one
+(replicates x bins) matrix that is turned into curves in a single matrix
+operation, so the cost depends on the number of bins rather than rows.
+
+    >>> counts = ecdf_bin_counts(vf, codes, n_groups, xticks)
+    >>> lower, upper = bootstrap_band(counts, ecdf_curves, ci=95)
+"""
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from .stats import smooth_count_matrix
+
+METHODS = ('poisson', 'multinomial')
+
+
+def resample_counts(counts, n_boot, method='poisson', rng=None):
+    """
+    Bootstrap replicates of one group's bin counts.
+
+    Parameters
+    ----------
+    counts : np.ndarray, shape (n_bins,)
+        Counts, or total frequency weights, per bin.
+    n_boot : int
+    method : 'poisson' | 'multinomial', optional
+        Poisson replicates vary the group total; multinomial replicates
+        keep it fixed (rounded to an integer).
+    rng : np.random.Generator, optional
+
+    Returns
+    -------
+    replicates : np.ndarray, shape (n_boot, n_bins)
+    """
+
+    if method not in METHODS:
+        raise Exception('Bootstrap method must be one of {0}'.format(
+            ', '.join(METHODS)))
+    if rng is None:
+        rng = np.random.default_rng()
+
+    counts = np.asarray(counts, dtype=np.float64)
+    if method == 'poisson':
+        return rng.poisson(counts, size=(n_boot, counts.shape[0]))
+
+    total = counts.sum()
+    if total <= 0:
+        return np.zeros((n_boot, counts.shape[0]), dtype=np.int64)
+    return rng.multinomial(int(round(total)), counts / total, size=n_boot)
+
+
+def ecdf_curves(replicates):
+    """
+    ECDFs of replicate counts from `ecdf_bin_counts`.
+
+    The last bin holds values past the final point and only adds to the
+    total.
+    """
+
+    cum = np.cumsum(replicates, axis=1, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return cum[:, :-1] / cum[:, -1:]
+
+
+def density_curves(replicates, bin_width, bw):
+    """
+    Smoothed densities of replicate log-binned counts.
+    """
+
+    return smooth_count_matrix(replicates.astype(np.float64), bin_width, bw)
+
+
+def _replicate_curves(counts, curve, n_boot, method, seed):
+    rng = np.random.default_rng(seed)
+    return curve(resample_counts(counts, n_boot, method, rng))
+
+
+def bootstrap_band(counts, curve, ci=95, n_boot=1000, method='poisson',
+                   seed=None, n_jobs=None, chunksize=250):
+    """
+    Percentile bootstrap band of every group's curve.
+
+    Parameters
+    ----------
+    counts : np.ndarray, shape (n_groups, n_bins)
+        Binned counts (or frequency weights) of each group.
+    curve : callable or list of callable
+        Maps a (replicates, n_bins) count matrix to a (replicates, n_points)
+        curve matrix, e.g. `ecdf_curves`. A list gives one curve function
+        per group. Must be picklable when `n_jobs` > 1.
+    ci : float, optional
+        Confidence level, in percent.
+    n_boot : int, optional
+        Replicates per group.
+    method : 'poisson' | 'multinomial', optional
+    seed : int, optional
+    n_jobs : int, optional
+        Worker processes. Replicates are generated in chunks of `chunksize`
+        from independent seeds, so bands are reproducible for a given seed
+        whatever the number of jobs.
+    chunksize : int, optional
+
+    Returns
+    -------
+    lower, upper : np.ndarray, shape (n_groups, n_points)
+        NaN where every replicate is undefined (e.g. an empty group).
+    """
+
+    if method not in METHODS:
+        raise Exception('Bootstrap method must be one of {0}'.format(
+            ', '.join(METHODS)))
+    if not 0 < ci < 100:
+        raise Exception('Confidence level must be between 0 and 100')
+
+    counts = np.atleast_2d(np.asarray(counts, dtype=np.float64))
+    n_groups = counts.shape[0]
+    curves = curve if isinstance(curve, (list, tuple)) else \
+        [curve] * n_groups
+
+    sizes = [min(chunksize, n_boot - start)
+             for start in range(0, n_boot, chunksize)]
+    seeds = np.random.SeedSequence(seed).spawn(n_groups * len(sizes))
+    tasks = [(counts[g], curves[g], size, method, seeds[g * len(sizes) + k])
+             for g in range(n_groups) for k, size in enumerate(sizes)]
+
+    if n_jobs is None or n_jobs == 1:
+        results = [_replicate_curves(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(n_jobs) as executor:
+            results = list(executor.map(_replicate_curves, *zip(*tasks)))
+
+    tail = (100 - ci) / 2
+    lower, upper = [], []
+    for g in range(n_groups):
+        reps = np.concatenate(results[g * len(sizes):(g + 1) * len(sizes)])
+        # Replicates with no observations give NaN curves and are skipped
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            lo, hi = np.nanpercentile(reps, [tail, 100 - tail], axis=0)
+        lower.append(lo)
+        upper.append(hi)
+
+    return np.array(lower), np.array(upper)
+
+
+def density_band(counts, log_edges, bw, **kwargs):
+    """
+    Bootstrap band of log-binned densities.
+
+    Parameters
+    ----------
+    counts : np.ndarray, shape (n_groups, n_bins)
+    log_edges : np.ndarray
+    bw : list of float
+        Kernel bandwidth of each group, held fixed across replicates.
+    kwargs : key, value mappings
+        Passed to `bootstrap_band`.
+
+    Returns
+    -------
+    lower, upper : np.ndarray, shape (n_groups, n_bins)
+    """
+
+    bin_width = log_edges[1] - log_edges[0]
+    curves = [partial(density_curves, bin_width=bin_width, bw=b) for b in bw]
+    return bootstrap_band(counts, curves, **kwargs)
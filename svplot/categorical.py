@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Compact integer encoding of categorical columns.
+
+Hue, row and column variables are hashed once into small integer codes and
+a table of categories. Ordering, splitting rows by group and mapping labels
+and palettes then work on the codes, so string columns are never sorted or
+compared row by row.
+
+    >>> hues = encode(df['batch'])
+    >>> for rows, label, color in zip(hues.split(), hues.labels(),
+    ...                               hues.colors(palette)):
+    ...     ax.plot(..., label=label, color=color)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _code_dtype(n_categories):
+    # -1 marks missing values, so every dtype must also hold it
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class Categories:
+    """
+    A categorical column as integer codes into a category table.
+
+    Attributes
+    ----------
+    categories : np.ndarray
+        Category labels, in plotting order.
+    codes : np.ndarray of int
+        Index into `categories` of each row; -1 for missing values and
+        values outside the requested order. Stored in the smallest integer
+        dtype holding every code.
+    """
+
+    def __init__(self, categories, codes):
+        self.categories = np.asarray(categories)
+        self.codes = np.asarray(codes).astype(_code_dtype(len(categories)),
+                                              copy=False)
+
+    def __len__(self):
+        return self.categories.shape[0]
+
+    def counts(self, weights=None):
+        """
+        Number (or total weight) of rows in each category.
+        """
+
+        keep = self.codes >= 0
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)[keep]
+        return np.bincount(self.codes[keep], weights=weights,
+                           minlength=len(self))
+
+    def split(self):
+        """
+        Row indices of each category.
+
+        Rows are grouped with one stable sort of the codes, so indices stay
+        in row order within each category.
+
+        Returns
+        -------
+        rows : list of np.ndarray of int
+        """
+
+        order = np.argsort(self.codes, kind='stable')
+        bounds = np.searchsorted(self.codes[order],
+                                 np.arange(len(self) + 1), side='left')
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(self))]
+
+    def labels(self, label_dict=None):
+        """
+        Legend label of each category, optionally mapped by `label_dict`.
+        """
+
+        if label_dict is None:
+            return [str(c) for c in self.categories]
+        return [label_dict[c] for c in self.categories]
+
+    def colors(self, palette):
+        """
+        Palette color of each category.
+
+        The palette is checked against the category table, i.e. `order`
+        when one was given, not the distinct values of the column.
+        """
+
+        if len(self) > len(palette):
+            raise Exception('Palette smaller than number of hue variables')
+        return [palette[i] for i in range(len(self))]
+
+
+def encode(values, order=None, sort=True, observed=False):
+    """
+    Encode a column as integer codes and a category table.
+
+    Parameters
+    ----------
+    values : array-like, pd.Series or pd.Categorical
+        Categorical inputs (including category-dtype Series) are encoded
+        from their existing codes, with their categories as the default
+        order. Other inputs are hashed once with pd.factorize.
+    order : list, optional
+        Categories to keep, in order. Values outside it get code -1.
+    sort : bool, optional
+        Without `order`, sort the categories (as ``sorted(unique)``);
+        otherwise keep them in order of first appearance. Numeric values
+        are always sorted, as in seaborn.
+    observed : bool, optional
+        Without `order`, drop categories of a Categorical that no row
+        takes, so only observed values are plotted.
+
+    Returns
+    -------
+    cats : Categories
+    """
+
+    if isinstance(values, pd.Series) and \
+            isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.array
+
+    if hasattr(values, 'categories') and hasattr(values, 'codes'):
+        categories = np.asarray(values.categories)
+        codes = np.asarray(values.codes)
+    else:
+        # pd.factorize sorts Series, Index and NumPy arrays of any dtype,
+        # but not bare extension arrays such as Series.array
+        if isinstance(values, pd.api.extensions.ExtensionArray):
+            values = pd.Series(values, copy=False)
+        elif not isinstance(values, (np.ndarray, pd.Series, pd.Index)):
+            values = np.asarray(values)
+        sort = sort or pd.api.types.is_numeric_dtype(values.dtype)
+        codes, categories = pd.factorize(values, sort=sort)
+        categories = np.asarray(categories)
+
+    if order is None:
+        if observed:
+            codes = np.asarray(codes, dtype=np.int64)
+            used = np.bincount(codes[codes >= 0],
+                               minlength=categories.shape[0]) > 0
+            if not used.all():
+                remap = np.full(categories.shape[0] + 1, -1, dtype=np.int64)
+                remap[:-1][used] = np.arange(used.sum())
+                categories, codes = categories[used], remap[codes]
+        return Categories(categories, codes)
+
+    pos = {c: i for i, c in enumerate(order)}
+    # Trailing -1 keeps missing values (code -1) unmatched
+    remap = np.array([pos.get(c, -1) for c in categories] + [-1],
+                     dtype=np.int64)
+    return Categories(order, remap[codes])
+
+
+def categorical_order(values, order=None):
+    """
+    Category order of a column, as seaborn orders hue and facet levels.
+
+    `order` if given; else the categories of a Categorical; else the
+    unique values in order of appearance (sorted if numeric).
+    """
+
+    if order is not None:
+        return list(order)
+    return encode(values, sort=False).categories.tolist()
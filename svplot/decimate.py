@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Pixel-aware decimation of dense curves.
+
+A curve with millions of vertices is drawn no differently than one with a
+handful of vertices per pixel column, as long as each column keeps its first,
+last, minimum and maximum points. Lines created here are re-decimated at draw
+time against the axes' current pixel width and x limits, so zooming, resizing
+and saving at a different dpi all stay exact.
+"""
+
+import numpy as np
+from matplotlib.lines import Line2D
+
+
+def minmax_indices(x, y, n_columns, xmin=None, xmax=None):
+    """
+    Indices of the points needed to draw a curve at a given pixel width.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        Sorted x coordinates.
+    y : np.ndarray
+    n_columns : int
+        Number of pixel columns spanned by [xmin, xmax].
+    xmin, xmax : float, optional
+        Visible x range. Defaults to the data range. One point beyond each
+        limit is kept so the curve runs to the edge of the axes.
+
+    Returns
+    -------
+    idx : np.ndarray of int
+        Sorted indices into `x` and `y`.
+    """
+
+    n = x.shape[0]
+    n_columns = max(int(n_columns), 1)
+    if n <= 4 * n_columns:
+        return np.arange(n)
+
+    if xmin is None:
+        xmin = x[0]
+    if xmax is None:
+        xmax = x[-1]
+
+    start = max(np.searchsorted(x, xmin, side='left') - 1, 0)
+    stop = min(np.searchsorted(x, xmax, side='right') + 1, n)
+    if stop - start <= 4 * n_columns:
+        return np.arange(start, stop)
+
+    xs = x[start:stop]
+    ys = y[start:stop]
+
+    span = xmax - xmin if xmax > xmin else 1
+    cols = ((xs - xmin) / span * n_columns).astype(np.int64)
+    np.clip(cols, -1, n_columns, out=cols)
+
+    # x is sorted, so each pixel column is a contiguous run
+    bounds = np.flatnonzero(np.diff(cols)) + 1
+    run_starts = np.concatenate([[0], bounds])
+    run_ends = np.concatenate([bounds, [xs.shape[0]]]) - 1
+
+    # Within each run, order by y to find the extremes
+    order = np.lexsort((ys, cols))
+    run_min = order[run_starts]
+    run_max = order[run_ends]
+
+    idx = np.unique(np.concatenate([run_starts, run_ends, run_min, run_max]))
+    return idx + start
+
+
+class DecimatedLine2D(Line2D):
+    """
+    Line2D that keeps full-resolution data and draws only what is visible.
+
+    The decimated vertices are recomputed whenever the axes' pixel width or
+    x limits differ from the previous draw.
+    """
+
+    def __init__(self, x, y, columns_per_pixel=1, **kwargs):
+        self._full_x = np.asarray(x, dtype=np.float64)
+        self._full_y = np.asarray(y, dtype=np.float64)
+        self._columns_per_pixel = columns_per_pixel
+        self._decimated_for = None
+        super().__init__(self._full_x, self._full_y, **kwargs)
+
+    def get_full_data(self):
+        return self._full_x, self._full_y
+
+    def _decimate(self):
+        ax = self.axes
+        if ax is None:
+            return
+
+        xmin, xmax = sorted(ax.get_xlim())
+        n_columns = int(np.ceil(ax.bbox.width * self._columns_per_pixel))
+        key = (n_columns, xmin, xmax)
+        if key == self._decimated_for:
+            return
+
+        idx = minmax_indices(self._full_x, self._full_y, n_columns,
+                             xmin, xmax)
+        self.set_data(self._full_x[idx], self._full_y[idx])
+        self._decimated_for = key
+
+    def draw(self, renderer):
+        self._decimate()
+        super().draw(renderer)
+
+
+def plot_decimated(ax, x, y, **kwargs):
+    """
+    Add a decimated line to `ax`.
+
+    Parameters
+    ----------
+    ax : matplotlib Axes
+    x, y : np.ndarray
+        Full-resolution data; `x` must be sorted.
+    kwargs : key, value mappings
+        Other keyword arguments are passed to Line2D.
+
+    Returns
+    -------
+    line : DecimatedLine2D
+    """
+
+    line = DecimatedLine2D(x, y, **kwargs)
+    ax.add_line(line)
+    ax.autoscale_view()
+    return line
+
+
+def decimate_for_axes(ax, x, y, columns_per_pixel=2):
+    """
+    Decimate data once against the current size of `ax`.
+
+    Used for static artists such as density fills, which are not redrawn
+    from full-resolution data.
+
+    Returns
+    -------
+    x, y : np.ndarray
+    """
+
+    n_columns = int(np.ceil(ax.bbox.width * columns_per_pixel))
+    idx = minmax_indices(x, y, n_columns)
+    return x[idx], y[idx]
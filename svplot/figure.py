@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Pyplot-free figure construction.
+
+Figures made here are plain `matplotlib.figure.Figure` objects attached to
+their own Agg canvas. They are never registered with pyplot, so they are not
+leaked by long-running processes and independent figures can be built and
+rendered concurrently from a thread pool. Pass their axes explicitly to the
+svplot plotting functions (`ax=`, `fig=`) to stay off pyplot state entirely.
+Plotting callables given to JointGrids must accept `ax` or be pyplot or Axes
+methods; others are drawn through pyplot's current axes.
+"""
+
+import io
+
+import matplotlib as mpl
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+def new_figure(figsize=None, dpi=None, **kwargs):
+    """
+    Create a Figure with an Agg canvas, bypassing pyplot.
+
+    Parameters
+    ----------
+    figsize : (float, float), optional
+    dpi : float, optional
+    kwargs : key, value mappings
+        Other keyword arguments are passed to Figure
+
+    Returns
+    -------
+    fig : matplotlib Figure
+    """
+
+    fig = Figure(figsize=figsize, dpi=dpi, **kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def new_subplots(nrows=1, ncols=1, figsize=None, dpi=None, **kwargs):
+    """
+    Create a Figure with an Agg canvas and a grid of axes.
+
+    Parameters
+    ----------
+    nrows, ncols : int, optional
+    figsize : (float, float), optional
+    dpi : float, optional
+    kwargs : key, value mappings
+        Other keyword arguments are passed to Figure.subplots
+
+    Returns
+    -------
+    fig : matplotlib Figure
+    ax : matplotlib Axes or np.ndarray of Axes
+    """
+
+    fig = new_figure(figsize=figsize, dpi=dpi)
+    ax = fig.subplots(nrows, ncols, **kwargs)
+    return fig, ax
+
+
+def render(fig, format='png', **kwargs):
+    """
+    Render a figure to bytes.
+
+    Parameters
+    ----------
+    fig : matplotlib Figure
+    format : str, optional
+    kwargs : key, value mappings
+        Other keyword arguments are passed to fig.savefig
+
+    Returns
+    -------
+    data : bytes
+    """
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format=format, **kwargs)
+    return buf.getvalue()
+
+
+def get_cmap(cmap):
+    """
+    Look up a colormap without going through pyplot.
+    """
+
+    if isinstance(cmap, mpl.colors.Colormap):
+        return cmap
+    try:
+        return mpl.colormaps[cmap]
+    except AttributeError:
+        # matplotlib < 3.5
+        return mpl.cm.get_cmap(cmap)
@@ -10,18 +10,24 @@ Modification of Michael Waskom's JointGrid implementation in Seaborn.
 Supports multiple JointGrids in single figure
 """
 
+import inspect
+
 import numpy as np
 import pandas as pd
 import matplotlib.gridspec as gridspec
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from .categorical import Categories, encode
+from .rasterize import apply_rasterization_policy
+from .tables import load_columns
+
 
 class JointGrid(sns.JointGrid):
     """Grid for drawing a bivariate plot with marginal univariate plots."""
 
     def __init__(self, x, y, data=None, gs=None, ratio=5, space=.2,
-                 dropna=True, xlim=None, ylim=None):
+                 dropna=True, xlim=None, ylim=None, fig=None, axes=None):
         """Set up the grid of subplots.
 
         Parameters
@@ -40,6 +46,12 @@ class JointGrid(sns.JointGrid):
             If True, remove observations that are missing from `x` and `y`.
         {x, y}lim : two-tuples, optional
             Axis limits to set before plotting.
+        fig : matplotlib Figure, optional
+            Figure to draw on. Defaults to the current pyplot figure.
+        axes : (Axes, Axes, Axes), optional
+            Prebuilt joint, x-marginal and y-marginal axes, e.g. from
+            ``joint_axes_layout``. When given, `gs`, `ratio`, `space` and
+            `fig` are ignored.
 
         See Also
         --------
@@ -49,32 +61,24 @@ class JointGrid(sns.JointGrid):
         """
 
         # Set up the subplot grid
-        if gs is None:
-            gs = gridspec.GridSpec(ratio + 1, ratio + 1,
-                                   hspace=space, wspace=space)
+        if axes is not None:
+            ax_joint, ax_marg_x, ax_marg_y = axes
+        else:
+            if fig is None:
+                fig = plt.gcf()
+            if gs is None:
+                gs = gridspec.GridSpec(ratio + 1, ratio + 1, figure=fig,
+                                       hspace=space, wspace=space)
 
-        ax_joint = plt.subplot(gs[1:, :-1])
-        ax_marg_x = plt.subplot(gs[0, :-1], sharex=ax_joint)
-        ax_marg_y = plt.subplot(gs[1:, -1], sharey=ax_joint)
+            ax_joint = fig.add_subplot(gs[1:, :-1])
+            ax_marg_x = fig.add_subplot(gs[0, :-1], sharex=ax_joint)
+            ax_marg_y = fig.add_subplot(gs[1:, -1], sharey=ax_joint)
+            _configure_marginals(ax_marg_x, ax_marg_y)
 
         self.ax_joint = ax_joint
         self.ax_marg_x = ax_marg_x
         self.ax_marg_y = ax_marg_y
 
-        # Turn off tick visibility for the measure axis on the marginal plots
-        plt.setp(ax_marg_x.get_xticklabels(), visible=False)
-        plt.setp(ax_marg_y.get_yticklabels(), visible=False)
-
-        # Turn off the ticks on the density axis for the marginal plots
-        plt.setp(ax_marg_x.yaxis.get_majorticklines(), visible=False)
-        plt.setp(ax_marg_x.yaxis.get_minorticklines(), visible=False)
-        plt.setp(ax_marg_y.xaxis.get_majorticklines(), visible=False)
-        plt.setp(ax_marg_y.xaxis.get_minorticklines(), visible=False)
-        plt.setp(ax_marg_x.get_yticklabels(), visible=False)
-        plt.setp(ax_marg_y.get_xticklabels(), visible=False)
-        ax_marg_x.yaxis.grid(False)
-        ax_marg_y.xaxis.grid(False)
-
         # Possibly extract the variables from a DataFrame
         if data is not None:
             if x in data:
@@ -105,12 +109,204 @@ class JointGrid(sns.JointGrid):
         if ylim is not None:
             ax_joint.set_ylim(ylim)
 
+    def plot_joint(self, func, **kwargs):
+        """Draw a bivariate plot on the joint axes.
+
+        Parameters
+        ----------
+        func : callable or str
+            Plotting function accepting ``ax`` (e.g. seaborn), a pyplot
+            function or the name of an Axes method (e.g. ``'scatter'``),
+            which are drawn on the joint axes directly. Other callables are
+            drawn via the pyplot current axes, which is not thread-safe.
+        kwargs : key, value mappings
+            Keyword arguments are passed to the plotting function.
+
+        Returns
+        -------
+        self : JointGrid instance
+            Returns `self`.
+
+        """
+
+        _call_on_axes(func, self.ax_joint, x=self.x, y=self.y, **kwargs)
+        return self
+
+    def plot_marginals(self, func, **kwargs):
+        """Draw univariate plots for `x` and `y` on the marginal axes.
+
+        Parameters
+        ----------
+        func : callable or str
+            Plotting function accepting ``ax``, a pyplot function or the
+            name of an Axes method (e.g. ``'hist'``), as in `plot_joint`.
+            Seaborn functions are drawn on the y margin with ``y=`` (or
+            ``vertical=True`` for functions such as distplot); others with
+            ``orientation='horizontal'`` if they accept it.
+        kwargs : key, value mappings
+            Keyword arguments are passed to the plotting function.
+
+        Returns
+        -------
+        self : JointGrid instance
+            Returns `self`.
+
+        """
+
+        _call_on_axes(func, self.ax_marg_x, x=self.x, **kwargs)
+
+        # Draw the y margin sideways with whatever the function supports
+        params = {} if isinstance(func, str) else _parameters(func)
+        if isinstance(func, str):
+            if func == 'hist':
+                kwargs['orientation'] = 'horizontal'
+        elif _is_seaborn(func) and 'y' in params:
+            _call_on_axes(func, self.ax_marg_y, y=self.y, **kwargs)
+            return self
+        elif 'vertical' in params:
+            kwargs['vertical'] = True
+        elif 'orientation' in params:
+            kwargs['orientation'] = 'horizontal'
+        _call_on_axes(func, self.ax_marg_y, x=self.y, **kwargs)
+
+        return self
+
+
+def _configure_marginals(ax_marg_x, ax_marg_y):
+    """
+    Hide marginal tick labels and density-axis ticks.
+
+    Uses tick_params, which sets the defaults for ticks created later rather
+    than updating every existing tick artist.
+    """
+
+    # Turn off tick labels for the measure axis on the marginal plots, and
+    # ticks and labels for the density axis
+    ax_marg_x.tick_params(axis='x', labelbottom=False)
+    ax_marg_x.tick_params(axis='y', which='both', left=False, right=False,
+                          labelleft=False)
+    ax_marg_y.tick_params(axis='y', labelleft=False)
+    ax_marg_y.tick_params(axis='x', which='both', bottom=False, top=False,
+                          labelbottom=False)
+    ax_marg_x.yaxis.grid(False)
+    ax_marg_y.xaxis.grid(False)
+
+
+def _grid_cells(lo, hi, n, space):
+    """
+    Start offsets and size of `n` equal cells in [lo, hi], GridSpec style.
+
+    `space` is the gap between cells as a fraction of the cell size.
+    """
+
+    size = (hi - lo) / (n + space * (n - 1))
+    starts = lo + np.arange(n) * size * (1 + space)
+    return starts, size
+
+
+def joint_axes_layout(fig, n_rows, n_cols, ratio=5, space=None):
+    """
+    Create joint and marginal axes for a grid of JointGrids in bulk.
+
+    Every axes rectangle is computed arithmetically, matching the layout of
+    nested GridSpecs, and created directly with marginal ticks configured
+    and axis sharing set at construction.
+
+    Parameters
+    ----------
+    fig : matplotlib Figure
+    n_rows, n_cols : int
+        Number of panels.
+    ratio : int, optional
+        Ratio of joint to marginal axis size.
+    space : float, optional
+        Space between joint and marginal axes, as a fraction of cell size,
+        in both directions. Defaults to the figure's subplot wspace and
+        hspace, as in a nested GridSpecFromSubplotSpec.
+
+    Returns
+    -------
+    axes : np.ndarray, shape (n_rows, n_cols, 3)
+        Joint, x-marginal and y-marginal axes of each panel.
+    """
+
+    pars = fig.subplotpars
+    wspace = pars.wspace if space is None else space
+    hspace = pars.hspace if space is None else space
+    k = ratio + 1
+
+    # Outer panel grid; rows run top to bottom
+    lefts, panel_w = _grid_cells(pars.left, pars.right, n_cols, pars.wspace)
+    bottoms, panel_h = _grid_cells(pars.bottom, pars.top, n_rows, pars.hspace)
+    bottoms = bottoms[::-1]
+
+    # Inner (ratio + 1) x (ratio + 1) grid, relative to each panel
+    _, cell_w = _grid_cells(0, panel_w, k, wspace)
+    _, cell_h = _grid_cells(0, panel_h, k, hspace)
+    joint_w = (k - 1) * cell_w + (k - 2) * wspace * cell_w
+    joint_h = (k - 1) * cell_h + (k - 2) * hspace * cell_h
+    marg_y_left = (k - 1) * cell_w * (1 + wspace)
+    marg_x_bottom = panel_h - cell_h
+
+    axes = np.empty((n_rows, n_cols, 3), dtype=object)
+    for i in range(n_rows):
+        for j in range(n_cols):
+            x0, y0 = lefts[j], bottoms[i]
+            ax_joint = fig.add_axes([x0, y0, joint_w, joint_h])
+            ax_marg_x = fig.add_axes([x0, y0 + marg_x_bottom,
+                                      joint_w, cell_h], sharex=ax_joint)
+            ax_marg_y = fig.add_axes([x0 + marg_y_left, y0,
+                                      cell_w, joint_h], sharey=ax_joint)
+            _configure_marginals(ax_marg_x, ax_marg_y)
+            axes[i, j] = ax_joint, ax_marg_x, ax_marg_y
+
+    return axes
+
+
+def _parameters(func):
+    try:
+        return inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return {}
+
+
+def _is_seaborn(func):
+    return str(getattr(func, '__module__', '')).startswith('seaborn')
+
+
+def _call_on_axes(func, ax, x=None, y=None, **kwargs):
+    """
+    Draw `func` on `ax` without touching pyplot state where possible.
+
+    Axes method names and pyplot wrappers (e.g. ``plt.hist``) call the Axes
+    method of that name. Seaborn functions with x/y parameters receive the
+    data by keyword; other functions accepting ``ax`` receive it explicitly.
+    Anything else is drawn on the pyplot current axes, which is not
+    thread-safe.
+    """
+
+    args = [v for v in (x, y) if v is not None]
+    if getattr(func, '__module__', None) == 'matplotlib.pyplot' and \
+            hasattr(ax, func.__name__):
+        func = func.__name__
+
+    if isinstance(func, str):
+        getattr(ax, func)(*args, **kwargs)
+    elif _is_seaborn(func) and 'y' in _parameters(func):
+        data = {k: v for k, v in (('x', x), ('y', y)) if v is not None}
+        func(ax=ax, **data, **kwargs)
+    elif 'ax' in _parameters(func):
+        func(*args, ax=ax, **kwargs)
+    else:
+        plt.sca(ax)
+        func(*args, **kwargs)
+
 
 class JointGrids:
     def __init__(self, data, x, y,
                  col=None, col_order=None,
                  row=None, row_order=None,
-                 panel_size=8, ratio=5):
+                 panel_size=8, ratio=5, fig=None, axes=None):
                 # row=None, row_order=None,
                 # col=None, col_order=None,
                 # hue=None, hue_order=None):
@@ -123,57 +319,80 @@ class JointGrids:
             Height/width of each constituent JointGrid
         ratio : int, optional
             Ratio of joint to marginal axis size
+        fig : matplotlib Figure, optional
+            Figure to draw on, e.g. from svplot.figure.new_figure. It is
+            resized to fit the grid. Defaults to a new pyplot figure.
+        axes : np.ndarray, shape (n_rows, n_cols, 3), optional
+            Prebuilt axes from ``joint_axes_layout``, e.g. a pooled figure
+            from svplot.pool. The figure holding them is used as is;
+            `fig`, `panel_size` and `ratio` are ignored.
+        data : pd.DataFrame, pyarrow.Table, or str
+            Arrow inputs and Parquet/Feather paths are loaded with only the
+            x, y, row and col columns.
         """
 
-        if row is None:
-            row_names = []
+        filters = {}
+        if row is not None and row_order is not None:
+            filters[row] = row_order
+        if col is not None and col_order is not None:
+            filters[col] = col_order
+        data = load_columns(data, [x, y, row, col], filters)
+
+        # Facets are encoded once; cells are split on the integer codes
+        rows = None if row is None else encode(data[row], row_order,
+                                               sort=False)
+        cols = None if col is None else encode(data[col], col_order,
+                                               sort=False)
+        n_cols = 1 if cols is None else len(cols)
+        n_rows = 1 if rows is None else len(rows)
+
+        if axes is not None:
+            if axes.shape != (n_rows, n_cols, 3):
+                msg = 'Expected axes of shape {0}, got {1}'
+                raise Exception(msg.format((n_rows, n_cols, 3), axes.shape))
+            fig = axes.flat[0].figure
         else:
-            row_names = sns.utils.categorical_order(data[row], row_order)
-
-        if col is None:
-            col_names = []
-        else:
-            col_names = sns.utils.categorical_order(data[col], col_order)
-
-        #  if col is not None and col_order is None:
-            #  col_order = data[col].drop_duplicates().sort_values()
-        #  n_cols = len(col_order)
-        n_cols = 1 if col is None else len(col_names)
-        n_rows = 1 if row is None else len(row_names)
-
-        self.fig = plt.figure(figsize=(n_cols * panel_size,
-                                       n_rows * panel_size))
+            figsize = (n_cols * panel_size, n_rows * panel_size)
+            if fig is None:
+                fig = plt.figure(figsize=figsize)
+            else:
+                fig.set_size_inches(figsize)
+        self.fig = fig
 
-        self.gs = gridspec.GridSpec(n_rows, n_cols)
         self.grids = np.empty((n_rows, n_cols), dtype=object)
 
-        if len(row_names) > 0 and len(col_names) > 0:
-            for i, row_val in enumerate(row_names):
-                for j, col_val in enumerate(col_names):
-                    subdata = data.loc[(data[col] == col_val) &
-                                       (data[row] == row_val)]
-                    ss = self.gs[i, j]
-                    gs = gridspec.GridSpecFromSubplotSpec(ratio + 1, ratio + 1,
-                                                          subplot_spec=ss)
+        if axes is None:
+            axes = joint_axes_layout(fig, n_rows, n_cols, ratio)
 
-                    grid = JointGrid(x, y, data=subdata, gs=gs)
-                    self.grids[i, j] = grid
+        if rows is not None and cols is not None:
+            n_cells = len(rows) * len(cols)
+            cells = np.where((rows.codes >= 0) & (cols.codes >= 0),
+                             rows.codes.astype(np.int64) * len(cols) +
+                             cols.codes, -1)
+            cell_rows = Categories(np.arange(n_cells), cells).split()
+            for k, idx in enumerate(cell_rows):
+                i, j = divmod(k, len(cols))
+                grid = JointGrid(x, y, data=data.iloc[idx], axes=axes[i, j])
+                self.grids[i, j] = grid
 
         else:
-            if len(row_names) > 0:
-                facets = row_names
-                facet = row
+            if rows is not None:
+                facets = rows
                 grids = self.grids[:, 0]
+                facet_axes = axes[:, 0]
             else:
-                facets = col_names
-                facet = col
+                facets = cols
                 grids = self.grids[0]
+                facet_axes = axes[0]
+
+            if facets is None:
+                facet_rows = [np.arange(data.shape[0])]
+            else:
+                facet_rows = facets.split()
 
-            for i, val in enumerate(facets):
-                subdata = data.loc[data[facet] == val]
-                gs = gridspec.GridSpecFromSubplotSpec(ratio + 1, ratio + 1,
-                                                      subplot_spec=self.gs[i])
-                grid = JointGrid(x, y, data=subdata, gs=gs)
+            for i, idx in enumerate(facet_rows):
+                grid = JointGrid(x, y, data=data.iloc[idx],
+                                 axes=facet_axes[i])
                 grids[i] = grid
 
     def set_xlims(self, xmin, xmax):
@@ -192,7 +411,9 @@ class JointGrids:
     def plot_joint(self, func, **kwargs):
         for grid in self.grids.flat:
             grid.plot_joint(func, **kwargs)
+        apply_rasterization_policy(self.fig)
 
     def plot_marginals(self, func, **kwargs):
         for grid in self.grids.flat:
             grid.plot_marginals(func, **kwargs)
+        apply_rasterization_policy(self.fig)
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Incrementally updated SV size and VAF plots.
+
+Each live plot keeps running per-hue accumulators (log-size histogram counts,
+VAF counts between ticks) and updates its existing lines and fills in place
+as chunks arrive. An update costs time proportional to the chunk plus the
+fixed grid size, however many variants have been accumulated.
+
+    >>> live = LiveVafCum(ax=ax, hue='batch')
+    >>> for chunk in batches:
+    ...     live.update(chunk)
+    ...     fig.canvas.draw_idle()
+"""
+
+import numpy as np
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+from .plotters import _format_vaf_axes, _set_svsize_xticks
+from .categorical import encode
+from .stats import (log_bin_edges, bin_index, binned_log_density,
+                    grouped_bin_counts, vaf_ticks)
+
+
+class _GroupedCounts:
+    """
+    Running (group, bin) counts over a growing set of groups.
+
+    Groups are fixed to `order` if given; otherwise they are added in order
+    of first appearance, so existing groups keep their colors.
+    """
+
+    def __init__(self, n_bins, order=None):
+        self.n_bins = n_bins
+        self.order = order
+        self.groups = [] if order is None else list(order)
+        self._index = {g: i for i, g in enumerate(self.groups)}
+        self.counts = np.zeros((len(self.groups), n_bins))
+        # Rows (or total weight) per group, including out-of-range bins
+        self.totals = np.zeros(len(self.groups))
+
+    def add(self, idx, hue=None, weights=None):
+        """
+        Accumulate a chunk of bin indices.
+
+        Returns
+        -------
+        touched : np.ndarray of int
+            Groups that received observations.
+        """
+
+        if hue is None:
+            if not self.groups:
+                self._add_group('all')
+            codes = np.zeros(idx.shape[0], dtype=np.int64)
+        else:
+            # Encode against the chunk's own groups, then map to global
+            chunks = encode(hue, self.order, sort=False)
+            chunk_groups = chunks.categories
+            codes = chunks.codes.astype(np.int64)
+            if self.order is None:
+                for g in chunk_groups:
+                    if g not in self._index:
+                        self._add_group(g)
+                remap = np.array([self._index[g] for g in chunk_groups] +
+                                 [-1], dtype=np.int64)
+                codes = remap[codes]
+
+        counts = grouped_bin_counts(idx, codes, len(self.groups),
+                                    self.n_bins, weights)
+        self.counts += counts
+
+        keep = codes >= 0
+        w = None if weights is None else np.asarray(weights)[keep]
+        self.totals += np.bincount(codes[keep], weights=w,
+                                   minlength=len(self.groups))
+        return np.flatnonzero(counts.any(axis=1))
+
+    def _add_group(self, group):
+        self._index[group] = len(self.groups)
+        self.groups.append(group)
+        self.counts = np.vstack([self.counts, np.zeros((1, self.n_bins))])
+        self.totals = np.append(self.totals, 0)
+
+
+class _LivePlot:
+    """
+    Shared column lookup, artist bookkeeping and legend handling.
+    """
+
+    def __init__(self, ax, hue, hue_order, hue_dict, palette, weights):
+        if ax is None:
+            ax = plt.gca()
+        if palette is None:
+            palette = sns.color_palette('colorblind')
+        if hue_order is not None and len(hue_order) > len(palette):
+            raise Exception('Palette smaller than number of hue variables')
+
+        self.ax = ax
+        self.hue = hue
+        self.hue_dict = hue_dict
+        self.palette = palette
+        self.weights = weights
+        # Group index -> (line, fill)
+        self.artists = {}
+
+    def _columns(self, df, hue, weights):
+        if hue is None and self.hue is not None:
+            if df is None:
+                msg = 'Plot has hue {0!r}; pass `df` or `hue` with each chunk'
+                raise ValueError(msg.format(self.hue))
+            hue = df[self.hue].values
+        if weights is None and self.weights is not None:
+            if df is None:
+                msg = ('Plot has weights {0!r}; pass `df` or `weights` with '
+                       'each chunk')
+                raise ValueError(msg.format(self.weights))
+            weights = df[self.weights].values
+        return hue, weights
+
+    def _color(self, i):
+        if i >= len(self.palette):
+            raise Exception('Palette smaller than number of hue variables')
+        return self.palette[i]
+
+    def _label(self, group):
+        if self.hue_dict is None:
+            return str(group)
+        return str(self.hue_dict[group])
+
+    def _update_legend(self, labels, loc='best'):
+        if self.hue is None:
+            return
+        drawn = sorted(self.artists)
+        handles = [self.artists[i][0] for i in drawn]
+        labels = [labels[i] for i in drawn]
+        l = self.ax.legend(handles, labels, frameon=True, loc=loc)
+        l.get_frame().set_linewidth(1)
+
+
+class LiveSvsizeDistro(_LivePlot):
+    """
+    SV size distribution updated in place as chunks of variants arrive.
+
+    Densities are smoothed from running log-binned counts, matching
+    svplot.plotdata.compute_svsize_distro on all variants seen so far.
+    Legend counts include variants outside [xmin, xmax], as in
+    svplot.plotters.plot_svsize_distro.
+
+    Parameters
+    ----------
+    ax : matplotlib Axes, optional
+    hue : str, optional
+        Hue column of the chunks passed to `update`.
+    hue_order : list, optional
+        Groups to plot. Defaults to groups in order of first appearance.
+    hue_dict : dict, optional
+        Mapping of group to legend label.
+    palette : list of matplotlib colors, optional
+    weights : str, optional
+        Weight column of the chunks.
+    svlen : str, optional
+        Column of raw integer SV lengths, used in place of `log_svsize`.
+    xmin, xmax : int, optional
+    bins_per_decade : int, optional
+    """
+
+    def __init__(self, ax=None, hue=None, hue_order=None, hue_dict=None,
+                 palette=None, weights=None, svlen=None, xmin=1, xmax=8,
+                 bins_per_decade=50):
+        super().__init__(ax, hue, hue_order, hue_dict, palette, weights)
+
+        self.svlen = svlen
+        self.log_edges, self.int_edges = log_bin_edges(xmin, xmax,
+                                                       bins_per_decade)
+        self.counts = _GroupedCounts(self.log_edges.shape[0] - 1, hue_order)
+
+        self.ax.yaxis.grid(False)
+        self.ax.set_ylabel('Density')
+        self.ax.set_xlabel('Log-scaled SV length')
+        _set_svsize_xticks(self.ax, xmin, xmax)
+        self.ax.set_xlim(xmin, xmax)
+
+    def update(self, df=None, log_svsize=None, svlen=None, hue=None,
+               weights=None):
+        """
+        Add a chunk of variants and update the affected curves.
+
+        Parameters
+        ----------
+        df : pd.DataFrame, optional
+            Chunk holding the size, hue and weight columns.
+        log_svsize, svlen, hue, weights : np.ndarray, optional
+            Chunk arrays, in place of (or overriding) `df` columns. A plot
+            with `hue` or `weights` set needs them from one or the other;
+            a ValueError is raised otherwise.
+
+        Returns
+        -------
+        artists : list
+            Lines and fills that were updated or created.
+        """
+
+        if log_svsize is None and svlen is None:
+            if self.svlen is not None:
+                svlen = df[self.svlen].values
+            else:
+                log_svsize = df['log_svsize'].values
+        hue, weights = self._columns(df, hue, weights)
+
+        if svlen is not None:
+            idx = bin_index(np.abs(svlen), self.int_edges)
+        else:
+            idx = bin_index(log_svsize, self.log_edges)
+
+        touched = self.counts.add(idx, hue, weights)
+
+        updated = []
+        for i in touched:
+            grid, density = binned_log_density(self.counts.counts[i],
+                                               self.log_edges)
+            if i not in self.artists:
+                self._add_curve(i, grid, density)
+            else:
+                line, fill = self.artists[i]
+                line.set_data(grid, density)
+                fill.set_verts([self._fill_verts(grid, density)])
+            updated.extend(self.artists[i])
+
+        labels = ['{0} (n={1:,})'.format(self._label(g), int(round(n)))
+                  for g, n in zip(self.counts.groups, self.counts.totals)]
+        self._update_legend(labels)
+
+        ymax = max([line.get_ydata().max()
+                    for line, _ in self.artists.values()] + [0])
+        self.ax.set_ylim(0, ymax * 1.05 if ymax > 0 else 1)
+
+        return updated
+
+    @staticmethod
+    def _fill_verts(grid, density):
+        return np.concatenate([[[grid[0], 0]],
+                               np.column_stack([grid, density]),
+                               [[grid[-1], 0]]])
+
+    def _add_curve(self, i, grid, density):
+        color = self._color(i)
+        fill = self.ax.fill_between(grid, density, color=color, alpha=0.2)
+        line, = self.ax.plot(grid, density, color=color, linewidth=2.5)
+        self.artists[i] = (line, fill)
+
+
+class LiveVafCum(_LivePlot):
+    """
+    Cumulative VAF distribution updated in place as chunks arrive.
+
+    Counts of variants between consecutive VAF ticks are accumulated per
+    hue, so each curve equals svplot.plotdata.compute_vaf_cum on all
+    variants seen so far.
+
+    Parameters
+    ----------
+    ax : matplotlib Axes, optional
+    hue : str, optional
+        Hue column of the chunks passed to `update`.
+    hue_order : list, optional
+        Groups to plot. Defaults to groups in order of first appearance.
+    hue_dict : dict, optional
+        Mapping of group to legend label.
+    palette : list of matplotlib colors, optional
+    weights : str, optional
+        Weight column of the chunks.
+    xmin, xmax : float, optional
+    """
+
+    def __init__(self, ax=None, hue=None, hue_order=None, hue_dict=None,
+                 palette=None, weights=None, xmin=0.002, xmax=1):
+        super().__init__(ax, hue, hue_order, hue_dict, palette, weights)
+
+        self.xticks = vaf_ticks(xmin, xmax)
+        # Last column counts variants past the final tick (and NaNs)
+        self.counts = _GroupedCounts(self.xticks.shape[0] + 1, hue_order)
+
+        _format_vaf_axes(self.ax, self.xticks)
+
+    def update(self, df=None, vf=None, hue=None, weights=None):
+        """
+        Add a chunk of variants and update the affected curves.
+
+        Parameters
+        ----------
+        df : pd.DataFrame, optional
+            Chunk holding the `vf`, hue and weight columns.
+        vf, hue, weights : np.ndarray, optional
+            Chunk arrays, in place of (or overriding) `df` columns. A plot
+            with `hue` or `weights` set needs them from one or the other;
+            a ValueError is raised otherwise.
+
+        Returns
+        -------
+        artists : list
+            Lines that were updated or created.
+        """
+
+        if vf is None:
+            vf = df['vf'].values
+        hue, weights = self._columns(df, hue, weights)
+
+        idx = np.searchsorted(self.xticks, vf, side='left')
+        touched = self.counts.add(idx, hue, weights)
+
+        log_xticks = np.log10(self.xticks)
+        updated = []
+        for i in touched:
+            cum = np.cumsum(self.counts.counts[i])
+            ecdf = cum[:-1] / cum[-1]
+            if i not in self.artists:
+                line, = self.ax.plot(log_xticks, ecdf, color=self._color(i),
+                                     linewidth=2.5)
+                self.artists[i] = (line, None)
+            else:
+                self.artists[i][0].set_ydata(ecdf)
+            updated.append(self.artists[i][0])
+
+        self._update_legend([self._label(g) for g in self.counts.groups],
+                            loc='lower right')
+
+        return updated
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Venn subset counts from SV call sets matched by interval overlap.
+
+Calls from every set are sorted once by (chrom, svtype, start). Candidate
+matches for each call are the calls that follow it in that order and start
+early enough to possibly match, found with a single searchsorted. Candidate
+pairs are expanded and tested in vectorized chunks, matched calls are merged
+into clusters, and each cluster is counted in the Venn region given by the
+sets it contains.
+
+    >>> counts = venn_counts([calls_a, calls_b, calls_c], min_overlap=0.5)
+    >>> venn3(counts, set_labels=('A', 'B', 'C'))
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+from .stats import encode_groups
+
+# Coordinates must be smaller than this; (chrom, svtype) keys are packed
+# above it into a single sortable int64
+_COORD_BITS = 33
+
+
+def _get_columns(calls, columns):
+    if isinstance(calls, (tuple, list)):
+        arrays = list(calls)
+        if len(arrays) == 3:
+            arrays.append(None)
+    else:
+        arrays = [calls[c] if c is not None and c in calls else None
+                  for c in columns]
+
+    chrom, start, end, svtype = arrays
+    n = np.asarray(start).shape[0]
+    if svtype is None:
+        svtype = np.zeros(n, dtype=np.int64)
+
+    return (np.asarray(chrom), np.asarray(start, dtype=np.int64),
+            np.asarray(end, dtype=np.int64), np.asarray(svtype))
+
+
+def _concat_callsets(callsets, columns):
+    chroms, starts, ends, svtypes, set_ids = [], [], [], [], []
+    for i, calls in enumerate(callsets):
+        chrom, start, end, svtype = _get_columns(calls, columns)
+        chroms.append(chrom)
+        starts.append(start)
+        ends.append(end)
+        svtypes.append(svtype)
+        set_ids.append(np.full(start.shape[0], i, dtype=np.int64))
+
+    return (np.concatenate(chroms), np.concatenate(starts),
+            np.concatenate(ends), np.concatenate(svtypes),
+            np.concatenate(set_ids))
+
+
+def _candidate_pairs(n_candidates, chunk_pairs):
+    """
+    Yield (i, j) index arrays for i < j <= i + n_candidates[i], in chunks.
+    """
+
+    n = n_candidates.shape[0]
+    totals = np.cumsum(n_candidates)
+
+    start = 0
+    while start < n:
+        # Take as many rows as fit in the chunk, but at least one
+        base = totals[start - 1] if start > 0 else 0
+        stop = np.searchsorted(totals, base + chunk_pairs, side='right')
+        stop = max(stop, start + 1)
+
+        counts = n_candidates[start:stop]
+        rows = np.repeat(np.arange(start, stop), counts)
+        offsets = np.arange(rows.shape[0]) - np.repeat(
+            np.cumsum(counts) - counts, counts)
+        yield rows, rows + offsets + 1
+
+        start = stop
+
+
+def _is_match(start, end, i, j, min_overlap, window):
+    match = np.zeros(i.shape[0], dtype=bool)
+
+    if min_overlap is not None:
+        overlap = (np.minimum(end[i], end[j]) -
+                   np.maximum(start[i], start[j]))
+        len_i = end[i] - start[i]
+        len_j = end[j] - start[j]
+        match |= ((overlap >= min_overlap * len_i) &
+                  (overlap >= min_overlap * len_j) & (overlap > 0))
+
+    if window is not None:
+        match |= ((np.abs(start[i] - start[j]) <= window) &
+                  (np.abs(end[i] - end[j]) <= window))
+
+    return match
+
+
+def _connected_components(n, u, v):
+    """
+    Label connected components with min-label propagation and pointer
+    jumping.
+    """
+
+    labels = np.arange(n)
+    if u.shape[0] == 0:
+        return labels
+
+    while True:
+        prev = labels
+        m = np.minimum(labels[u], labels[v])
+        labels = labels.copy()
+        np.minimum.at(labels, u, m)
+        np.minimum.at(labels, v, m)
+
+        # Jump each label to its root
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+        if np.array_equal(labels, prev):
+            return labels
+
+
+def match_calls(callsets, min_overlap=0.5, window=None,
+                columns=('chrom', 'start', 'end', 'svtype'),
+                chunk_pairs=2 ** 22):
+    """
+    Find matching calls across call sets.
+
+    Calls match when they share chromosome and SV type and either overlap
+    reciprocally by at least `min_overlap` or have both breakpoints within
+    `window` bp of each other. Calls from the same set are never matched
+    directly. Zero-length calls (e.g. insertions) only match under the
+    window rule.
+
+    Parameters
+    ----------
+    callsets : list
+        Call sets, each a DataFrame or mapping with the `columns` arrays, or
+        a (chrom, start, end[, svtype]) tuple of arrays.
+    min_overlap : float, optional
+        Minimum reciprocal overlap fraction. None disables the overlap rule.
+    window : int, optional
+        Maximum breakpoint distance in bp. None disables the window rule.
+    columns : tuple of str, optional
+        Names of the chrom, start, end and svtype columns. Set svtype to
+        None to ignore SV type.
+    chunk_pairs : int, optional
+        Number of candidate pairs tested at once; bounds memory use.
+
+    Returns
+    -------
+    set_ids : np.ndarray of int
+        Call set of each call, in input order.
+    cluster : np.ndarray of int
+        Cluster label of each call. Matched calls share a label.
+    """
+
+    if min_overlap is None and window is None:
+        raise Exception('Provide `min_overlap`, `window`, or both')
+    if min_overlap is not None and not 0 < min_overlap <= 1:
+        raise Exception('min_overlap must be in (0, 1]')
+
+    chrom, start, end, svtype, set_ids = _concat_callsets(callsets, columns)
+    n = start.shape[0]
+
+    # Pack (chrom, svtype) above the coordinate so one sort groups them
+    chroms, chrom_codes = encode_groups(chrom)
+    svtypes, type_codes = encode_groups(svtype)
+    key = chrom_codes * svtypes.shape[0] + type_codes
+    packed = (key << _COORD_BITS) + start
+
+    order = np.argsort(packed, kind='mergesort')
+    packed = packed[order]
+    s_start = start[order]
+    s_end = end[order]
+    s_set = set_ids[order]
+
+    # Latest start a following call can have and still match
+    reach = s_start.copy()
+    if min_overlap is not None:
+        lengths = s_end - s_start
+        reach = np.maximum(reach, s_end - np.ceil(min_overlap * lengths)
+                           .astype(np.int64))
+    if window is not None:
+        reach = np.maximum(reach, s_start + window)
+
+    upper = np.searchsorted(packed, (packed - s_start) + reach, side='right')
+    n_candidates = np.maximum(upper - np.arange(n) - 1, 0)
+
+    us, vs = [], []
+    for i, j in _candidate_pairs(n_candidates, chunk_pairs):
+        keep = s_set[i] != s_set[j]
+        i, j = i[keep], j[keep]
+        keep = _is_match(s_start, s_end, i, j, min_overlap, window)
+        us.append(i[keep])
+        vs.append(j[keep])
+
+    u = np.concatenate(us) if us else np.array([], dtype=np.int64)
+    v = np.concatenate(vs) if vs else np.array([], dtype=np.int64)
+
+    sorted_labels = _connected_components(n, u, v)
+
+    cluster = np.empty(n, dtype=np.int64)
+    cluster[order] = order[sorted_labels]
+    return set_ids, cluster
+
+
+def venn_counts(callsets, min_overlap=0.5, window=None,
+                columns=('chrom', 'start', 'end', 'svtype'),
+                chunk_pairs=2 ** 22):
+    """
+    Venn subset counts of SV call sets matched by overlap.
+
+    Each cluster of matched calls is counted once, in the region of the
+    sets it contains.
+
+    Parameters
+    ----------
+    callsets : list
+        Two to four call sets; see `match_calls`.
+    min_overlap, window, columns, chunk_pairs
+        As in `match_calls`.
+
+    Returns
+    -------
+    counts : np.ndarray of int
+        Exclusive region counts in the order expected by venn2, venn3 and
+        venn4, e.g. [A, B, C, AB, AC, BC, ABC] for three sets.
+    """
+
+    n_sets = len(callsets)
+    if n_sets not in (2, 3, 4):
+        raise Exception('Venn counts support 2, 3, or 4 call sets')
+
+    set_ids, cluster = match_calls(callsets, min_overlap, window, columns,
+                                   chunk_pairs)
+
+    masks = np.zeros(set_ids.shape[0], dtype=np.int64)
+    np.bitwise_or.at(masks, cluster, 1 << set_ids)
+    # Each cluster is labeled by the index of its root call
+    roots = cluster == np.arange(cluster.shape[0])
+    region_counts = np.bincount(masks[roots], minlength=2 ** n_sets)
+
+    regions = [sum(1 << i for i in combo)
+               for k in range(1, n_sets + 1)
+               for combo in combinations(range(n_sets), k)]
+    return region_counts[regions]
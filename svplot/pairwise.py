@@ -0,0 +1,370 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Batched pairwise tests for comparison brackets.
+
+Every test here is evaluated for all pairs at once: 2x2 contingency tables
+are stacked into an (n, 2, 2) array, Fisher's exact test sums hypergeometric
+probabilities over a padded support grid, and the chi-square test is a
+closed form over the stacked margins. The results are corrected for
+multiple testing and formatted for svplot.annotation.add_comparison_bars.
+
+    >>> p = pairwise_pvalues('fisher', counts=carriers, totals=samples,
+    ...                      correction='fdr_bh')
+"""
+
+import numpy as np
+
+TESTS = ('fisher', 'chi2', 'mannwhitney')
+CORRECTIONS = ('bonferroni', 'holm', 'fdr_bh')
+
+# Two-sided tests count outcomes as extreme as the observed one up to this
+# relative tolerance in probability, as scipy does
+_FISHER_RTOL = 1e-7
+
+
+def _import_special():
+    try:
+        import scipy.special
+    except ImportError:
+        raise ImportError('scipy is required to compute p-values')
+    return scipy.special
+
+
+def _as_tables(tables):
+    tables = np.asarray(tables, dtype=np.int64)
+    if tables.ndim == 2:
+        tables = tables[None]
+    if tables.shape[1:] != (2, 2):
+        raise Exception('Contingency tables must have shape (n, 2, 2)')
+    if (tables < 0).any():
+        raise Exception('Contingency tables must be non-negative')
+    return tables
+
+
+def count_tables(counts, totals):
+    """
+    Stack 2x2 tables comparing adjacent pairs of bars.
+
+    Bars are paired (0, 1), (2, 3), ... as in add_comparison_bars.
+
+    Parameters
+    ----------
+    counts : arraylike of int
+        Number of successes (e.g. carriers) in each bar.
+    totals : arraylike of int
+        Number of trials (e.g. samples) in each bar.
+
+    Returns
+    -------
+    tables : np.ndarray, shape (n_pairs, 2, 2)
+        [[count_0, total_0 - count_0], [count_1, total_1 - count_1]]
+    """
+
+    counts = np.asarray(counts, dtype=np.int64)
+    totals = np.asarray(totals, dtype=np.int64)
+    if counts.shape != totals.shape:
+        raise Exception('Counts and totals must be the same length')
+
+    n_pairs = counts.shape[0] // 2
+    rows = np.stack([counts, totals - counts], axis=1)[:2 * n_pairs]
+    return rows.reshape(n_pairs, 2, 2)
+
+
+def fisher_exact(tables, alternative='two-sided', chunksize=2 ** 22):
+    """
+    Fisher's exact test of many 2x2 tables.
+
+    Parameters
+    ----------
+    tables : arraylike of int, shape (n, 2, 2)
+    alternative : 'two-sided' | 'less' | 'greater', optional
+        As in scipy.stats.fisher_exact.
+    chunksize : int, optional
+        Maximum number of support points evaluated at once.
+
+    Returns
+    -------
+    p : np.ndarray of float, shape (n,)
+    """
+
+    if alternative not in ('two-sided', 'less', 'greater'):
+        raise Exception("Alternative must be one of 'two-sided', 'less', "
+                        "'greater'")
+    gammaln = _import_special().gammaln
+
+    tables = _as_tables(tables)
+    a = tables[:, 0, 0]
+    row = tables[:, 0].sum(axis=1)
+    col = tables[:, :, 0].sum(axis=1)
+    n = tables.sum(axis=(1, 2))
+
+    # Support of the top-left cell given the margins
+    lo = np.maximum(0, row + col - n)
+    hi = np.minimum(row, col)
+    width = hi - lo + 1
+
+    def _log_pmf(k, row, col, n):
+        def _log_comb(n, k):
+            return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+        return (_log_comb(col, k) + _log_comb(n - col, row - k) -
+                _log_comb(n, row))
+
+    p = np.ones(tables.shape[0])
+    observed = _log_pmf(a, row, col, n)
+
+    # Pad each table's support to the widest in its chunk; sorting by width
+    # keeps the padding small
+    order = np.argsort(width, kind='mergesort')
+    start = 0
+    while start < order.shape[0]:
+        stop = start + 1
+        while (stop < order.shape[0] and
+               (stop - start + 1) * width[order[stop]] <= chunksize):
+            stop += 1
+        idx = order[start:stop]
+        start = stop
+
+        k = lo[idx, None] + np.arange(width[idx].max())[None, :]
+        valid = k <= hi[idx, None]
+        k = np.where(valid, k, lo[idx, None])
+        pmf = np.exp(_log_pmf(k, row[idx, None], col[idx, None],
+                              n[idx, None]))
+        pmf[~valid] = 0
+
+        if alternative == 'less':
+            extreme = k <= a[idx, None]
+        elif alternative == 'greater':
+            extreme = k >= a[idx, None]
+        else:
+            extreme = pmf <= np.exp(observed[idx, None]) * (1 + _FISHER_RTOL)
+
+        p[idx] = np.where(extreme, pmf, 0).sum(axis=1)
+
+    return np.minimum(p, 1)
+
+
+def chi2_contingency(tables, correction=True):
+    """
+    Chi-square test of independence of many 2x2 tables.
+
+    Parameters
+    ----------
+    tables : arraylike of int, shape (n, 2, 2)
+    correction : bool, optional
+        Apply Yates' continuity correction, as scipy.stats.chi2_contingency.
+
+    Returns
+    -------
+    p : np.ndarray of float, shape (n,)
+        NaN for tables with an empty row or column.
+    """
+
+    erfc = _import_special().erfc
+
+    tables = _as_tables(tables).astype(np.float64)
+    rows = tables.sum(axis=2)
+    cols = tables.sum(axis=1)
+    n = rows.sum(axis=1)
+
+    # All four cells of a 2x2 table deviate from expectation equally
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = np.abs(tables[:, 0, 0] - rows[:, 0] * cols[:, 0] / n)
+        if correction:
+            delta = delta - np.minimum(0.5, delta)
+        stat = delta ** 2 * n ** 3 / (rows.prod(axis=1) * cols.prod(axis=1))
+
+    # Survival function of chi-square with one degree of freedom
+    return erfc(np.sqrt(stat / 2))
+
+
+def _average_ranks(values):
+    order = np.argsort(values, kind='mergesort')
+    sorted_values = values[order]
+
+    bounds = np.flatnonzero(np.diff(sorted_values)) + 1
+    starts = np.concatenate([[0], bounds])
+    ends = np.concatenate([bounds, [values.shape[0]]])
+    ties = ends - starts
+
+    ranks = np.empty(values.shape[0])
+    ranks[order] = np.repeat((starts + ends + 1) / 2, ties)
+    return ranks, ties
+
+
+def mannwhitneyu(samples, alternative='two-sided'):
+    """
+    Mann-Whitney U test comparing adjacent pairs of samples.
+
+    Samples are paired (0, 1), (2, 3), ... as in add_comparison_bars.
+    p-values use the normal approximation with tie and continuity
+    corrections (scipy's method='asymptotic').
+
+    Parameters
+    ----------
+    samples : list of arraylike
+        Observations of each bar.
+    alternative : 'two-sided' | 'less' | 'greater', optional
+
+    Returns
+    -------
+    p : np.ndarray of float, shape (n_pairs,)
+    """
+
+    if alternative not in ('two-sided', 'less', 'greater'):
+        raise Exception("Alternative must be one of 'two-sided', 'less', "
+                        "'greater'")
+    erfc = _import_special().erfc
+
+    n_pairs = len(samples) // 2
+    u = np.empty(n_pairs)
+    mu = np.empty(n_pairs)
+    sigma = np.empty(n_pairs)
+
+    for i in range(n_pairs):
+        x = np.asarray(samples[2 * i], dtype=np.float64)
+        y = np.asarray(samples[2 * i + 1], dtype=np.float64)
+        n1, n2 = x.shape[0], y.shape[0]
+        n = n1 + n2
+
+        ranks, ties = _average_ranks(np.concatenate([x, y]))
+        u[i] = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+        mu[i] = n1 * n2 / 2
+        tie_term = (ties ** 3 - ties).sum() / (n * (n - 1)) if n > 1 else 0
+        sigma[i] = np.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if alternative == 'two-sided':
+            z = (np.abs(u - mu) - 0.5) / sigma
+            p = erfc(z / np.sqrt(2))
+        elif alternative == 'greater':
+            z = (u - mu - 0.5) / sigma
+            p = erfc(z / np.sqrt(2)) / 2
+        else:
+            z = (u - mu + 0.5) / sigma
+            p = erfc(-z / np.sqrt(2)) / 2
+
+    return np.minimum(p, 1)
+
+
+def adjust_pvalues(p, method='fdr_bh'):
+    """
+    Correct p-values for multiple testing.
+
+    Parameters
+    ----------
+    p : arraylike of float
+    method : 'bonferroni' | 'holm' | 'fdr_bh' | None, optional
+        Family-wise (Bonferroni, Holm) or false discovery rate
+        (Benjamini-Hochberg) correction. None returns `p` unchanged.
+        NaN p-values are ignored and left as NaN.
+
+    Returns
+    -------
+    p_adj : np.ndarray of float
+    """
+
+    p = np.asarray(p, dtype=np.float64)
+    if method is None:
+        return p
+    if method not in CORRECTIONS:
+        raise Exception('Correction must be one of {0}'.format(
+            ', '.join(CORRECTIONS)))
+
+    adjusted = np.full(p.shape, np.nan)
+    tested = np.flatnonzero(~np.isnan(p))
+    m = tested.shape[0]
+    if m == 0:
+        return adjusted
+
+    order = tested[np.argsort(p[tested], kind='mergesort')]
+    ranked = p[order]
+
+    if method == 'bonferroni':
+        ranked = ranked * m
+    elif method == 'holm':
+        ranked = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    else:
+        ranked = ranked * m / np.arange(1, m + 1)
+        ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+
+    adjusted[order] = np.minimum(ranked, 1)
+    return adjusted
+
+
+def pairwise_pvalues(test, counts=None, totals=None, tables=None,
+                     samples=None, correction=None,
+                     alternative='two-sided'):
+    """
+    p-values for adjacent pairs of bars, computed in one batch.
+
+    Parameters
+    ----------
+    test : 'fisher' | 'chi2' | 'mannwhitney'
+    counts, totals : arraylike of int, optional
+        Successes and trials of each bar, for 'fisher' and 'chi2'.
+    tables : arraylike of int, shape (n_pairs, 2, 2), optional
+        Contingency tables, instead of `counts` and `totals`.
+    samples : list of arraylike, optional
+        Observations of each bar, for 'mannwhitney'.
+    correction : 'bonferroni' | 'holm' | 'fdr_bh', optional
+        Multiple-testing correction over all pairs.
+    alternative : 'two-sided' | 'less' | 'greater', optional
+        Ignored by 'chi2'.
+
+    Returns
+    -------
+    p : np.ndarray of float, shape (n_pairs,)
+    """
+
+    if test not in TESTS:
+        raise Exception('Test must be one of {0}'.format(', '.join(TESTS)))
+
+    if test == 'mannwhitney':
+        if samples is None:
+            raise Exception('Mann-Whitney test requires `samples`')
+        p = mannwhitneyu(samples, alternative)
+    else:
+        if tables is None:
+            if counts is None or totals is None:
+                msg = 'Contingency tests require `tables` or `counts` and '
+                msg += '`totals`'
+                raise Exception(msg)
+            tables = count_tables(counts, totals)
+        if test == 'fisher':
+            p = fisher_exact(tables, alternative)
+        else:
+            p = chi2_contingency(tables)
+
+    return adjust_pvalues(p, correction)
+
+
+def format_pvalues(p, fmt='p={:.3f}'):
+    """
+    Format p-values as bracket labels.
+
+    Parameters
+    ----------
+    p : arraylike of float
+    fmt : str or callable, optional
+        Format string, 'stars' for significance stars
+        (*** p < 0.001, ** p < 0.01, * p < 0.05, else 'ns'), or a function
+        mapping a p-value to its label.
+
+    Returns
+    -------
+    labels : np.ndarray of str
+    """
+
+    p = np.asarray(p, dtype=np.float64)
+    if callable(fmt):
+        labels = [fmt(pval) for pval in p]
+    elif fmt == 'stars':
+        stars = np.array(['***', '**', '*', 'ns'])
+        labels = stars[np.searchsorted([0.001, 0.01, 0.05], p, side='right')]
+    else:
+        labels = [fmt.format(pval) for pval in p]
+
+    return np.array(labels, dtype=str)
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Pipelined batch rendering of per-sample figures.
+
+A batch runs as three overlapping stages connected by bounded queues:
+
+    load (+ compute) -> render -> write
+
+Loader threads read the next inputs and reduce them to plot data on the
+same thread, while render threads draw and encode figures on pooled,
+pyplot-free figures, and a writer thread saves the encoded images. The queues hold at most `queue_size` items, so
+memory stays flat however many figures are made.
+
+    >>> load, compute, plot = plot_stages('vaf_cum', hue='batch')
+    >>> jobs = [('{0}.png'.format(s), '{0}.parquet'.format(s))
+    ...         for s in samples]
+    >>> report = run_batch(jobs, load, compute, plot, figsize=(4, 3))
+    >>> report['figures_per_second']
+"""
+
+import io
+import queue
+import threading
+import time
+
+from .overlap import venn_counts
+from .plotdata import compute_svsize_distro, compute_vaf_cum, compute_venn
+from .plotters import render_svsize_distro, render_vaf_cum, violin_with_strip
+from .pool import FigurePool
+from .tables import load_columns
+from .venn import render_venn
+
+STAGES = ('load', 'render', 'write')
+
+# Signals the end of a queue to its consumers
+_DONE = object()
+
+_VENN4_COLORS = ['#8eab12', '#feb308', '#8f1402', '#0485d1']
+
+
+def _column(df, name):
+    return None if name is None else df[name].values
+
+
+def plot_stages(kind, **kwargs):
+    """
+    Load, compute and plot functions for a svplot plot.
+
+    Returned in the argument order of `run_batch`, so
+    ``run_batch(jobs, *plot_stages(kind))`` runs the plot.
+
+    Parameters
+    ----------
+    kind : 'svsize_distro' | 'vaf_cum' | 'violin_with_strip' | 'venn4'
+        Sources are a DataFrame, pyarrow Table or Parquet/Feather path,
+        except for 'venn4', whose sources are lists of call sets (see
+        svplot.overlap.venn_counts).
+    kwargs : key, value mappings
+        Plot options:
+        - svsize_distro: hue, hue_order, hue_dict, weights, xmin, xmax,
+          palette
+        - vaf_cum: hue, hue_order, hue_dict, weights, xmin, xmax, palette
+        - violin_with_strip: x, y, hue, order, hue_order, orient,
+          violin_kwargs
+        - venn4: set_labels, min_overlap, window, set_colors
+
+    Returns
+    -------
+    load : callable
+        source -> input table
+    compute : callable
+        input table -> reduced plot data
+    plot : callable
+        (plot data, ax) -> None
+    """
+
+    if kind in ('svsize_distro', 'vaf_cum'):
+        hue = kwargs.get('hue')
+        hue_order = kwargs.get('hue_order')
+        weights = kwargs.get('weights')
+        palette = kwargs.get('palette')
+        value_col = 'log_svsize' if kind == 'svsize_distro' else 'vf'
+        filters = None if hue is None or hue_order is None else \
+            {hue: hue_order}
+
+        def load(source):
+            return load_columns(source, [value_col, hue, weights], filters)
+
+        reduce_kws = dict(hue_order=hue_order,
+                          hue_dict=kwargs.get('hue_dict'))
+        for key in ('xmin', 'xmax'):
+            if key in kwargs:
+                reduce_kws[key] = kwargs[key]
+
+        if kind == 'svsize_distro':
+            def compute(df):
+                return compute_svsize_distro(
+                    log_svsize=df[value_col].values, hue=_column(df, hue),
+                    weights=_column(df, weights), **reduce_kws)
+
+            def plot(data, ax):
+                render_svsize_distro(data, ax, palette)
+        else:
+            def compute(df):
+                return compute_vaf_cum(df[value_col].values,
+                                       hue=_column(df, hue),
+                                       weights=_column(df, weights),
+                                       **reduce_kws)
+
+            def plot(data, ax):
+                render_vaf_cum(data, ax, palette)
+
+    elif kind == 'violin_with_strip':
+        columns = [kwargs.get(k) for k in ('x', 'y', 'hue')]
+
+        def load(source):
+            return load_columns(source, columns)
+
+        def compute(df):
+            return df
+
+        def plot(df, ax):
+            violin_with_strip(data=df, ax=ax, **kwargs)
+
+    elif kind == 'venn4':
+        set_labels = kwargs.get('set_labels', ('A', 'B', 'C', 'D'))
+        set_colors = kwargs.get('set_colors', _VENN4_COLORS)
+        columns = ['chrom', 'start', 'end', 'svtype']
+
+        def load(source):
+            return [load_columns(calls, columns) for calls in source]
+
+        def compute(callsets):
+            counts = venn_counts(callsets,
+                                 min_overlap=kwargs.get('min_overlap', 0.5),
+                                 window=kwargs.get('window'))
+            return compute_venn(counts, set_labels, n_sets=4)
+
+        def plot(data, ax):
+            render_venn(data, ax, set_colors)
+
+    else:
+        raise Exception('Unknown batch plot: {0}'.format(kind))
+
+    return load, compute, plot
+
+
+class _Stage:
+    """
+    Busy time and item counts of one pipeline stage.
+    """
+
+    def __init__(self, n_workers):
+        self.n_workers = n_workers
+        self.busy = 0.0
+        self.items = 0
+        self.lock = threading.Lock()
+        self.remaining = n_workers
+
+    def add(self, seconds):
+        with self.lock:
+            self.busy += seconds
+            self.items += 1
+
+    def finish(self):
+        """Mark one worker finished; True for the last one."""
+        with self.lock:
+            self.remaining -= 1
+            return self.remaining == 0
+
+
+def run_batch(jobs, load, compute, plot, n_loaders=2, n_renderers=1,
+              queue_size=4, layout='single', figsize=(6.4, 4.8), dpi=100,
+              format='png', pool=None, savefig_kws={}):
+    """
+    Render a batch of figures with prefetching and asynchronous writes.
+
+    Parameters
+    ----------
+    jobs : iterable of (output, source)
+        Output path or file-like object, and the source passed to `load`.
+        Consumed lazily.
+    load : callable
+        source -> input; runs on loader threads.
+    compute : callable or None
+        input -> data; reduces each input on the loader thread that read
+        it, so only the reduced data is queued for rendering. None passes
+        inputs to `plot` as loaded.
+    plot : callable
+        (data, axes) -> None; draws on a pooled figure.
+    n_loaders, n_renderers : int, optional
+        Threads for the load/compute and render stages. One thread writes.
+    queue_size : int, optional
+        Capacity of each queue between stages.
+    layout, figsize, dpi : optional
+        Figure layout and size; see svplot.pool.FigurePool.acquire.
+    format : str, optional
+        Image format.
+    pool : svplot.pool.FigurePool, optional
+        Pool to take figures from. Defaults to a pool sized for the
+        render threads.
+    savefig_kws : dict, optional
+        Other keyword arguments passed to fig.savefig.
+
+    Returns
+    -------
+    report : dict
+        Number of figures written, failed jobs as (output, exception),
+        wall time, throughput in figures per second, and the busy seconds
+        and utilization (busy time over wall time per worker) of each
+        stage.
+    """
+
+    if pool is None:
+        pool = FigurePool(max_idle=n_renderers)
+
+    job_queue = queue.Queue(maxsize=queue_size)
+    data_queue = queue.Queue(maxsize=queue_size)
+    image_queue = queue.Queue(maxsize=queue_size)
+
+    stages = {'load': _Stage(n_loaders), 'render': _Stage(n_renderers),
+              'write': _Stage(1)}
+    errors = []
+    errors_lock = threading.Lock()
+
+    def _fail(output, exc):
+        with errors_lock:
+            errors.append((output, exc))
+
+    def _feed():
+        try:
+            for job in jobs:
+                job_queue.put(job)
+        except Exception as exc:
+            _fail(None, exc)
+        finally:
+            for _ in range(n_loaders):
+                job_queue.put(_DONE)
+
+    def _load():
+        try:
+            while True:
+                job = job_queue.get()
+                if job is _DONE:
+                    break
+                # Malformed jobs are reported as themselves
+                output = job
+                start = time.perf_counter()
+                try:
+                    output, source = job
+                    data = load(source)
+                    if compute is not None:
+                        data = compute(data)
+                except Exception as exc:
+                    _fail(output, exc)
+                    continue
+                stages['load'].add(time.perf_counter() - start)
+                data_queue.put((output, data))
+        finally:
+            if stages['load'].finish():
+                for _ in range(n_renderers):
+                    data_queue.put(_DONE)
+
+    def _render():
+        try:
+            while True:
+                item = data_queue.get()
+                if item is _DONE:
+                    break
+                output, data = item
+                start = time.perf_counter()
+                fig = None
+                try:
+                    fig, axes = pool.acquire(layout, figsize, dpi)
+                    plot(data, axes)
+                    buf = io.BytesIO()
+                    fig.savefig(buf, format=format, **savefig_kws)
+                except Exception as exc:
+                    _fail(output, exc)
+                    continue
+                finally:
+                    if fig is not None:
+                        pool.release(fig)
+                stages['render'].add(time.perf_counter() - start)
+                image_queue.put((output, buf.getvalue()))
+        finally:
+            if stages['render'].finish():
+                image_queue.put(_DONE)
+
+    def _write():
+        while True:
+            item = image_queue.get()
+            if item is _DONE:
+                break
+            output, image = item
+            start = time.perf_counter()
+            try:
+                if hasattr(output, 'write'):
+                    output.write(image)
+                else:
+                    with open(output, 'wb') as f:
+                        f.write(image)
+            except Exception as exc:
+                _fail(output, exc)
+                continue
+            stages['write'].add(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=_feed, daemon=True)]
+    threads += [threading.Thread(target=_load, daemon=True)
+                for _ in range(n_loaders)]
+    threads += [threading.Thread(target=_render, daemon=True)
+                for _ in range(n_renderers)]
+    threads += [threading.Thread(target=_write, daemon=True)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    n_figures = stages['write'].items
+    return {
+        'n_figures': n_figures,
+        'errors': errors,
+        'seconds': wall,
+        'figures_per_second': n_figures / wall if wall > 0 else 0.0,
+        'busy_seconds': {name: stages[name].busy for name in STAGES},
+        'utilization': {
+            name: (stages[name].busy / (wall * stages[name].n_workers)
+                   if wall > 0 else 0.0)
+            for name in STAGES
+        },
+    }
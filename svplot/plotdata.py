@@ -0,0 +1,589 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Compute stage of the svplot plots.
+
+Each `compute_*` function reduces raw arrays to a compact dataclass of NumPy
+arrays that a matching `render_*` function in plotters, annotation or venn
+draws. This module depends only on NumPy, so the reductions can run on
+worker nodes without pandas or matplotlib, and the results can be pickled
+or saved with `PlotData.save` and rendered elsewhere.
+"""
+
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from .pairwise import format_pvalues
+from .stats import (log_bin_edges, bin_index, bin_lengths,
+                    binned_log_density, grouped_bin_counts, grouped_ecdf,
+                    encode_groups, vaf_ticks)
+
+
+class PlotData:
+    """Mixin for dict and .npz round-tripping of plot data."""
+
+    def to_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**{f.name: d[f.name] for f in fields(cls)})
+
+    def save(self, file):
+        """
+        Save to an uncompressed .npz archive (no pickling).
+        """
+
+        arrays = {k: np.asarray(v) for k, v in self.to_dict().items()}
+        np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file, allow_pickle=False) as archive:
+            d = {}
+            for f in fields(cls):
+                value = archive[f.name]
+                d[f.name] = value.item() if value.ndim == 0 else value
+        return cls.from_dict(d)
+
+
+@dataclass
+class DensityData(PlotData):
+    """
+    Per-group densities on a shared log-size grid.
+
+    grid : (n_bins,) bin centers, log10 SV length
+    density : (n_groups, n_bins)
+    labels : (n_groups,) str
+    counts : (n_groups,) number (or total weight) of variants per group
+    has_hue : whether groups came from a hue variable
+    xmin, xmax : log10 axis range
+    """
+
+    grid: np.ndarray
+    density: np.ndarray
+    labels: np.ndarray
+    counts: np.ndarray
+    has_hue: bool
+    xmin: int
+    xmax: int
+
+
+@dataclass
+class ECDFData(PlotData):
+    """
+    Per-group ECDFs evaluated at shared VAF ticks.
+
+    xticks : (n_ticks,) VAF tick positions
+    ecdf : (n_groups, n_ticks)
+    labels : (n_groups,) str
+    has_hue : whether groups came from a hue variable
+    """
+
+    xticks: np.ndarray
+    ecdf: np.ndarray
+    labels: np.ndarray
+    has_hue: bool
+
+
+@dataclass
+class LabelData(PlotData):
+    """
+    Text labels positioned in axes coordinates.
+
+    x, y : (n,) label positions, scaled to a (0, 1) axis
+    labels : (n,) str
+    ha, va : text alignment shared by all labels
+    """
+
+    x: np.ndarray
+    y: np.ndarray
+    labels: np.ndarray
+    ha: str
+    va: str
+
+
+@dataclass
+class BracketData(PlotData):
+    """
+    Comparison brackets in axes coordinates.
+
+    segments : (n_pairs, 3, 2, 2) two legs and a crossbar per pair, each as
+        ([x0, x1], [y0, y1])
+    text_x, text_y : (n_labels,) p-value label positions
+    text_labels : (n_labels,) str, empty if no p-values were given
+    ha, va : p-value label alignment
+    """
+
+    segments: np.ndarray
+    text_x: np.ndarray
+    text_y: np.ndarray
+    text_labels: np.ndarray
+    ha: str
+    va: str
+
+
+@dataclass
+class VennData(PlotData):
+    """
+    Venn diagram geometry and labels in axes coordinates.
+
+    ellipses : (n_sets, 5) x, y, width, height, angle
+    set_labels : (n_sets,) str
+    set_label_pos : (n_sets, 3) x, y, rotation
+    subset_labels : (n_subsets,) str
+    subset_label_pos : (n_subsets, 3) x, y, rotation
+    """
+
+    ellipses: np.ndarray
+    set_labels: np.ndarray
+    set_label_pos: np.ndarray
+    subset_labels: np.ndarray
+    subset_label_pos: np.ndarray
+
+
+@dataclass
+class CountData(PlotData):
+    """
+    Counts of a categorical variable, optionally split by hue.
+
+    counts : (n_groups, n_hues) number (or total weight) of rows per cell
+    groups : (n_groups,) str
+    hues : (n_hues,) str; a single empty label when no hue is used
+    total : number (or total weight) of rows counted
+    has_hue : bool
+    """
+
+    counts: np.ndarray
+    groups: np.ndarray
+    hues: np.ndarray
+    total: float
+    has_hue: bool
+
+
+def _labels(groups, hue_dict=None):
+    if hue_dict is None:
+        return np.array([str(g) for g in groups])
+    return np.array([str(hue_dict[g]) for g in groups])
+
+
+def compute_svsize_distro(log_svsize=None, svlen=None, hue=None,
+                          hue_order=None, hue_dict=None, weights=None,
+                          xmin=1, xmax=8, bins_per_decade=50):
+    """
+    Reduce SV sizes to per-group densities on a log-size grid.
+
+    Densities are smoothed from counts log-binned over [xmin, xmax] and
+    integrate to 1 over that range. This matches plot_svsize_distro for
+    `svlen` inputs or with `ci` set, but not its default seaborn KDE of
+    `log_svsize`, which spans the full data range.
+
+    Parameters
+    ----------
+    log_svsize : np.ndarray, optional
+        Log10 SV lengths.
+    svlen : np.ndarray of int, optional
+        Raw integer SV lengths, used in place of `log_svsize`.
+    hue : np.ndarray, optional
+        Group label of each variant.
+    hue_order : list, optional
+    hue_dict : dict, optional
+        Mapping of group to legend label.
+    weights : np.ndarray, optional
+    xmin, xmax : int, optional
+        Log10 size range of the grid.
+    bins_per_decade : int, optional
+
+    Returns
+    -------
+    data : DensityData
+    """
+
+    if (log_svsize is None) == (svlen is None):
+        raise Exception('Provide exactly one of `log_svsize` or `svlen`')
+
+    log_edges, int_edges = log_bin_edges(xmin, xmax, bins_per_decade)
+    n_bins = log_edges.shape[0] - 1
+
+    if hue is None:
+        groups = np.array(['all'])
+        if svlen is not None:
+            counts = bin_lengths(svlen, int_edges, weights)[np.newaxis]
+        else:
+            idx = bin_index(log_svsize, log_edges)
+            codes = np.zeros(idx.shape[0], dtype=np.int64)
+            counts = grouped_bin_counts(idx, codes, 1, n_bins, weights)
+    else:
+        groups, codes = encode_groups(np.asarray(hue), hue_order)
+        if svlen is not None:
+            idx = bin_index(np.abs(svlen), int_edges)
+        else:
+            idx = bin_index(log_svsize, log_edges)
+        counts = grouped_bin_counts(idx, codes, groups.shape[0], n_bins,
+                                    weights)
+
+    # Each group keeps its own Scott bandwidth, as with independent KDEs
+    densities = [binned_log_density(row, log_edges) for row in counts]
+    grid = densities[0][0]
+    density = np.stack([d for _, d in densities])
+
+    return DensityData(grid=grid, density=density,
+                       labels=_labels(groups, hue_dict),
+                       counts=counts.sum(axis=1), has_hue=hue is not None,
+                       xmin=xmin, xmax=xmax)
+
+
+def compute_vaf_cum(vf, hue=None, hue_order=None, hue_dict=None,
+                    weights=None, xmin=0.002, xmax=1):
+    """
+    Reduce VAFs to per-group ECDFs at log-spaced VAF ticks.
+
+    Parameters
+    ----------
+    vf : np.ndarray
+    hue : np.ndarray, optional
+        Group label of each variant.
+    hue_order : list, optional
+    hue_dict : dict, optional
+        Mapping of group to legend label.
+    weights : np.ndarray, optional
+    xmin, xmax : float, optional
+
+    Returns
+    -------
+    data : ECDFData
+    """
+
+    xticks = vaf_ticks(xmin, xmax)
+
+    if hue is None:
+        groups = np.array(['all'])
+        codes = np.zeros(vf.shape[0], dtype=np.int64)
+    else:
+        groups, codes = encode_groups(np.asarray(hue), hue_order)
+
+    keep = codes >= 0
+    if weights is not None:
+        weights = np.asarray(weights)[keep]
+    ecdf = grouped_ecdf(vf[keep], codes[keep], groups.shape[0], xticks,
+                        weights)
+
+    return ECDFData(xticks=xticks, ecdf=ecdf,
+                    labels=_labels(groups, hue_dict),
+                    has_hue=hue is not None)
+
+
+def compute_counts(values, hue=None, order=None, hue_order=None,
+                   weights=None):
+    """
+    Count rows per category (and hue) with a single bincount.
+
+    Parameters
+    ----------
+    values : np.ndarray or pandas Categorical
+        Category of each row.
+    hue : np.ndarray or pandas Categorical, optional
+        Hue of each row.
+    order, hue_order : list, optional
+        Categories and hues to count, in order. Rows outside them are
+        dropped. Default to the sorted unique values.
+    weights : np.ndarray, optional
+        Per-row weights, e.g. the counts column of a pre-aggregated table.
+
+    Returns
+    -------
+    data : CountData
+    """
+
+    groups, codes = encode_groups(values, order)
+    if hue is None:
+        hues = np.array([''])
+        hue_codes = np.zeros(codes.shape[0], dtype=np.int64)
+    else:
+        hues, hue_codes = encode_groups(hue, hue_order)
+
+    n_hues = hues.shape[0]
+    keep = (codes >= 0) & (hue_codes >= 0)
+    flat = codes[keep] * n_hues + hue_codes[keep]
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)[keep]
+
+    counts = np.bincount(flat, weights=weights,
+                         minlength=groups.shape[0] * n_hues)
+    counts = counts.reshape(groups.shape[0], n_hues)
+
+    return CountData(counts=counts, groups=_labels(groups),
+                     hues=_labels(hues), total=float(counts.sum()),
+                     has_hue=hue is not None)
+
+
+def _alignment(orient, loc):
+    if orient not in 'v h'.split():
+        raise Exception("Orientation must be 'v' or 'h'")
+    if loc not in 'above inside'.split():
+        msg = "Loc must be one of 'above', 'inside'"
+        raise Exception(msg)
+
+    if orient == 'v':
+        ha = 'center'
+        va = 'bottom' if loc == 'above' else 'top'
+    else:
+        va = 'center'
+        ha = 'left' if loc == 'above' else 'right'
+    return ha, va
+
+
+def _bar_end_midpoints(values, centers, xlim, ylim, orient='v'):
+    """
+    Vectorized _bar_end_midpoint: bar end positions on a (0, 1) axis.
+    """
+
+    xmin, xmax = xlim
+    ymin, ymax = ylim
+
+    if orient == 'v':
+        xpos = (centers - xmin) / (xmax - xmin)
+        ypos = values / (ymax - ymin)
+    else:
+        xpos = values / (xmax - xmin)
+        ypos = (centers - ymin) / (ymax - ymin)
+    return xpos, ypos
+
+
+def compute_count_labels(values, centers, xlim, ylim, count=0, pct=False,
+                         as_pct=True, orient='v', loc='above', offset=0.01,
+                         labels=None):
+    """
+    Compute count label text and positions for a bar plot.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Bar heights (widths for horizontal bars), sorted by position.
+    centers : np.ndarray
+        Bar centers along the categorical axis.
+    xlim, ylim : (float, float)
+        Axes limits used to scale positions to a (0, 1) axis.
+    count, pct, as_pct, orient, loc, offset
+        As in svplot.annotation.add_count_labels.
+    labels : list of str, optional
+        Label text of each bar. Overrides the text formatted from `values`.
+
+    Returns
+    -------
+    data : LabelData
+    """
+
+    ha, va = _alignment(orient, loc)
+
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    centers = np.asarray(centers, dtype=np.float64)
+
+    if labels is not None:
+        if len(labels) != values.shape[0]:
+            raise Exception('Number of labels must match number of bars')
+    elif pct:
+        if as_pct:
+            labels = ['%.1f%%' % (v * 100) for v in values]
+        else:
+            labels = [str(int(v * count)) for v in values]
+    else:
+        labels = [str(int(v)) for v in values]
+
+    xpos, ypos = _bar_end_midpoints(values, centers, xlim, ylim, orient)
+    sign = 1 if loc == 'above' else -1
+    if orient == 'v':
+        ypos = ypos + sign * offset
+    else:
+        xpos = xpos + sign * offset
+
+    return LabelData(x=xpos, y=ypos, labels=np.array(labels, dtype=str),
+                     ha=ha, va=va)
+
+
+def compute_comparison_bars(values, centers, xlim, ylim, p=None,
+                            orient='v', bar_offset=0.02, top_offset=0.1,
+                            pval_offset=0.01, fmt='p={:.3f}'):
+    """
+    Compute bracket coordinates comparing adjacent pairs of bars.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Bar heights (widths for horizontal bars), sorted by position. Bars
+        are paired (0, 1), (2, 3), ...
+    centers : np.ndarray
+        Bar centers along the categorical axis.
+    xlim, ylim : (float, float)
+        Axes limits used to scale positions to a (0, 1) axis.
+    p : arraylike of float, optional
+        p-value of each pair.
+    orient, bar_offset, top_offset, pval_offset
+        As in svplot.annotation.add_comparison_bars.
+    fmt : str or callable, optional
+        Format of p-value labels; see svplot.pairwise.format_pvalues.
+
+    Returns
+    -------
+    data : BracketData
+    """
+
+    if orient not in 'v h'.split():
+        raise Exception("Orientation must be 'v' or 'h'")
+
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    centers = np.asarray(centers, dtype=np.float64)
+    n_pairs = values.shape[0] // 2
+
+    xpos, ypos = _bar_end_midpoints(values, centers, xlim, ylim, orient)
+    l_x, r_x = xpos[0:2 * n_pairs:2], xpos[1:2 * n_pairs:2]
+    l_y, r_y = ypos[0:2 * n_pairs:2], ypos[1:2 * n_pairs:2]
+
+    segments = np.empty((n_pairs, 3, 2, 2))
+    if orient == 'v':
+        top = np.maximum(l_y, r_y) + top_offset
+        segments[:, 0, 0] = l_x[:, None]
+        segments[:, 0, 1] = np.stack([l_y + bar_offset, top], axis=1)
+        segments[:, 1, 0] = r_x[:, None]
+        segments[:, 1, 1] = np.stack([r_y + bar_offset, top], axis=1)
+        segments[:, 2, 0] = np.stack([l_x, r_x], axis=1)
+        segments[:, 2, 1] = top[:, None]
+        text_x = (l_x + r_x) / 2
+        text_y = top + pval_offset
+        ha, va = 'center', 'bottom'
+    else:
+        top = np.maximum(l_x, r_x) + top_offset
+        segments[:, 0, 0] = np.stack([l_x + bar_offset, top], axis=1)
+        segments[:, 0, 1] = l_y[:, None]
+        segments[:, 1, 0] = np.stack([r_x + bar_offset, top], axis=1)
+        segments[:, 1, 1] = r_y[:, None]
+        segments[:, 2, 0] = top[:, None]
+        segments[:, 2, 1] = np.stack([l_y, r_y], axis=1)
+        text_x = top + pval_offset
+        text_y = (l_y + r_y) / 2
+        ha, va = 'left', 'center'
+
+    if p is None:
+        text_x, text_y = text_x[:0], text_y[:0]
+        text_labels = np.array([], dtype=str)
+    else:
+        text_labels = format_pvalues(np.asarray(p)[:n_pairs], fmt)
+
+    return BracketData(segments=segments, text_x=text_x, text_y=text_y,
+                       text_labels=text_labels, ha=ha, va=va)
+
+
+# Venn layouts in axes coordinates: ellipses as (x, y, width, height, angle),
+# labels as (x, y, rotation)
+VENN_LAYOUTS = {
+    2: dict(
+        ellipses=[
+            (0.37, 0.5, 0.65, 0.65, 0),  # A (left)
+            (0.63, 0.5, 0.65, 0.65, 0),  # B (right)
+        ],
+        set_label_pos=[
+            (0.18, 0.82, 30),   # A (left)
+            (0.82, 0.82, -30),  # B (right)
+        ],
+        subset_label_pos=[
+            (0.2, 0.5, 0),  # A
+            (0.8, 0.5, 0),  # B
+            (0.5, 0.5, 0),  # AB
+        ],
+    ),
+    3: dict(
+        ellipses=[
+            (0.50, 0.63, 0.6, 0.6, 0),  # A (top)
+            (0.63, 0.37, 0.6, 0.6, 0),  # B (bottom right)
+            (0.37, 0.37, 0.6, 0.6, 0),  # C (bottom left)
+        ],
+        set_label_pos=[
+            (0.50, 0.97,   0),  # A (top)
+            (0.88, 0.14,  45),  # B (bottom right)
+            (0.12, 0.14, -45),  # C (bottom left)
+        ],
+        subset_label_pos=[
+            (0.5, 0.77, 0),   # A
+            (0.77, 0.3, 0),   # B
+            (0.23, 0.3, 0),   # C
+            (0.7, 0.55, 0),   # AB
+            (0.3, 0.55, 0),   # AC
+            (0.5, 0.24, 0),   # BC
+            (0.5, 0.47, 0),   # ABC
+        ],
+    ),
+    4: dict(
+        ellipses=[
+            (0.50, 0.60, 0.75, 0.5, -45),  # A (top left)
+            (0.50, 0.60, 0.75, 0.5,  45),  # B (top right)
+            (0.65, 0.40, 0.75, 0.5,  45),  # C (bottom right)
+            (0.35, 0.40, 0.75, 0.5, -45),  # D (bottom left)
+        ],
+        set_label_pos=[
+            (0.22, 0.91,  45),  # A (top left)
+            (0.78, 0.91, -45),  # B (top right)
+            (0.12, 0.22, -45),  # C (bottom right)
+            (0.88, 0.22,  45),  # D (bottom left)
+        ],
+        subset_label_pos=[
+            (0.30, 0.83,  45),  # A
+            (0.70, 0.83, -45),  # B
+            (0.18, 0.30, -45),  # C
+            (0.83, 0.30,  45),  # D
+            (0.50, 0.77,   0),  # AB
+            (0.22, 0.68,  55),  # AC
+            (0.75, 0.40,  45),  # AD
+            (0.25, 0.40, -45),  # BC
+            (0.78, 0.68, -55),  # BD
+            (0.50, 0.18,   0),  # CD
+            (0.33, 0.58,   0),  # ABC
+            (0.66, 0.58,   0),  # ABD
+            (0.60, 0.32,  10),  # ACD
+            (0.40, 0.32, -10),  # BCD
+            (0.50, 0.45,   0),  # ABCD
+        ],
+    ),
+}
+
+
+def compute_venn(subsets, set_labels, n_sets=None):
+    """
+    Lay out a two-, three- or four-way Venn diagram.
+
+    Parameters
+    ----------
+    subsets : list
+        Values for each subset, in the order expected by venn2/venn3/venn4.
+        Strings are used as-is; other values are formatted with str().
+    set_labels : list of str
+        One label per set.
+    n_sets : int, optional
+        Number of sets. Defaults to the number of set labels.
+
+    Returns
+    -------
+    data : VennData
+    """
+
+    if n_sets is None:
+        n_sets = len(set_labels)
+    if n_sets not in VENN_LAYOUTS:
+        raise Exception('Venn diagrams support 2, 3, or 4 sets')
+
+    n_subsets = 2 ** n_sets - 1
+    if len(subsets) != n_subsets:
+        msg = 'Must provide exactly {0} subset values'
+        raise Exception(msg.format(n_subsets))
+
+    layout = VENN_LAYOUTS[n_sets]
+    return VennData(
+        ellipses=np.array(layout['ellipses'], dtype=np.float64),
+        set_labels=np.array([str(s) for s in set_labels], dtype=str),
+        set_label_pos=np.array(layout['set_label_pos'], dtype=np.float64),
+        subset_labels=np.array([str(s) for s in subsets], dtype=str),
+        subset_label_pos=np.array(layout['subset_label_pos'],
+                                  dtype=np.float64),
+    )
@@ -11,8 +11,22 @@ import seaborn as sns
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 
 from .constants import LOG_SIZES
+from .stats import (weighted_kde, weighted_ecdf, log_bin_edges, bin_index,
+                    bin_lengths, binned_log_density, grouped_ecdf,
+                    grouped_bin_counts, smooth_count_matrix, scott_bandwidth,
+                    exact_ecdf, ecdf_bin_counts, encode_groups, vaf_ticks)
+from .bootstrap import (bootstrap_band, density_band, density_curves,
+                        ecdf_curves)
+from .decimate import plot_decimated, decimate_for_axes
+from .figure import get_cmap
+from .rasterize import apply_rasterization_policy
+from .tables import load_columns
+from .categorical import encode
+from .plotdata import compute_counts, compute_count_labels
+from .annotation import render_count_labels, avoid_label_overlap
 
 
 def _plot_svsize_density(log_svsize, ax, label=None,
@@ -40,6 +54,81 @@ def _plot_svsize_density(log_svsize, ax, label=None,
                       ax=ax)
 
 
+def _plot_weighted_svsize_density(log_svsize, weights, ax, label=None,
+                                  linestyle='-', color='k'):
+    """
+    Helper function to plot svsize from (value, weight) pairs.
+
+    Matches the styling of _plot_svsize_density without expanding the counts
+    back into one observation per variant.
+
+    log_svsize : np.ndarray
+    weights : np.ndarray
+    """
+
+    if label is not None:
+        label = label + ' (n={0:,})'.format(int(round(weights.sum())))
+
+    grid, density = weighted_kde(log_svsize, weights)
+    _draw_density(grid, density, ax, label, linestyle, color)
+
+
+def _plot_svlen_density(svlen, ax, xmin, xmax, weights=None, label=None,
+                        linestyle='-', color='k'):
+    """
+    Helper function to plot svsize directly from raw integer SV lengths.
+
+    Lengths are counted into log-spaced bins against integer boundaries, so
+    no float log column is materialized.
+
+    svlen : np.ndarray of int
+    """
+
+    log_edges, int_edges = log_bin_edges(xmin, xmax)
+    counts = bin_lengths(svlen, int_edges, weights)
+
+    if label is not None:
+        label = label + ' (n={0:,})'.format(int(round(counts.sum())))
+
+    grid, density = binned_log_density(counts, log_edges)
+    _draw_density(grid, density, ax, label, linestyle, color)
+
+
+def _draw_density(grid, density, ax, label=None, linestyle='-', color='k'):
+    """
+    Draw a precomputed density with the shaded style of distplot.
+
+    The line is decimated to the axes' pixel width at draw time; the fill is
+    decimated once against the current axes size.
+    """
+
+    fill_x, fill_y = decimate_for_axes(ax, grid, density)
+    ax.fill_between(fill_x, fill_y, color=color, alpha=0.2)
+    plot_decimated(ax, grid, density, label=label, color=color,
+                   linewidth=2.5, linestyle=linestyle)
+
+
+def _get_weights(df, weights):
+    """
+    Resolve `weights` to an array aligned with the rows of `df`.
+    """
+
+    if weights is None:
+        return None
+    if isinstance(weights, str):
+        if df is None:
+            msg = 'Dataframe required to look up weight column {0}'
+            raise Exception(msg.format(weights))
+        if weights not in df.columns:
+            msg = 'Weight column {0} not present in dataframe'
+            raise Exception(msg.format(weights))
+        return df[weights].values
+    weights = np.asarray(weights)
+    if df is not None and weights.shape[0] != df.shape[0]:
+        raise Exception('Weights must be the same length as dataframe')
+    return weights
+
+
 def _add_log_ticks(ax, axmin, axmax, axis='x'):
     # Generate log-scaled ticks
     ticks = []
@@ -47,7 +136,7 @@ def _add_log_ticks(ax, axmin, axmax, axis='x'):
         ticks.append(np.arange(10 ** i, 10 ** (i + 1), 10 ** i))
     ticks.append(np.array([10 ** axmax]))
     ticks = np.concatenate(ticks)
-    log_ticks = [np.log10(x) for x in ticks]
+    log_ticks = np.log10(ticks)
 
     if axis == 'x':
         ax.set_xticks(log_ticks)
@@ -59,41 +148,114 @@ def _add_log_ticks(ax, axmin, axmax, axis='x'):
 
 def plot_svsize_distro(df, hue=None, hue_order=None, ax=None,
                        hue_dict=None, palette=None,
-                       xmin=1, xmax=8):
+                       xmin=1, xmax=8, weights=None, svlen=None,
+                       ci=None, ci_kws={}):
+    """
+    Plot SV size distribution, optionally split by hue.
+
+    Without `ci`, `log_svsize` densities are seaborn KDEs over the full data
+    range. `svlen` densities, and every density when `ci` is set, are
+    instead smoothed from counts log-binned over [xmin, xmax], the estimator
+    of svplot.plotdata.compute_svsize_distro and `render_svsize_distro`.
+
+    df : pd.DataFrame, pyarrow.Table, or path to Parquet/Feather file
+        Only `log_svsize`, the hue column and the weight column are loaded
+        from Arrow inputs.
+    weights : str or array-like, optional
+        Column name or array of per-row weights. Use with a counts table
+        (one row per distinct size) to plot weighted densities without
+        expanding the counts.
+    svlen : str or array of int, optional
+        Column name or array of raw integer SV lengths (e.g. a memory-mapped
+        int32 array). When provided, lengths are binned directly on a log
+        grid and `log_svsize` is not required. `df` may be None if no hue
+        is used.
+    ci : float, optional
+        Draw a bootstrap confidence band (in percent, e.g. 95) around each
+        density. Densities are then smoothed from counts log-binned over
+        [xmin, xmax], and replicates resample those counts with each
+        group's bandwidth held fixed.
+    ci_kws : dict, optional
+        Options of svplot.bootstrap.bootstrap_band: n_boot, method
+        ('poisson' or 'multinomial'), seed, n_jobs.
+    """
+
+    size_col = svlen if isinstance(svlen, str) else None
+    if svlen is None:
+        size_col = 'log_svsize'
+
+    filters = None if hue is None or hue_order is None else {hue: hue_order}
+    weight_col = weights if isinstance(weights, str) else None
+    df = load_columns(df, [size_col, hue, weight_col], filters)
+    weights = _get_weights(df, weights)
 
     # Check for required columns
-    if 'log_svsize' not in df.columns:
-        raise Exception('Column `log_svsize` not present in dataframe')
+    if df is None and (size_col is not None or hue is not None):
+        raise Exception('Dataframe required for column lookups')
+    if size_col is not None and size_col not in df.columns:
+        msg = 'Column `{0}` not present in dataframe'
+        raise Exception(msg.format(size_col))
     if hue is not None and hue not in df.columns:
         raise Exception('Hue column {0} not present in dataframe'.format(hue))
 
+    if svlen is not None:
+        svlen = df[svlen].values if isinstance(svlen, str) else svlen
+
     # Set defaults
     if ax is None:
         ax = plt.gca()
     if palette is None:
         palette = sns.color_palette('colorblind')
 
+    # With bands, curves are drawn from the same binned estimate as the
+    # bands rather than from a KDE of the raw values
+    if ci is not None:
+        sizes = df.log_svsize.values if svlen is None else svlen
+        if hue is None:
+            hues = None
+            labels = [None]
+            colors = [palette[0]]
+        else:
+            hues = encode(df[hue], hue_order, observed=True)
+            labels = ['{0} (n={1:,})'.format(label, int(round(n)))
+                      for label, n in zip(hues.labels(hue_dict),
+                                          hues.counts(weights))]
+            colors = hues.colors(palette)
+        _plot_svsize_bands(ax, sizes, svlen is not None, hues, labels,
+                           weights, xmin, xmax, colors, ci, ci_kws)
+
     # If no hue specified, plot size distribution of entire dataframe
-    if hue is None:
-        _plot_svsize_density(df.log_svsize, ax, color=palette[0])
+    elif hue is None:
+        if svlen is not None:
+            _plot_svlen_density(svlen, ax, xmin, xmax, weights,
+                                color=palette[0])
+        elif weights is None:
+            _plot_svsize_density(df.log_svsize, ax, color=palette[0])
+        else:
+            _plot_weighted_svsize_density(df.log_svsize.values, weights, ax,
+                                          color=palette[0])
 
     # If hue column specified, plot size distribution of each set and label
     # appropriately
     else:
-        hue_col = hue
-        if hue_order is None:
-            hue_order = sorted(df[hue_col].unique())
-            if len(hue_order) > len(palette):
-                raise Exception('Palette smaller than number of hue variables')
-
-        for i, hue_val in enumerate(hue_order):
-            if hue_dict is None:
-                label = str(hue_val)
-            else:
-                label = hue_dict[hue_val]
+        hues = encode(df[hue], hue_order, observed=True)
+        colors = hues.colors(palette)
+        if svlen is None:
+            log_svsize = df.log_svsize.values
 
-            data = df.loc[df[hue_col] == hue_val]
-            _plot_svsize_density(data.log_svsize, ax, label, color=palette[i])
+        for rows, label, color in zip(hues.split(), hues.labels(hue_dict),
+                                      colors):
+            if svlen is not None:
+                w = None if weights is None else weights[rows]
+                _plot_svlen_density(svlen[rows], ax, xmin, xmax, w, label,
+                                    color=color)
+            elif weights is None:
+                _plot_svsize_density(log_svsize[rows], ax, label,
+                                     color=color)
+            else:
+                _plot_weighted_svsize_density(log_svsize[rows],
+                                              weights[rows], ax, label,
+                                              color=color)
 
     # Add legend
     l = ax.legend(frameon=True)
@@ -107,6 +269,54 @@ def plot_svsize_distro(df, hue=None, hue_order=None, ax=None,
     ax.set_xlabel('Log-scaled SV length')
 
     # Add log-scaled xtick labels
+    _set_svsize_xticks(ax, xmin, xmax)
+
+    apply_rasterization_policy(ax)
+
+    return ax
+
+
+def _group_codes(hues, n):
+    if hues is None:
+        return np.zeros(n, dtype=np.int64), 1
+    return hues.codes.astype(np.int64), len(hues)
+
+
+def _add_band(ax, x, lower, upper, color):
+    ax.fill_between(x, lower, upper, color=color, alpha=0.3, linewidth=0)
+
+
+def _plot_svsize_bands(ax, sizes, is_svlen, hues, labels, weights, xmin,
+                       xmax, colors, ci, ci_kws):
+    """
+    Log-binned size densities with bootstrap bands, one fill per group.
+
+    Curves and bands come from the same binned counts, grid, bandwidth and
+    normalization, so each band is the spread of its own curve.
+    """
+
+    log_edges, int_edges = log_bin_edges(xmin, xmax)
+    if is_svlen:
+        idx = bin_index(np.abs(sizes), int_edges)
+    else:
+        idx = bin_index(sizes, log_edges)
+
+    codes, n_groups = _group_codes(hues, idx.shape[0])
+    counts = grouped_bin_counts(idx, codes, n_groups,
+                                log_edges.shape[0] - 1, weights)
+
+    grid = (log_edges[:-1] + log_edges[1:]) / 2
+    bin_width = log_edges[1] - log_edges[0]
+    bw = [scott_bandwidth(grid, c) if c.sum() > 0 else 1.0 for c in counts]
+    lower, upper = density_band(counts, log_edges, bw, ci=ci, **ci_kws)
+
+    for i, (label, color) in enumerate(zip(labels, colors)):
+        density = density_curves(counts[i:i + 1], bin_width, bw[i])[0]
+        _draw_density(grid, density, ax, label, color=color)
+        _add_band(ax, grid, lower[i], upper[i], color)
+
+
+def _set_svsize_xticks(ax, xmin, xmax):
     _add_log_ticks(ax, xmin, xmax)
 
     xticklabels = []
@@ -116,34 +326,205 @@ def plot_svsize_distro(df, hue=None, hue_order=None, ax=None,
     xticklabels = np.concatenate(xticklabels)
     ax.set_xticklabels(xticklabels)
 
+
+def render_svsize_distro(data, ax=None, palette=None):
+    """
+    Draw SV size densities computed by svplot.plotdata.compute_svsize_distro.
+
+    Parameters
+    ----------
+    data : svplot.plotdata.DensityData
+    ax : matplotlib Axes, optional
+    palette : list of matplotlib colors, optional
+
+    Returns
+    -------
+    ax : matplotlib Axes
+    """
+
+    if ax is None:
+        ax = plt.gca()
+    if palette is None:
+        palette = sns.color_palette('colorblind')
+    if len(data.labels) > len(palette):
+        raise Exception('Palette smaller than number of hue variables')
+
+    for i, (label, n) in enumerate(zip(data.labels, data.counts)):
+        if data.has_hue:
+            label = '{0} (n={1:,})'.format(label, int(round(n)))
+        else:
+            label = None
+        _draw_density(data.grid, data.density[i], ax, label,
+                      color=palette[i])
+
+    if data.has_hue:
+        l = ax.legend(frameon=True)
+        l.get_frame().set_linewidth(1)
+
+    ax.yaxis.grid(False)
+    ax.set_ylabel('Density')
+    ax.set_xlabel('Log-scaled SV length')
+    _set_svsize_xticks(ax, data.xmin, data.xmax)
+
+    apply_rasterization_policy(ax)
+
     return ax
 
 
-def _plot_vaf_cum(data, xticks, ax, label=None,
-                  color='k', linestyle='-', linewidth=2.5):
+def plot_svsize_matrix(df, group, order=None, ax=None, kind='heatmap',
+                       xmin=1, xmax=8, svlen=None, weights=None,
+                       bins_per_decade=50, bw=None, cmap='viridis',
+                       color=None, overlap=2.0):
+    """
+    Plot SV size densities for many groups as a heatmap or ridge plot.
 
-    ys = []
-    for frac in xticks:
-        count = data.loc[data.vf <= frac].shape[0]
-        pct = count / data.shape[0]
-        ys.append(pct)
+    All groups are binned on a shared log-size grid in a single grouped
+    bincount and smoothed together with one FFT convolution, so cost does
+    not grow with one KDE per group.
 
-    log_xticks = [np.log10(x) for x in xticks]
-    ax.plot(log_xticks, ys, label=label,
-            color=color, linewidth=linewidth, linestyle=linestyle)
+    Parameters
+    ----------
+    df : pd.DataFrame, pyarrow.Table, or path to Parquet/Feather file
+    group : str
+        Column identifying the group of each variant.
+    order : list, optional
+        Groups to plot, top to bottom. Defaults to sorted unique groups.
+    ax : matplotlib Axes, optional
+    kind : 'heatmap' | 'ridge', optional
+        Draw a single imshow heatmap, or a ridge plot of stacked densities
+        drawn as one PolyCollection.
+    xmin, xmax : int, optional
+        Log10 size range of the grid.
+    svlen : str, optional
+        Column of raw integer SV lengths to bin in place of `log_svsize`.
+    weights : str or array-like, optional
+        Column name or array of per-row weights.
+    bins_per_decade : int, optional
+        Resolution of the log-size grid.
+    bw : float, optional
+        Kernel bandwidth in log10 units, shared by all groups. Defaults to
+        Scott's rule on the pooled data.
+    cmap : str or matplotlib Colormap, optional
+        Heatmap colormap, or ridge fill colormap when `color` is None.
+    color : matplotlib color, optional
+        Single ridge fill color.
+    overlap : float, optional
+        Height of the tallest ridge in units of row spacing.
 
+    Returns
+    -------
+    ax : matplotlib Axes
+    """
 
-def _vaf_ticks(xmin=0.002, xmax=1):
-    step = 10 ** np.floor(np.log10(xmin))
-    first_max = step * 10
-    ticks = [np.arange(xmin, first_max, step)]
+    if kind not in 'heatmap ridge'.split():
+        raise Exception("Kind must be one of 'heatmap', 'ridge'")
 
-    for i in np.arange(np.log10(first_max), np.log10(xmax)):
-        ticks.append(np.arange(10 ** i, 10 ** (i+1), 10 ** i))
+    size_col = 'log_svsize' if svlen is None else svlen
+    weight_col = weights if isinstance(weights, str) else None
+    filters = None if order is None else {group: order}
+    df = load_columns(df, [size_col, group, weight_col], filters)
+    if size_col not in df.columns:
+        msg = 'Column `{0}` not present in dataframe'
+        raise Exception(msg.format(size_col))
+    weights = _get_weights(df, weights)
 
-    ticks.append([xmax])
-    ticks = np.concatenate(ticks)
-    return ticks
+    if ax is None:
+        ax = plt.gca()
+
+    groups, codes = encode_groups(df[group].values, order)
+    n_groups = groups.shape[0]
+
+    log_edges, int_edges = log_bin_edges(xmin, xmax, bins_per_decade)
+    n_bins = log_edges.shape[0] - 1
+    if svlen is None:
+        idx = bin_index(df[size_col].values, log_edges)
+    else:
+        idx = bin_index(np.abs(df[size_col].values), int_edges)
+
+    counts = grouped_bin_counts(idx, codes, n_groups, n_bins, weights)
+
+    grid = (log_edges[:-1] + log_edges[1:]) / 2
+    if bw is None:
+        bw = scott_bandwidth(grid, counts.sum(axis=0))
+    density = smooth_count_matrix(counts, log_edges[1] - log_edges[0], bw)
+
+    if kind == 'heatmap':
+        ax.imshow(density, aspect='auto', cmap=cmap,
+                  interpolation='nearest', origin='upper',
+                  extent=(xmin, xmax, n_groups, 0))
+        ax.set_ylim(n_groups, 0)
+        ax.grid(False)
+    else:
+        _draw_ridges(ax, grid, density, cmap, color, overlap)
+
+    # Only label groups when the labels can be read
+    if n_groups <= 50:
+        offset = 0.5 if kind == 'heatmap' else 0
+        ax.set_yticks(np.arange(n_groups) + offset)
+        ax.set_yticklabels([str(g) for g in groups])
+    else:
+        ax.set_yticks([])
+
+    ax.set_xlabel('Log-scaled SV length')
+    _set_svsize_xticks(ax, xmin, xmax)
+
+    apply_rasterization_policy(ax)
+
+    return ax
+
+
+def _draw_ridges(ax, grid, density, cmap, color, overlap):
+    """
+    Draw a (groups x bins) density matrix as one PolyCollection of ridges.
+
+    Row i is drawn on baseline i, top to bottom, so later rows are drawn
+    over the tails of the rows above them.
+    """
+
+    n_groups, n_bins = density.shape
+    peak = density.max()
+    heights = density / peak * overlap if peak > 0 else density
+
+    # Closed polygons: along the curve, then back along the baseline
+    baselines = np.arange(n_groups)[:, np.newaxis]
+    verts = np.empty((n_groups, 2 * n_bins, 2))
+    verts[:, :n_bins, 0] = grid
+    verts[:, :n_bins, 1] = baselines - heights
+    verts[:, n_bins:, 0] = grid[::-1]
+    verts[:, n_bins:, 1] = baselines
+
+    if color is None:
+        facecolors = get_cmap(cmap)(np.linspace(0, 1, n_groups))
+    else:
+        facecolors = color
+
+    ridges = mpl.collections.PolyCollection(verts, facecolors=facecolors,
+                                            edgecolors='k', linewidths=0.5)
+    ax.add_collection(ridges)
+
+    ax.set_ylim(n_groups - 0.5, -overlap - 0.5)
+    ax.yaxis.grid(False)
+
+
+def _plot_vaf_cum(vf, xticks, ax, label=None, weights=None, exact=False,
+                  color='k', linestyle='-', linewidth=2.5):
+
+    if exact:
+        # Step through every observation; vertices are decimated to the
+        # axes' pixel width when drawn
+        xs, ys = exact_ecdf(vf, weights)
+        keep = xs > 0
+        plot_decimated(ax, np.log10(xs[keep]), ys[keep], label=label,
+                       color=color, linewidth=linewidth, linestyle=linestyle,
+                       drawstyle='steps-post')
+        return
+
+    # Fraction of variants (or of total weight) with vf <= each tick
+    ys = weighted_ecdf(vf, xticks, weights)
+
+    log_xticks = [np.log10(x) for x in xticks]
+    ax.plot(log_xticks, ys, label=label,
+            color=color, linewidth=linewidth, linestyle=linestyle)
 
 
 def _vaf_ticklabels(ticks):
@@ -168,7 +549,38 @@ def _vaf_ticklabels(ticks):
 
 def plot_vaf_cum(df, hue=None, hue_order=None, ax=None,
                  xmin=0.002, xmax=1,
-                 hue_dict=None, palette=None):
+                 hue_dict=None, palette=None, weights=None, exact=False,
+                 ci=None, ci_kws={}):
+    """
+    Plot cumulative VAF distribution, optionally split by hue.
+
+    df : pd.DataFrame, pyarrow.Table, or path to Parquet/Feather file
+        Only `vf`, the hue column and the weight column are loaded from
+        Arrow inputs.
+    weights : str or array-like, optional
+        Column name or array of per-row weights, e.g. the number of variants
+        observed at each distinct `vf`. Plots the weighted ECDF.
+    exact : bool, optional
+        Plot the full-resolution ECDF rather than evaluating it at the x
+        ticks. The curve is decimated to the axes' pixel width when drawn.
+        Cannot be combined with `ci`.
+    ci : float, optional
+        Draw a bootstrap confidence band (in percent, e.g. 95) around each
+        curve at the x ticks. Replicates resample the counts between ticks.
+    ci_kws : dict, optional
+        Options of svplot.bootstrap.bootstrap_band: n_boot, method
+        ('poisson' or 'multinomial'), seed, n_jobs.
+    """
+
+    # Bands are evaluated at the ticks, so they would not match exact steps
+    if exact and ci is not None:
+        raise Exception('Confidence bands require exact=False')
+
+    filters = None if hue is None or hue_order is None else {hue: hue_order}
+    weight_col = weights if isinstance(weights, str) else None
+    df = load_columns(df, ['vf', hue, weight_col], filters)
+    weights = _get_weights(df, weights)
+
     # Set defaults
     if ax is None:
         ax = plt.gca()
@@ -176,30 +588,87 @@ def plot_vaf_cum(df, hue=None, hue_order=None, ax=None,
         palette = sns.color_palette('colorblind')
 
     # Set log-scaled ticks for cum
-    xticks = _vaf_ticks(xmin, xmax)
-    log_xticks = [np.log10(x) for x in xticks]
+    xticks = vaf_ticks(xmin, xmax)
 
     # If no hue specified, plot size distribution of entire dataframe
     if hue is None:
-        _plot_vaf_cum(df, xticks, ax, color=palette[0])
+        hues = None
+        colors = [palette[0]]
+        _plot_vaf_cum(df.vf.values, xticks, ax, weights=weights, exact=exact,
+                      color=palette[0])
 
     # If hue column specified, plot size distribution of each set and label
     # appropriately
     else:
-        hue_col = hue
-        if hue_order is None:
-            hue_order = sorted(df[hue_col].unique())
-            if len(hue_order) > len(palette):
-                raise Exception('Palette smaller than number of hue variables')
-
-        for i, hue_val in enumerate(hue_order):
-            if hue_dict is None:
-                label = str(hue_val)
-            else:
-                label = hue_dict[hue_val]
+        hues = encode(df[hue], hue_order, observed=True)
+        colors = hues.colors(palette)
+        vf = df.vf.values
+
+        for rows, label, color in zip(hues.split(), hues.labels(hue_dict),
+                                      colors):
+            w = None if weights is None else weights[rows]
+            _plot_vaf_cum(vf[rows], xticks, ax, label, weights=w,
+                          exact=exact, color=color)
+
+    if ci is not None:
+        codes, n_groups = _group_codes(hues, df.shape[0])
+        keep = codes >= 0
+        w = None if weights is None else weights[keep]
+        counts = ecdf_bin_counts(df.vf.values[keep], codes[keep], n_groups,
+                                 xticks, w)
+        lower, upper = bootstrap_band(counts, ecdf_curves, ci=ci, **ci_kws)
+        for i, color in enumerate(colors):
+            _add_band(ax, np.log10(xticks), lower[i], upper[i], color)
+
+    _format_vaf_axes(ax, xticks)
+
+    # Add legend under curves
+    l = ax.legend(frameon=True, loc='lower right')
+    l.get_frame().set_linewidth(1)
+
+    apply_rasterization_policy(ax)
+
+
+def render_vaf_cum(data, ax=None, palette=None):
+    """
+    Draw cumulative VAF curves computed by svplot.plotdata.compute_vaf_cum.
+
+    Parameters
+    ----------
+    data : svplot.plotdata.ECDFData
+    ax : matplotlib Axes, optional
+    palette : list of matplotlib colors, optional
+
+    Returns
+    -------
+    ax : matplotlib Axes
+    """
+
+    if ax is None:
+        ax = plt.gca()
+    if palette is None:
+        palette = sns.color_palette('colorblind')
+    if len(data.labels) > len(palette):
+        raise Exception('Palette smaller than number of hue variables')
+
+    log_xticks = np.log10(data.xticks)
+    for i, label in enumerate(data.labels):
+        label = label if data.has_hue else None
+        ax.plot(log_xticks, data.ecdf[i], label=label,
+                color=palette[i], linewidth=2.5)
 
-            data = df.loc[df[hue_col] == hue_val]
-            _plot_vaf_cum(data, xticks, ax, label, color=palette[i])
+    _format_vaf_axes(ax, data.xticks)
+
+    l = ax.legend(frameon=True, loc='lower right')
+    l.get_frame().set_linewidth(1)
+
+    apply_rasterization_policy(ax)
+
+    return ax
+
+
+def _format_vaf_axes(ax, xticks):
+    log_xticks = np.log10(xticks)
 
     # Set log-scaled xticks
     ax.set_xticks(log_xticks)
@@ -213,14 +682,130 @@ def plot_vaf_cum(df, hue=None, hue_order=None, ax=None,
     ax.set_yticks(yticks)
     ax.set_yticklabels(['{0}%'.format(int(x * 100)) for x in yticks])
 
-    # Add legend under curves
-    l = ax.legend(frameon=True, loc='lower right')
-    l.get_frame().set_linewidth(1)
-
     ax.set_ylabel('Cumulative percentage of variants')
     ax.set_xlabel('Variant allele frequency')
 
 
+def plot_vaf_cum_matrix(df, group, ax=None, xmin=0.002, xmax=1,
+                        color_by=None, cmap='viridis', color='0.6',
+                        alpha=0.3, linewidth=0.5, weights=None,
+                        quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """
+    Plot cumulative VAF curves for many groups (e.g. samples) at once.
+
+    All per-group ECDFs are computed in one grouped bincount and drawn as a
+    single LineCollection. The legend summarizes the cohort with quantile
+    bands across groups rather than listing every group.
+
+    Parameters
+    ----------
+    df : pd.DataFrame, pyarrow.Table, or path to Parquet/Feather file
+    group : str
+        Column identifying the group (e.g. sample) of each variant.
+    ax : matplotlib Axes, optional
+    xmin, xmax : float, optional
+        VAF range of the x axis.
+    color_by : str, dict, or pd.Series, optional
+        Value mapped through `cmap` to color each curve. A column name uses
+        the per-group mean of that column; a mapping is keyed by group.
+    cmap : str or matplotlib Colormap, optional
+    color : matplotlib color, optional
+        Curve color when `color_by` is not provided.
+    alpha, linewidth : float, optional
+        Curve style.
+    weights : str or array-like, optional
+        Column name or array of per-row weights.
+    quantiles : tuple of float, optional
+        Odd-length, symmetric quantiles summarized in the legend. The middle
+        quantile is drawn as a line and each outer pair as a shaded band.
+        Set to None to skip the summary.
+
+    Returns
+    -------
+    ax : matplotlib Axes
+    """
+
+    color_col = color_by if isinstance(color_by, str) else None
+    weight_col = weights if isinstance(weights, str) else None
+    df = load_columns(df, ['vf', group, color_col, weight_col])
+    weights = _get_weights(df, weights)
+
+    if ax is None:
+        ax = plt.gca()
+
+    xticks = vaf_ticks(xmin, xmax)
+    log_xticks = np.log10(xticks)
+
+    groups, codes = encode_groups(df[group].values)
+    n_groups = groups.shape[0]
+
+    # Rows with a missing group (code -1) are left out
+    keep = codes >= 0
+    codes = codes[keep]
+    if weights is not None:
+        weights = weights[keep]
+
+    ecdf = grouped_ecdf(df.vf.values[keep], codes, n_groups, xticks,
+                        weights)
+
+    # (groups x ticks x 2) vertex array for the LineCollection
+    segments = np.empty((n_groups, xticks.shape[0], 2))
+    segments[:, :, 0] = log_xticks
+    segments[:, :, 1] = ecdf
+
+    lines = mpl.collections.LineCollection(segments, linewidths=linewidth,
+                                           alpha=alpha)
+    if color_by is None:
+        lines.set_color(color)
+    else:
+        if color_col is not None:
+            totals = np.bincount(codes, weights=df[color_col].values[keep],
+                                 minlength=n_groups)
+            sizes = np.bincount(codes, minlength=n_groups)
+            values = totals / sizes
+        else:
+            values = np.array([color_by[g] for g in groups], dtype=float)
+        lines.set_array(values)
+        lines.set_cmap(cmap)
+    ax.add_collection(lines)
+
+    if quantiles is not None:
+        _add_quantile_bands(ax, log_xticks, ecdf, quantiles)
+
+    _format_vaf_axes(ax, xticks)
+
+    if quantiles is not None:
+        l = ax.legend(frameon=True, loc='lower right')
+        l.get_frame().set_linewidth(1)
+
+    apply_rasterization_policy(ax)
+
+    return ax
+
+
+def _add_quantile_bands(ax, x, curves, quantiles, color='k'):
+    """
+    Summarize a (groups x points) matrix of curves by quantile bands.
+    """
+
+    quantiles = sorted(quantiles)
+    if len(quantiles) % 2 == 0:
+        raise Exception('Quantiles must have a middle value')
+
+    qs = np.nanquantile(curves, quantiles, axis=0)
+    mid = len(quantiles) // 2
+
+    for i in range(mid):
+        label = '{0:g}-{1:g}%'.format(quantiles[i] * 100,
+                                      quantiles[-i - 1] * 100)
+        ax.fill_between(x, qs[i], qs[-i - 1], color=color,
+                        alpha=0.15 + 0.1 * i, linewidth=0, label=label,
+                        zorder=3)
+
+    label = '{0:g}% (n={1:,})'.format(quantiles[mid] * 100, curves.shape[0])
+    ax.plot(x, qs[mid], color=color, linewidth=2.5, label=label, zorder=4)
+
+
 def violin_with_strip(x=None, y=None, hue=None, data=None,
                       order=None, hue_order=None, orient='v', ax=None,
                       violin_kwargs={}):
@@ -231,6 +816,8 @@ def violin_with_strip(x=None, y=None, hue=None, data=None,
     ---------
     x, y, hue : names of variables in `data` or vector data, optional
     data : pd.DataFrame, array, or list of arrays, optional
+        May also be a pyarrow Table or a path to a Parquet/Feather file, in
+        which case only the named columns are loaded.
     ax : matplotlib Axes
 
     Returns
@@ -243,6 +830,26 @@ def violin_with_strip(x=None, y=None, hue=None, data=None,
     * pass dicts of violin_kwargs and strip_kwargs dicts
     """
 
+    if data is not None:
+        columns = [v for v in (x, y, hue) if isinstance(v, str)]
+        filters = {}
+        group = x if orient == 'v' else y
+        if order is not None and isinstance(group, str):
+            filters[group] = order
+        if hue_order is not None and isinstance(hue, str):
+            filters[hue] = hue_order
+        data = load_columns(data, columns, filters)
+
+        # Encode the group and hue columns once, so seaborn orders and
+        # splits on category codes rather than comparing strings
+        encoded = {}
+        for col, col_order in ((group, order), (hue, hue_order)):
+            if isinstance(col, str) and col in data.columns:
+                cats = encode(data[col], col_order, sort=False)
+                encoded[col] = pd.Categorical.from_codes(cats.codes,
+                                                         cats.categories)
+        data = data.assign(**encoded)
+
     if ax is None:
         ax = plt.gca()
 
@@ -298,4 +905,163 @@ def violin_with_strip(x=None, y=None, hue=None, data=None,
                            frameon=True, loc='best')
         legend.get_frame().set_linewidth(1)
 
+    apply_rasterization_policy(ax)
+
+    return ax
+
+
+def countplot(x=None, hue=None, data=None, order=None, hue_order=None,
+              weights=None, stat='count', orient='v', ax=None, palette=None,
+              width=0.8, labels=True, label_kws={}, **kwargs):
+    """
+    Count plot of a categorical variable, computed from raw rows.
+
+    Counts are reduced with a single bincount over the category (and hue)
+    codes and drawn as one BarContainer. Labels are attached from the
+    computed counts, so no values are read back from the plotted patches.
+
+    Arguments
+    ---------
+    x : name of variable in `data` or vector data
+        Categorical variable to count.
+    hue : name of variable in `data` or vector data, optional
+    data : pd.DataFrame, pyarrow.Table, or path to Parquet/Feather file
+        Only the named columns are loaded from Arrow inputs.
+    order, hue_order : list, optional
+    weights : str or array-like, optional
+        Column name or array of per-row weights, e.g. a counts column.
+    stat : 'count' | 'percent', optional
+        Plot counts, or percentages of all counted rows.
+    orient : 'v' | 'h', optional
+    ax : matplotlib Axes, optional
+    palette : list of matplotlib colors, optional
+    width : float, optional
+        Width of each group of bars.
+    labels : bool, optional
+        Add count (or percentage) labels above each bar.
+    label_kws : dict, optional
+        Keyword arguments passed to svplot.annotation.add_count_labels
+        (loc, offset, color, palette, fontsize, avoid_overlap,
+        min_fontsize, ...).
+    kwargs : key, value mappings
+        Other keyword arguments are passed to ax.bar
+
+    Returns
+    -------
+    ax : matplotlib Axes
+    """
+
+    if data is not None:
+        columns = [v for v in (x, hue, weights) if isinstance(v, str)]
+        filters = {}
+        if order is not None and isinstance(x, str):
+            filters[x] = order
+        if hue_order is not None and isinstance(hue, str):
+            filters[hue] = hue_order
+        data = load_columns(data, columns, filters)
+
+    def _lookup(v):
+        if isinstance(v, str):
+            if data is None or v not in data.columns:
+                msg = 'Column `{0}` not present in dataframe'
+                raise Exception(msg.format(v))
+            v = data[v].values
+        # Hash-based factorization; sorting millions of strings is slow
+        return pd.Categorical(v)
+
+    if x is None:
+        raise Exception('Provide a categorical variable `x`')
+
+    values = _lookup(x)
+    hue_values = None if hue is None else _lookup(hue)
+    weights = _get_weights(data, weights)
+
+    counts = compute_counts(values, hue_values, order, hue_order, weights)
+
+    return render_countplot(counts, ax=ax, stat=stat, orient=orient,
+                            palette=palette, width=width, labels=labels,
+                            label_kws=label_kws, **kwargs)
+
+
+def render_countplot(data, ax=None, stat='count', orient='v', palette=None,
+                     width=0.8, labels=True, label_kws={}, **kwargs):
+    """
+    Draw counts computed by svplot.plotdata.compute_counts.
+
+    Parameters
+    ----------
+    data : svplot.plotdata.CountData
+    ax : matplotlib Axes, optional
+    stat, orient, palette, width, labels, label_kws, kwargs
+        As in countplot.
+
+    Returns
+    -------
+    ax : matplotlib Axes
+    """
+
+    if stat not in 'count percent'.split():
+        raise Exception("Stat must be one of 'count', 'percent'")
+    if orient not in 'v h'.split():
+        raise Exception("Orientation must be 'v' or 'h'")
+
+    if ax is None:
+        ax = plt.gca()
+    if palette is None:
+        palette = sns.color_palette('colorblind')
+
+    n_groups, n_hues = data.counts.shape
+    if n_hues > len(palette):
+        raise Exception('Palette smaller than number of hue variables')
+
+    values = data.counts.ravel()
+    if stat == 'percent':
+        total = data.total if data.total > 0 else 1
+        values = values / total * 100
+
+    # Dodge hue levels within each group; rows of counts are group-major
+    bar_width = width / n_hues
+    offsets = (np.arange(n_hues) - (n_hues - 1) / 2) * bar_width
+    centers = (np.arange(n_groups)[:, None] + offsets[None, :]).ravel()
+    colors = [palette[i] for i in range(n_hues)] * n_groups
+
+    if orient == 'v':
+        bars = ax.bar(centers, values, width=bar_width, color=colors,
+                      **kwargs)
+        ax.set_xticks(np.arange(n_groups))
+        ax.set_xticklabels(data.groups)
+        ax.set_ylabel('Percent' if stat == 'percent' else 'Count')
+    else:
+        bars = ax.barh(centers, values, height=bar_width, color=colors,
+                       **kwargs)
+        ax.set_yticks(np.arange(n_groups))
+        ax.set_yticklabels(data.groups)
+        ax.set_xlabel('Percent' if stat == 'percent' else 'Count')
+
+    if data.has_hue:
+        l = ax.legend(bars.patches[:n_hues], data.hues, frameon=True)
+        l.get_frame().set_linewidth(1)
+
+    if labels:
+        # Label positions are scaled to the axes, so settle limits first
+        ax.autoscale_view()
+        if stat == 'percent':
+            texts = ['%.1f%%' % v for v in values]
+        else:
+            texts = [str(int(round(v))) for v in values]
+
+        label_kws = dict(label_kws)
+        avoid_overlap = label_kws.pop('avoid_overlap', None)
+        min_fontsize = label_kws.pop('min_fontsize', 6)
+        label_data = compute_count_labels(
+            values, centers, ax.get_xlim(), ax.get_ylim(), orient=orient,
+            loc=label_kws.pop('loc', 'above'),
+            offset=label_kws.pop('offset', 0.01), labels=texts)
+        texts = render_count_labels(label_data, ax, **label_kws)
+        if avoid_overlap is not None:
+            avoid_label_overlap(ax, texts, priority=values, orient=orient,
+                                how=avoid_overlap, min_fontsize=min_fontsize)
+
+    apply_rasterization_policy(ax)
+
     return ax
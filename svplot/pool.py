@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Pool of pre-laid-out figures for high-volume rendering.
+
+Creating a figure, its canvas and its axes costs far more than drawing a
+small plot on them. A FigurePool keeps idle figures per (layout, size, dpi)
+and hands them out again after removing only what a plot added: data
+artists, legends, labels, and the limits, scales and tickers the plotters
+change. Figures are pyplot-free (svplot.figure.new_figure), so a pool may be
+shared between threads.
+
+    >>> pool = FigurePool(max_idle=4)
+    >>> for sample, df in samples:
+    ...     fig, ax = pool.acquire('single', figsize=(4, 3))
+    ...     plot_vaf_cum(df, ax=ax)
+    ...     pool.savefig(fig, '{0}.png'.format(sample))
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from .figure import new_figure
+from .jointgrids import joint_axes_layout
+
+
+def _single_layout(fig):
+    return fig.add_subplot(1, 1, 1)
+
+
+def _grid_layout(fig, nrows=1, ncols=1, **kwargs):
+    return fig.subplots(nrows, ncols, squeeze=False, **kwargs)
+
+
+def _jointgrids_layout(fig, n_rows=1, n_cols=1, ratio=5):
+    return joint_axes_layout(fig, n_rows, n_cols, ratio)
+
+
+# name -> function(fig, **layout_kws) returning the axes handed out
+LAYOUTS = {
+    'single': _single_layout,
+    'venn': _single_layout,
+    'grid': _grid_layout,
+    'jointgrids': _jointgrids_layout,
+}
+
+
+def register_layout(name, func):
+    """
+    Register a layout for FigurePool.acquire.
+
+    Parameters
+    ----------
+    name : str
+    func : callable
+        Called as ``func(fig, **layout_kws)`` on a new figure; returns the
+        axes (or array of axes) handed out with it.
+    """
+
+    LAYOUTS[name] = func
+
+
+def _snapshot(ax):
+    """
+    Axes state that plotters change and a reset must restore.
+    """
+
+    state = {
+        'xlim': ax.get_xlim(),
+        'ylim': ax.get_ylim(),
+        'autoscalex': ax.get_autoscalex_on(),
+        'autoscaley': ax.get_autoscaley_on(),
+        'xlabel': ax.get_xlabel(),
+        'ylabel': ax.get_ylabel(),
+        'title': ax.get_title(),
+        'axison': ax.axison,
+        'aspect': ax.get_aspect(),
+        'adjustable': ax.get_adjustable(),
+    }
+    for name, axis in (('x', ax.xaxis), ('y', ax.yaxis)):
+        state[name + 'scale'] = axis.get_scale()
+        state[name + 'grid'] = tuple(
+            bool(ticks) and ticks[0].gridline.get_visible()
+            for ticks in (axis.get_major_ticks(), axis.get_minor_ticks()))
+        state[name + 'tickers'] = (axis.get_major_locator(),
+                                   axis.get_minor_locator(),
+                                   axis.get_major_formatter(),
+                                   axis.get_minor_formatter())
+    return state
+
+
+def _reset_axes(ax, state):
+    for artist in (list(ax.lines) + list(ax.collections) +
+                   list(ax.patches) + list(ax.texts) + list(ax.images) +
+                   list(ax.tables) + list(ax.artists)):
+        artist.remove()
+    ax.containers[:] = []
+    if ax.legend_ is not None:
+        ax.legend_.remove()
+
+    for name, axis, set_scale in (('x', ax.xaxis, ax.set_xscale),
+                                  ('y', ax.yaxis, ax.set_yscale)):
+        if axis.get_scale() != state[name + 'scale']:
+            set_scale(state[name + 'scale'])
+        major, minor, major_fmt, minor_fmt = state[name + 'tickers']
+        axis.set_major_locator(major)
+        axis.set_minor_locator(minor)
+        axis.set_major_formatter(major_fmt)
+        axis.set_minor_formatter(minor_fmt)
+        major_grid, minor_grid = state[name + 'grid']
+        axis.grid(major_grid, which='major')
+        axis.grid(minor_grid, which='minor')
+
+    # auto=None: limits propagated to shared axes keep their autoscaling
+    ax.relim()
+    ax.set_xlim(state['xlim'], auto=None)
+    ax.set_ylim(state['ylim'], auto=None)
+    ax.set_autoscalex_on(state['autoscalex'])
+    ax.set_autoscaley_on(state['autoscaley'])
+
+    ax.set_xlabel(state['xlabel'])
+    ax.set_ylabel(state['ylabel'])
+    ax.set_title(state['title'])
+    if state['axison']:
+        ax.set_axis_on()
+    else:
+        ax.set_axis_off()
+    ax.set_aspect(state['aspect'], adjustable=state['adjustable'])
+    ax.set_prop_cycle(None)
+
+
+def _figure_bytes(fig):
+    """
+    Approximate memory held by a figure: its RGBA render buffer.
+    """
+
+    width, height = fig.get_size_inches() * fig.dpi
+    return int(width * height * 4)
+
+
+class FigurePool:
+    """
+    Reuse figures between plots of the same layout, size and dpi.
+
+    Parameters
+    ----------
+    max_idle : int, optional
+        Idle figures kept per (layout, size, dpi). Figures released beyond
+        this are discarded.
+    max_bytes : int, optional
+        Cap on the approximate memory (render buffers) of all idle figures.
+    max_uses : int, optional
+        Discard a figure after this many uses, bounding any state that
+        builds up on a figure across resets.
+    """
+
+    def __init__(self, max_idle=8, max_bytes=256 * 2 ** 20, max_uses=1000):
+        self.max_idle = max_idle
+        self.max_bytes = max_bytes
+        self.max_uses = max_uses
+
+        self._idle = {}
+        self._info = {}
+        # Idle slots claimed by figures being reset, per key
+        self._reserved = {}
+        self._idle_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0}
+
+    @staticmethod
+    def _key(layout, figsize, dpi, layout_kws):
+        return (layout, tuple(figsize), dpi,
+                tuple(sorted(layout_kws.items())))
+
+    def acquire(self, layout='single', figsize=(6.4, 4.8), dpi=100,
+                **layout_kws):
+        """
+        Take a figure from the pool, or lay out a new one.
+
+        Parameters
+        ----------
+        layout : str, optional
+            A name in LAYOUTS: 'single' and 'venn' (one axes), 'grid'
+            (nrows, ncols), or 'jointgrids' (n_rows, n_cols, ratio).
+        figsize : (float, float), optional
+        dpi : float, optional
+        layout_kws : key, value mappings
+            Passed to the layout function.
+
+        Returns
+        -------
+        fig : matplotlib Figure
+        axes : matplotlib Axes or np.ndarray of Axes
+        """
+
+        if layout not in LAYOUTS:
+            raise Exception('Unknown figure layout: {0}'.format(layout))
+
+        key = self._key(layout, figsize, dpi, layout_kws)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                fig = idle.pop()
+                self._idle_bytes -= _figure_bytes(fig)
+                self.stats['reused'] += 1
+                self._info[fig]['uses'] += 1
+                self._info[fig]['checked_out'] = True
+                return fig, self._info[fig]['axes']
+
+        fig = new_figure(figsize=figsize, dpi=dpi)
+        axes = LAYOUTS[layout](fig, **layout_kws)
+        info = {
+            'key': key,
+            'axes': axes,
+            'state': [(ax, _snapshot(ax)) for ax in fig.axes],
+            'uses': 1,
+            'checked_out': True,
+        }
+        with self._lock:
+            self._info[fig] = info
+            self.stats['created'] += 1
+        return fig, axes
+
+    def _discard(self, fig):
+        self._info.pop(fig, None)
+        self.stats['discarded'] += 1
+
+    def release(self, fig):
+        """
+        Reset a figure and return it to the pool.
+
+        Figures beyond the pool's size, memory or use limits are discarded.
+        """
+
+        n_bytes = _figure_bytes(fig)
+        with self._lock:
+            info = self._info.get(fig)
+            if info is None:
+                raise Exception('Figure was not acquired from this pool')
+            if not info['checked_out']:
+                raise Exception('Figure was already released')
+            info['checked_out'] = False
+
+            key = info['key']
+            idle = self._idle.setdefault(key, deque())
+            reserved = self._reserved.get(key, 0)
+            if (info['uses'] >= self.max_uses or
+                    len(idle) + reserved >= self.max_idle or
+                    self._idle_bytes + n_bytes > self.max_bytes):
+                self._discard(fig)
+                return
+
+            # Claim the idle slot and its bytes before resetting outside
+            # the lock, so concurrent releases cannot exceed the caps
+            self._reserved[key] = reserved + 1
+            self._idle_bytes += n_bytes
+
+        try:
+            self._reset(fig, info)
+        except Exception:
+            with self._lock:
+                self._reserved[key] -= 1
+                self._idle_bytes -= n_bytes
+                self._discard(fig)
+            raise
+
+        with self._lock:
+            self._reserved[key] -= 1
+            self._idle.setdefault(key, deque()).append(fig)
+
+    def _reset(self, fig, info):
+        # Axes added by a plot (e.g. colorbars) are not part of the layout
+        layout_axes = [ax for ax, _ in info['state']]
+        for ax in fig.axes:
+            if ax not in layout_axes:
+                ax.remove()
+        for ax, state in info['state']:
+            _reset_axes(ax, state)
+
+        # Includes any suptitle
+        for artist in list(fig.texts) + list(fig.legends):
+            artist.remove()
+        fig._suptitle = None
+
+    def savefig(self, fig, fname, **kwargs):
+        """
+        Save a pooled figure and return it to the pool.
+
+        Parameters
+        ----------
+        fig : matplotlib Figure
+        fname : str or file-like
+        kwargs : key, value mappings
+            Other keyword arguments are passed to fig.savefig
+        """
+
+        try:
+            fig.savefig(fname, **kwargs)
+        finally:
+            self.release(fig)
+
+    @contextmanager
+    def figure(self, layout='single', figsize=(6.4, 4.8), dpi=100,
+               **layout_kws):
+        """
+        Context manager form of acquire; the figure is released on exit.
+
+            >>> with pool.figure('venn', figsize=(4, 4)) as (fig, ax):
+            ...     venn4(counts, labels, ax=ax)
+            ...     fig.savefig(fname)
+        """
+
+        fig, axes = self.acquire(layout, figsize, dpi, **layout_kws)
+        try:
+            yield fig, axes
+        finally:
+            self.release(fig)
+
+    def clear(self):
+        """
+        Discard all idle figures.
+        """
+
+        with self._lock:
+            for idle in self._idle.values():
+                for fig in idle:
+                    self._idle_bytes -= _figure_bytes(fig)
+                    self._discard(fig)
+            self._idle = {}
+
+    @property
+    def n_idle(self):
+        with self._lock:
+            return sum(len(idle) for idle in self._idle.values())
+
+    @property
+    def idle_bytes(self):
+        return self._idle_bytes
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Rasterization policy for heavy artists in vector output.
+
+Strip points, dense density fills and many-panel scatters make PDFs that are
+slow to open. Under this policy, collections and lines above a size threshold
+are marked rasterized and embedded as images at a fixed dpi, while text,
+axes, count labels and comparison brackets stay vector.
+
+The policy is off by default, so plotters keep producing fully vector
+output. Enable it library-wide with ``set_rasterization_policy(enabled=True)``,
+after which every plotter applies it to the axes it draws, or opt in per
+figure by saving through `savefig`.
+"""
+
+import io
+import time
+
+import matplotlib as mpl
+from matplotlib.lines import Line2D
+
+from .decimate import DecimatedLine2D
+
+RASTER_POLICY = {
+    'enabled': False,
+    # Rasterize a collection or line with more vertices than this
+    'max_vertices': 20000,
+    # Rasterize a collection with more items (points, polygons) than this
+    'max_items': 5000,
+    # Rasterize every collection on an axes holding more than this many
+    'max_artists': 200,
+    # Resolution of rasterized artists in vector output
+    'dpi': 300,
+}
+
+
+def set_rasterization_policy(**kwargs):
+    """
+    Update the library-wide rasterization policy.
+
+    Parameters
+    ----------
+    enabled : bool, optional
+    max_vertices : int, optional
+    max_items : int, optional
+    max_artists : int, optional
+    dpi : int, optional
+    """
+
+    for key in kwargs:
+        if key not in RASTER_POLICY:
+            raise Exception('Unknown rasterization policy: {0}'.format(key))
+    RASTER_POLICY.update(kwargs)
+
+
+def _collection_size(collection):
+    """
+    Number of items and vertices in a collection.
+    """
+
+    paths = collection.get_paths()
+    n_offsets = len(collection.get_offsets())
+
+    # Marker collections (scatter, strip) repeat one path at every offset
+    if n_offsets > 1 and len(paths) <= 1:
+        n_vertices = n_offsets * sum(len(p.vertices) for p in paths)
+    else:
+        n_vertices = sum(len(p.vertices) for p in paths)
+
+    return max(n_offsets, len(paths)), n_vertices
+
+
+def _heavy_artists(ax, policy):
+    collections = [c for c in ax.collections
+                   if isinstance(c, mpl.collections.Collection)]
+
+    # Too many collections to draw as vector: rasterize them all
+    if len(collections) > policy['max_artists']:
+        heavy = list(collections)
+    else:
+        heavy = []
+        for collection in collections:
+            n_items, n_vertices = _collection_size(collection)
+            if (n_items > policy['max_items'] or
+                    n_vertices > policy['max_vertices']):
+                heavy.append(collection)
+
+    # Decimated lines are already bounded by screen resolution
+    for line in ax.lines:
+        if isinstance(line, DecimatedLine2D) or not isinstance(line, Line2D):
+            continue
+        if len(line.get_xdata()) > policy['max_vertices']:
+            heavy.append(line)
+
+    return heavy
+
+
+def apply_rasterization_policy(obj, **kwargs):
+    """
+    Mark heavy artists as rasterized.
+
+    Only collections and lines are considered, so text, axes, count labels
+    and comparison brackets always stay vector.
+
+    Parameters
+    ----------
+    obj : matplotlib Axes or Figure
+    kwargs : key, value mappings
+        Override policy values for this call.
+
+    Returns
+    -------
+    artists : list
+        Artists marked rasterized.
+    """
+
+    policy = dict(RASTER_POLICY, **kwargs)
+    if not policy['enabled']:
+        return []
+
+    axes = obj.axes if isinstance(obj, mpl.figure.Figure) else [obj]
+
+    artists = []
+    for ax in axes:
+        for artist in _heavy_artists(ax, policy):
+            artist.set_rasterized(True)
+            artists.append(artist)
+
+    return artists
+
+
+def savefig(fig, fname, **kwargs):
+    """
+    Apply the rasterization policy and save at the policy's dpi.
+
+    The policy is applied whether or not it is enabled library-wide.
+    Rasterized artists in vector output are rendered at the savefig dpi.
+
+    Parameters
+    ----------
+    fig : matplotlib Figure
+    fname : str or file-like
+    kwargs : key, value mappings
+        Other keyword arguments are passed to fig.savefig
+    """
+
+    apply_rasterization_policy(fig, enabled=True)
+    kwargs.setdefault('dpi', RASTER_POLICY['dpi'])
+    fig.savefig(fname, **kwargs)
+
+
+def rasterization_report(fig, format='pdf', **kwargs):
+    """
+    Measure the file size and save time saved by the rasterization policy.
+
+    The figure is saved once fully vector and once under the policy. The
+    rasterized state of every artist is restored afterwards.
+
+    Parameters
+    ----------
+    fig : matplotlib Figure
+    format : str, optional
+        Vector output format.
+    kwargs : key, value mappings
+        Override policy values.
+
+    Returns
+    -------
+    report : dict
+        Artist count, bytes and seconds for the vector and rasterized saves,
+        and the ratio of each.
+    """
+
+    policy = dict(RASTER_POLICY, **kwargs)
+
+    def _save():
+        buf = io.BytesIO()
+        start = time.perf_counter()
+        fig.savefig(buf, format=format, dpi=policy['dpi'])
+        return buf.tell(), time.perf_counter() - start
+
+    artists = [a for ax in fig.axes
+               for a in list(ax.collections) + list(ax.lines)]
+    state = [a.get_rasterized() for a in artists]
+
+    for artist in artists:
+        artist.set_rasterized(False)
+    vector_bytes, vector_time = _save()
+
+    policy['enabled'] = True
+    rasterized = apply_rasterization_policy(fig, **policy)
+    raster_bytes, raster_time = _save()
+
+    for artist, was_rasterized in zip(artists, state):
+        artist.set_rasterized(was_rasterized)
+
+    return {
+        'n_rasterized': len(rasterized),
+        'vector_bytes': vector_bytes,
+        'rasterized_bytes': raster_bytes,
+        'size_ratio': raster_bytes / vector_bytes,
+        'vector_seconds': vector_time,
+        'rasterized_seconds': raster_time,
+        'time_ratio': raster_time / vector_time,
+    }
@@ -0,0 +1,718 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Local plot-rendering service.
+
+An asyncio HTTP server, on TCP or a Unix socket, that renders svplot
+figures from JSON plot specs in a pool of warm worker processes, so client
+tools skip the interpreter, import and font setup cost of a fresh process.
+
+    $ python -m svplot.service serve --port 8765 --workers 4
+
+    POST /render
+    {"plot": "vaf_cum", "data": "calls.parquet",
+     "options": {"hue": "batch"}, "format": "png"}
+
+Specs name a plot ('svsize_distro', 'vaf_cum', 'venn2', 'venn3', 'venn4',
+'jointgrids'), the data by file path, plot options, and optionally format
+('png' or 'svg'), figsize and dpi. Identical specs over unchanged files are
+answered from an LRU result cache; concurrent identical requests share one
+render. Requests arriving together are batched into one worker call, at
+most `max_concurrency` batches render at once, and requests beyond
+`max_pending` are refused with 503. If a worker process dies, the pool is
+restarted and the batch retried once; a batch that breaks the new pool
+too is answered with 503.
+
+GET /stats reports request, cache and batch counters.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+PLOTS = ('svsize_distro', 'vaf_cum', 'venn2', 'venn3', 'venn4',
+         'jointgrids')
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+            500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# Per-process figure pool, created by the worker initializer
+_POOL = None
+
+
+def _init_worker():
+    """
+    Import the plotting stack once per worker process.
+    """
+
+    global _POOL
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from .pool import FigurePool
+    from . import plotters, venn, jointgrids, overlap  # noqa: F401
+
+    _POOL = FigurePool()
+
+
+def _data_paths(spec):
+    data = spec.get('data')
+    if data is None:
+        return []
+    if isinstance(data, str):
+        return [data]
+    return list(data)
+
+
+def validate_spec(spec):
+    """
+    Check a plot spec before it is queued.
+
+    Raises
+    ------
+    Exception
+        If the plot kind, format or data are invalid.
+    """
+
+    if not isinstance(spec, dict):
+        raise Exception('Plot spec must be a JSON object')
+    if spec.get('plot') not in PLOTS:
+        raise Exception('Plot must be one of {0}'.format(', '.join(PLOTS)))
+    if spec.get('format', 'png') not in FORMATS:
+        raise Exception('Format must be one of {0}'.format(
+            ', '.join(FORMATS)))
+    if not isinstance(spec.get('options', {}), dict):
+        raise Exception('Plot options must be a JSON object')
+
+    options = spec.get('options', {})
+    if spec['plot'] == 'jointgrids':
+        if 'x' not in options or 'y' not in options:
+            raise Exception('JointGrids specs require `x` and `y` options')
+
+    venn_subsets = (spec['plot'].startswith('venn') and
+                    'subsets' in options)
+    if not venn_subsets:
+        paths = _data_paths(spec)
+        if not paths:
+            raise Exception('Plot spec requires `data`')
+        for path in paths:
+            if not os.path.exists(path):
+                raise Exception('Data file not found: {0}'.format(path))
+
+
+def render_spec(spec):
+    """
+    Render a plot spec to image bytes.
+
+    Parameters
+    ----------
+    spec : dict
+
+    Returns
+    -------
+    image : bytes
+    """
+
+    from .figure import new_figure, render
+    from .jointgrids import JointGrids
+    from .overlap import venn_counts
+    from .plotters import plot_svsize_distro, plot_vaf_cum
+    from . import venn
+    from .pool import FigurePool
+    from .tables import load_columns
+
+    global _POOL
+    if _POOL is None:
+        _POOL = FigurePool()
+
+    kind = spec['plot']
+    options = dict(spec.get('options', {}))
+    fmt = spec.get('format', 'png')
+    figsize = tuple(spec.get('figsize', (6.4, 4.8)))
+    dpi = spec.get('dpi', 100)
+
+    if kind == 'jointgrids':
+        # Grid size depends on the data, so these figures are not pooled
+        fig = new_figure(dpi=dpi)
+        joint = options.pop('joint', 'scatter')
+        joint_kws = options.pop('joint_kws', {})
+        marginals = options.pop('marginals', 'hist')
+        marginal_kws = options.pop('marginal_kws', {})
+        x, y = options.pop('x'), options.pop('y')
+        grids = JointGrids(spec['data'], x, y, fig=fig, **options)
+        grids.plot_joint(joint, **joint_kws)
+        grids.plot_marginals(marginals, **marginal_kws)
+        return render(fig, format=fmt)
+
+    fig, ax = _POOL.acquire('single', figsize=figsize, dpi=dpi)
+    try:
+        if kind == 'svsize_distro':
+            plot_svsize_distro(spec['data'], ax=ax, **options)
+        elif kind == 'vaf_cum':
+            plot_vaf_cum(spec['data'], ax=ax, **options)
+        else:
+            subsets = options.pop('subsets', None)
+            if subsets is None:
+                match_kws = {k: options.pop(k) for k in ('min_overlap',
+                                                         'window')
+                             if k in options}
+                callsets = [load_columns(path, ['chrom', 'start', 'end',
+                                                'svtype'])
+                            for path in _data_paths(spec)]
+                subsets = venn_counts(callsets, **match_kws)
+            getattr(venn, kind)(subsets, ax=ax, **options)
+        return render(fig, format=fmt)
+    finally:
+        _POOL.release(fig)
+
+
+def _render_batch(specs):
+    """
+    Render several specs in one worker call.
+
+    Returns
+    -------
+    results : list of (bool, bytes or str)
+        Success flag and image, or error message.
+    """
+
+    results = []
+    for spec in specs:
+        try:
+            results.append((True, render_spec(spec)))
+        except Exception as exc:
+            results.append((False, '{0}: {1}'.format(type(exc).__name__,
+                                                     exc)))
+    return results
+
+
+def cache_key(spec):
+    """
+    Key of a spec's result: the canonical spec plus the size and
+    modification time of every data file.
+    """
+
+    stats = []
+    for path in _data_paths(spec):
+        try:
+            st = os.stat(path)
+            stats.append([path, st.st_size, st.st_mtime_ns])
+        except OSError:
+            stats.append([path, None, None])
+
+    payload = json.dumps([spec, stats], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of rendered images, bounded by total bytes.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        image = self._items.get(key)
+        if image is not None:
+            self._items.move_to_end(key)
+        return image
+
+    def put(self, key, image):
+        if len(image) > self.max_bytes:
+            return
+        if key in self._items:
+            self.n_bytes -= len(self._items.pop(key))
+        self._items[key] = image
+        self.n_bytes += len(image)
+        while self.n_bytes > self.max_bytes:
+            _, old = self._items.popitem(last=False)
+            self.n_bytes -= len(old)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+class RenderService:
+    """
+    Batching, caching front end to a pool of warm render processes.
+
+    Parameters
+    ----------
+    n_workers : int, optional
+        Worker processes. Defaults to the number of CPUs.
+    max_concurrency : int, optional
+        Batches rendering at once. Defaults to `n_workers`.
+    max_pending : int, optional
+        Requests queued or rendering before new ones are refused.
+    batch_size : int, optional
+        Most specs sent to a worker in one call. Queued specs are shared
+        between idle workers before batches fill.
+    batch_window : float, optional
+        Seconds to wait for more requests to fill a batch.
+    cache_bytes : int, optional
+        Size of the result cache.
+    """
+
+    def __init__(self, n_workers=None, max_concurrency=None, max_pending=256,
+                 batch_size=8, batch_window=0.002, cache_bytes=64 * 2 ** 20):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.n_workers
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+
+        self.cache = ResultCache(cache_bytes)
+        self.stats = {'requests': 0, 'cache_hits': 0, 'shared': 0,
+                      'rendered': 0, 'errors': 0, 'refused': 0,
+                      'batches': 0, 'restarts': 0}
+
+        self._executor = None
+        self._queue = None
+        self._inflight = {}
+        self._pending = 0
+        self._batcher = None
+        self._slots = None
+        self._idle_slots = 0
+
+    async def start(self):
+        """
+        Start the worker pool and warm every worker.
+        """
+
+        loop = asyncio.get_running_loop()
+        self._executor = ProcessPoolExecutor(self.n_workers,
+                                             initializer=_init_worker)
+        # Force every worker to start (and import svplot) up front
+        await asyncio.gather(*[loop.run_in_executor(self._executor,
+                                                    _render_batch, [])
+                               for _ in range(self.n_workers)])
+
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._idle_slots = self.max_concurrency
+        self._batcher = asyncio.ensure_future(self._run_batches())
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, spec):
+        """
+        Render a spec, from the cache when possible.
+
+        Returns
+        -------
+        image : bytes
+
+        Raises
+        ------
+        Overloaded
+            If `max_pending` requests are already queued.
+        WorkerCrashed
+            If the worker pool broke while rendering, even after a restart.
+        """
+
+        validate_spec(spec)
+        return await self._render_valid(spec)
+
+    async def _render_valid(self, spec):
+        self.stats['requests'] += 1
+
+        key = cache_key(spec)
+        image = self.cache.get(key)
+        if image is not None:
+            self.stats['cache_hits'] += 1
+            return image
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats['shared'] += 1
+            return await asyncio.shield(future)
+
+        if self._pending >= self.max_pending:
+            self.stats['refused'] += 1
+            raise Overloaded('Too many pending requests')
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._pending += 1
+        await self._queue.put((key, spec, future))
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._pending -= 1
+            self._inflight.pop(key, None)
+
+    def _batch_limit(self, n_batched):
+        # Share the backlog between the idle render slots, so batching never
+        # leaves a worker idle while another renders a long batch
+        backlog = n_batched + self._queue.qsize()
+        share = -(-backlog // (self._idle_slots + 1))
+        return max(1, min(self.batch_size, share))
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            self._idle_slots -= 1
+
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self._batch_limit(len(batch)):
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            asyncio.ensure_future(self._submit(batch))
+
+    def _restart_executor(self, broken):
+        # Batches in flight all see the same broken pool; replace it once
+        if self._executor is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = ProcessPoolExecutor(self.n_workers,
+                                             initializer=_init_worker)
+        self.stats['restarts'] += 1
+
+    async def _submit(self, batch):
+        loop = asyncio.get_running_loop()
+        self.stats['batches'] += 1
+        specs = [spec for _, spec, _ in batch]
+        try:
+            # A dead worker breaks the whole pool: restart it and retry once
+            for _ in range(2):
+                executor = self._executor
+                try:
+                    results = await loop.run_in_executor(
+                        executor, _render_batch, specs)
+                    break
+                except BrokenProcessPool as exc:
+                    self._restart_executor(executor)
+                    crashed = WorkerCrashed(
+                        'Render worker crashed: {0}'.format(exc))
+                    results = [(False, crashed)] * len(batch)
+        except Exception as exc:
+            results = [(False, str(exc))] * len(batch)
+        finally:
+            self._idle_slots += 1
+            self._slots.release()
+
+        for (key, _, future), (ok, result) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                self.stats['rendered'] += 1
+                self.cache.put(key, result)
+                future.set_result(result)
+            else:
+                self.stats['errors'] += 1
+                if not isinstance(result, Exception):
+                    result = Exception(result)
+                future.set_exception(result)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except BadRequest as exc:
+                    # The stream cannot be resynchronized; answer and close
+                    _write_response(writer, 400, 'application/json',
+                                    _error(exc))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, body = request
+                status, ctype, payload = await self._route(method, path,
+                                                           body)
+                _write_response(writer, status, ctype, payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == 'GET' and path == '/stats':
+            stats = dict(self.stats, cache_entries=len(self.cache),
+                         cache_bytes=self.cache.n_bytes,
+                         pending=self._pending)
+            return 200, 'application/json', json.dumps(stats).encode()
+        if method == 'GET' and path == '/health':
+            return 200, 'application/json', b'{"ok": true}'
+        if method != 'POST' or path != '/render':
+            return 404, 'application/json', b'{"error": "not found"}'
+
+        try:
+            spec = json.loads(body)
+            validate_spec(spec)
+        except Exception as exc:
+            return 400, 'application/json', _error(exc)
+
+        try:
+            image = await self._render_valid(spec)
+        except (Overloaded, WorkerCrashed) as exc:
+            return 503, 'application/json', _error(exc)
+        except Exception as exc:
+            return 500, 'application/json', _error(exc)
+
+        return 200, FORMATS[spec.get('format', 'png')], image
+
+    async def serve(self, host='127.0.0.1', port=8765, path=None):
+        """
+        Serve until cancelled, on a Unix socket if `path` is given.
+        """
+
+        await self.start()
+        if path is not None:
+            server = await asyncio.start_unix_server(self._handle, path)
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.close()
+
+
+def _error(exc):
+    return json.dumps({'error': str(exc)}).encode()
+
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    fields = line.decode('latin-1').split()
+    if len(fields) != 3:
+        raise BadRequest('Malformed request line')
+    method, path, _ = fields
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise BadRequest('Invalid Content-Length')
+    if length < 0:
+        raise BadRequest('Invalid Content-Length')
+    body = await reader.readexactly(length) if length else b''
+    return method, path, body
+
+
+def _write_response(writer, status, ctype, payload):
+    head = ('HTTP/1.1 {0} {1}\r\nContent-Type: {2}\r\n'
+            'Content-Length: {3}\r\n\r\n').format(
+                status, _REASONS[status], ctype, len(payload))
+    writer.write(head.encode('latin-1') + payload)
+
+
+class Client:
+    """
+    Minimal keep-alive client for the render service.
+
+        >>> async with Client(port=8765) as client:
+        ...     png = await client.render(spec)
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, path=None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self._reader = None
+        self._writer = None
+
+    async def __aenter__(self):
+        if self.path is not None:
+            self._reader, self._writer = await asyncio.open_unix_connection(
+                self.path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._writer.close()
+
+    async def request(self, method, path, body=b''):
+        head = ('{0} {1} HTTP/1.1\r\nHost: svplot\r\n'
+                'Content-Length: {2}\r\n\r\n').format(method, path, len(body))
+        self._writer.write(head.encode('latin-1') + body)
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        payload = await self._reader.readexactly(
+            int(headers.get('content-length', 0)))
+        return status, payload
+
+    async def render(self, spec):
+        """
+        Render a spec; raises on any non-200 response.
+        """
+
+        status, payload = await self.request('POST', '/render',
+                                             json.dumps(spec).encode())
+        if status != 200:
+            raise Exception('Render failed ({0}): {1}'.format(
+                status, payload.decode(errors='replace')))
+        return payload
+
+    async def stats(self):
+        _, payload = await self.request('GET', '/stats')
+        return json.loads(payload)
+
+
+async def benchmark(specs, n_requests=200, concurrency=8, host='127.0.0.1',
+                    port=8765, path=None, unique=False):
+    """
+    Measure latency and throughput of a running service.
+
+    Parameters
+    ----------
+    specs : list of dict
+        Specs to request, cycled.
+    n_requests : int, optional
+    concurrency : int, optional
+        Concurrent client connections.
+    unique : bool, optional
+        Make every request distinct, defeating the result cache.
+
+    Returns
+    -------
+    report : dict
+        Requests per second and latency percentiles in milliseconds.
+    """
+
+    run = os.urandom(4).hex()
+    requests = []
+    for i in range(n_requests):
+        spec = dict(specs[i % len(specs)])
+        if unique:
+            spec['nonce'] = '{0}-{1}'.format(run, i)
+        requests.append(spec)
+
+    latencies = []
+    failures = []
+    position = iter(range(n_requests))
+
+    async def _worker():
+        async with Client(host, port, path) as client:
+            for i in position:
+                start = time.perf_counter()
+                try:
+                    await client.render(requests[i])
+                except Exception as exc:
+                    failures.append(str(exc))
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        'n_requests': n_requests,
+        'n_failed': len(failures),
+        'seconds': wall,
+        'requests_per_second': len(latencies) / wall,
+        'latency_ms': {
+            'mean': float(ms.mean()) if ms.size else None,
+            'p50': float(np.percentile(ms, 50)) if ms.size else None,
+            'p90': float(np.percentile(ms, 90)) if ms.size else None,
+            'p99': float(np.percentile(ms, 99)) if ms.size else None,
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1],
+                                     prog='python -m svplot.service')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help='Run the render service')
+    bench = sub.add_parser('benchmark', help='Benchmark a running service')
+    for p in (serve, bench):
+        p.add_argument('--host', default='127.0.0.1')
+        p.add_argument('--port', type=int, default=8765)
+        p.add_argument('--socket', help='Unix socket path (instead of TCP)')
+
+    serve.add_argument('--workers', type=int)
+    serve.add_argument('--max-concurrency', type=int)
+    serve.add_argument('--max-pending', type=int, default=256)
+    serve.add_argument('--batch-size', type=int, default=8)
+    serve.add_argument('--cache-mb', type=float, default=64)
+
+    bench.add_argument('specs', help='JSON file with a list of plot specs')
+    bench.add_argument('-n', '--requests', type=int, default=200)
+    bench.add_argument('-c', '--concurrency', type=int, default=8)
+    bench.add_argument('--unique', action='store_true',
+                       help='Bypass the result cache')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        service = RenderService(args.workers, args.max_concurrency,
+                                args.max_pending, args.batch_size,
+                                cache_bytes=int(args.cache_mb * 2 ** 20))
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    else:
+        with open(args.specs) as f:
+            specs = json.load(f)
+        report = asyncio.run(benchmark(specs, args.requests,
+                                       args.concurrency, args.host,
+                                       args.port, args.socket, args.unique))
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Numpy reductions behind the distribution plots.
+
+Everything here operates on plain arrays so that the expensive part of a plot
+can be computed without pandas or matplotlib.
+"""
+
+import numpy as np
+
+
+def _as_weights(values, weights=None):
+    if weights is None:
+        return np.ones(values.shape[0], dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != values.shape:
+        raise Exception('Weights must be the same length as values')
+    return weights
+
+
+def scott_bandwidth(values, weights=None):
+    """
+    Scott's rule bandwidth for (optionally weighted) observations.
+
+    The effective sample size of the weights is used in place of n, so
+    aggregated counts give the same bandwidth as their expanded rows.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    weights : np.ndarray, optional
+
+    Returns
+    -------
+    bw : float
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    weights = _as_weights(values, weights)
+
+    total = weights.sum()
+    mean = np.dot(weights, values) / total
+    var = np.dot(weights, (values - mean) ** 2) / total
+
+    # Integer counts describe `total` observations; fractional weights fall
+    # back to Kish's effective sample size
+    if np.all(np.mod(weights, 1) == 0):
+        n_eff = total
+    else:
+        n_eff = total ** 2 / np.dot(weights, weights)
+
+    bw = np.sqrt(var) * n_eff ** (-1 / 5)
+    if bw == 0:
+        bw = 1.0
+    return bw
+
+
+def smooth_counts(counts, bin_width, bw):
+    """
+    Gaussian-smooth binned counts into a density.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Counts (or summed weights) per bin.
+    bin_width : float
+        Width of each bin.
+    bw : float
+        Kernel standard deviation, in the same units as `bin_width`.
+
+    Returns
+    -------
+    density : np.ndarray
+        Density evaluated at bin centers. Integrates to 1 over the grid.
+    """
+
+    half = max(int(np.ceil(4 * bw / bin_width)), 1)
+    offsets = np.arange(-half, half + 1) * bin_width
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+
+    density = np.convolve(counts, kernel)[half:half + counts.shape[0]]
+    total = density.sum() * bin_width
+    if total > 0:
+        density = density / total
+    return density
+
+
+def weighted_kde(values, weights=None, bw=None, gridsize=512, cut=3):
+    """
+    Binned Gaussian KDE of weighted observations.
+
+    Observations are summed into `gridsize` bins before smoothing, so cost
+    scales with the number of distinct values rather than their total weight.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    weights : np.ndarray, optional
+        Weight (e.g. count) of each value.
+    bw : float, optional
+        Kernel bandwidth. Defaults to Scott's rule.
+    gridsize : int, optional
+        Number of evaluation points.
+    cut : float, optional
+        Extend the grid this many bandwidths past the extreme values.
+
+    Returns
+    -------
+    grid : np.ndarray
+    density : np.ndarray
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    weights = _as_weights(values, weights)
+
+    if bw is None:
+        bw = scott_bandwidth(values, weights)
+
+    lo = values.min() - cut * bw
+    hi = values.max() + cut * bw
+    edges = np.linspace(lo, hi, gridsize + 1)
+    counts, _ = np.histogram(values, edges, weights=weights)
+
+    grid = (edges[:-1] + edges[1:]) / 2
+    density = smooth_counts(counts, edges[1] - edges[0], bw)
+
+    return grid, density
+
+
+def weighted_ecdf(values, points, weights=None):
+    """
+    Weighted fraction of observations less than or equal to each point.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    points : np.ndarray
+        Points at which to evaluate the ECDF.
+    weights : np.ndarray, optional
+
+    Returns
+    -------
+    ecdf : np.ndarray
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    weights = _as_weights(values, weights)
+
+    order = np.argsort(values, kind='mergesort')
+    cum_weights = np.concatenate([[0], np.cumsum(weights[order])])
+
+    # NaNs sort last and are never <= a point, but count toward the total
+    idx = np.searchsorted(values[order], points, side='right')
+    return cum_weights[idx] / cum_weights[-1]
+
+
+def log_bin_edges(xmin, xmax, bins_per_decade=50):
+    """
+    Log-spaced bin edges and their integer length boundaries.
+
+    An integer length `x` falls at or above edge `e` exactly when
+    `x >= ceil(10 ** e)`, so integer lengths can be binned by comparing
+    against `int_edges` without computing any logarithms.
+
+    Parameters
+    ----------
+    xmin, xmax : int
+        Log10 of the smallest and largest lengths binned.
+    bins_per_decade : int, optional
+
+    Returns
+    -------
+    log_edges : np.ndarray of float
+    int_edges : np.ndarray of int64
+    """
+
+    n_bins = int(round((xmax - xmin) * bins_per_decade))
+    log_edges = np.linspace(xmin, xmax, n_bins + 1)
+    int_edges = np.ceil(10 ** log_edges - 1e-9).astype(np.int64)
+    return log_edges, int_edges
+
+
+def bin_index(values, edges):
+    """
+    Bin of each value against sorted `edges`, as np.histogram assigns them.
+
+    Bins are half-open except the last, which includes its right edge.
+    Values outside the edges get an index below 0 or past the last bin.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    edges : np.ndarray
+        Bin edges, e.g. `log_edges` or `int_edges` from `log_bin_edges`.
+
+    Returns
+    -------
+    idx : np.ndarray of int
+    """
+
+    values = np.asarray(values)
+    idx = np.searchsorted(edges, values, side='right') - 1
+    idx[values == edges[-1]] = edges.shape[0] - 2
+    return idx
+
+
+def bin_lengths(svlen, int_edges, weights=None, chunksize=2 ** 20):
+    """
+    Count raw integer SV lengths into log-spaced bins.
+
+    Lengths are processed in chunks so memory-mapped inputs are streamed
+    rather than materialized. Negative lengths (VCF deletions) are binned by
+    their absolute value; lengths outside the edges are dropped, and the
+    last bin includes its right edge.
+
+    Parameters
+    ----------
+    svlen : np.ndarray of int
+    int_edges : np.ndarray of int64
+        Integer bin boundaries from `log_bin_edges`.
+    weights : np.ndarray, optional
+    chunksize : int, optional
+
+    Returns
+    -------
+    counts : np.ndarray
+    """
+
+    n_bins = int_edges.shape[0] - 1
+    dtype = np.int64 if weights is None else np.float64
+    counts = np.zeros(n_bins, dtype=dtype)
+
+    for start in range(0, svlen.shape[0], chunksize):
+        chunk = np.asarray(svlen[start:start + chunksize])
+        if chunk.size and chunk.min() < 0:
+            chunk = np.abs(chunk)
+
+        idx = bin_index(chunk, int_edges)
+        valid = (idx >= 0) & (idx < n_bins)
+
+        w = None
+        if weights is not None:
+            w = np.asarray(weights[start:start + chunksize])[valid]
+        counts += np.bincount(idx[valid], weights=w,
+                              minlength=n_bins).astype(dtype)
+
+    return counts
+
+
+def binned_log_density(counts, log_edges, bw=None):
+    """
+    Smoothed density from log-binned counts.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+    log_edges : np.ndarray
+    bw : float, optional
+        Kernel bandwidth in log10 units. Defaults to Scott's rule evaluated
+        on the bin centers.
+
+    Returns
+    -------
+    grid : np.ndarray
+        Bin centers.
+    density : np.ndarray
+    """
+
+    grid = (log_edges[:-1] + log_edges[1:]) / 2
+    if bw is None:
+        bw = scott_bandwidth(grid, counts) if counts.sum() > 0 else 1.0
+
+    density = smooth_counts(counts, log_edges[1] - log_edges[0], bw)
+    return grid, density
+
+
+def ecdf_bin_counts(values, codes, n_groups, points, weights=None):
+    """
+    Counts of every group between consecutive ECDF points.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    codes : np.ndarray of int
+        Group index (0 <= code < n_groups) of each value. Negative codes
+        are dropped.
+    n_groups : int
+    points : np.ndarray
+        Sorted points at which the ECDFs are evaluated.
+    weights : np.ndarray, optional
+
+    Returns
+    -------
+    counts : np.ndarray, shape (n_groups, len(points) + 1)
+        Column i counts values in (points[i - 1], points[i]]. The last
+        column counts values past the last point, and NaNs, which only
+        contribute to the total.
+    """
+
+    points = np.asarray(points)
+    n_points = points.shape[0]
+
+    codes = np.asarray(codes, dtype=np.int64)
+    valid = codes >= 0
+    if not valid.all():
+        values = np.asarray(values)[valid]
+        codes = codes[valid]
+        if weights is not None:
+            weights = np.asarray(weights)[valid]
+
+    idx = np.searchsorted(points, values, side='left')
+    flat = codes * (n_points + 1) + idx
+
+    counts = np.bincount(flat, weights=weights,
+                         minlength=n_groups * (n_points + 1))
+    return counts.reshape(n_groups, n_points + 1)
+
+
+def grouped_ecdf(values, codes, n_groups, points, weights=None):
+    """
+    ECDF of every group evaluated at shared points in one pass.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    codes : np.ndarray of int
+        Group index (0 <= code < n_groups) of each value.
+    n_groups : int
+    points : np.ndarray
+        Sorted points at which to evaluate each ECDF.
+    weights : np.ndarray, optional
+
+    Returns
+    -------
+    ecdf : np.ndarray, shape (n_groups, len(points))
+        NaN for groups with no observations.
+    """
+
+    counts = ecdf_bin_counts(values, codes, n_groups, points, weights)
+    cum = counts.cumsum(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return cum[:, :-1] / cum[:, -1:]
+
+
+def grouped_bin_counts(idx, codes, n_groups, n_bins, weights=None):
+    """
+    Counts per (group, bin) pair in one bincount.
+
+    Parameters
+    ----------
+    idx : np.ndarray of int
+        Bin index of each observation. Out-of-range bins are dropped.
+    codes : np.ndarray of int
+        Group index of each observation. Negative codes are dropped.
+    n_groups, n_bins : int
+    weights : np.ndarray, optional
+
+    Returns
+    -------
+    counts : np.ndarray, shape (n_groups, n_bins)
+    """
+
+    codes = np.asarray(codes, dtype=np.int64)
+    valid = (idx >= 0) & (idx < n_bins) & (codes >= 0)
+    flat = codes[valid] * n_bins + idx[valid]
+    if weights is not None:
+        weights = np.asarray(weights)[valid]
+
+    counts = np.bincount(flat, weights=weights, minlength=n_groups * n_bins)
+    return counts.reshape(n_groups, n_bins)
+
+
+def smooth_count_matrix(counts, bin_width, bw):
+    """
+    Gaussian-smooth every row of a (groups x bins) count matrix at once.
+
+    Rows share one kernel, so the convolution is done with a single FFT over
+    the whole matrix. Each nonempty row is normalized to integrate to 1.
+
+    Parameters
+    ----------
+    counts : np.ndarray, shape (n_groups, n_bins)
+    bin_width : float
+    bw : float
+        Kernel standard deviation, in the same units as `bin_width`.
+
+    Returns
+    -------
+    density : np.ndarray, shape (n_groups, n_bins)
+    """
+
+    n_bins = counts.shape[1]
+    half = max(int(np.ceil(4 * bw / bin_width)), 1)
+    offsets = np.arange(-half, half + 1) * bin_width
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+
+    # Zero-pad to the full linear convolution length to avoid wraparound
+    size = n_bins + kernel.shape[0] - 1
+    nfft = 1 << int(np.ceil(np.log2(size)))
+    spectrum = np.fft.rfft(counts, nfft, axis=1) * np.fft.rfft(kernel, nfft)
+    density = np.fft.irfft(spectrum, nfft, axis=1)[:, half:half + n_bins]
+
+    # Clip FFT round-off below zero
+    np.maximum(density, 0, out=density)
+
+    totals = density.sum(axis=1, keepdims=True) * bin_width
+    np.divide(density, totals, out=density, where=totals > 0)
+    return density
+
+
+def exact_ecdf(values, weights=None):
+    """
+    Full-resolution ECDF of (optionally weighted) observations.
+
+    Parameters
+    ----------
+    values : np.ndarray
+    weights : np.ndarray, optional
+
+    Returns
+    -------
+    x : np.ndarray
+        Sorted non-NaN values.
+    y : np.ndarray
+        Weighted fraction of observations less than or equal to each value.
+        NaNs count toward the total, matching `weighted_ecdf`.
+    """
+
+    values = np.asarray(values, dtype=np.float64)
+    weights = _as_weights(values, weights)
+
+    order = np.argsort(values, kind='mergesort')
+    x = values[order]
+    cum_weights = np.cumsum(weights[order])
+
+    n = np.count_nonzero(~np.isnan(x))
+    return x[:n], cum_weights[:n] / cum_weights[-1]
+
+
+def encode_groups(values, order=None):
+    """
+    Integer-encode group labels.
+
+    Parameters
+    ----------
+    values : np.ndarray or pandas Categorical
+        Categorical inputs are encoded from their existing codes, without
+        sorting the values.
+    order : list, optional
+        Groups to keep, in order. Defaults to the sorted unique values, or
+        the categories of a Categorical.
+
+    Returns
+    -------
+    groups : np.ndarray
+        Group labels, sorted or in `order`.
+    codes : np.ndarray of int
+        Index into `groups` of each value; -1 for missing values and values
+        not in `order`.
+    """
+
+    try:
+        from .categorical import encode
+    except ImportError:
+        # NumPy-only fallback where pandas is not installed
+        if hasattr(values, 'categories') and hasattr(values, 'codes'):
+            groups = np.asarray(values.categories)
+            codes = np.asarray(values.codes, dtype=np.int64)
+        else:
+            groups, codes = np.unique(values, return_inverse=True)
+            codes = codes.reshape(-1)
+        if order is None:
+            return groups, codes
+        pos = {g: i for i, g in enumerate(order)}
+        # Trailing -1 keeps missing values (code -1) unmatched
+        remap = np.array([pos.get(g, -1) for g in groups] + [-1],
+                         dtype=np.int64)
+        return np.asarray(order), remap[codes]
+
+    cats = encode(values, order)
+    return cats.categories, cats.codes.astype(np.int64)
+
+
+def vaf_ticks(xmin=0.002, xmax=1):
+    """
+    Log-spaced VAF tick positions between `xmin` and `xmax`.
+    """
+
+    step = 10 ** np.floor(np.log10(xmin))
+    first_max = step * 10
+    ticks = [np.arange(xmin, first_max, step)]
+
+    for i in np.arange(np.log10(first_max), np.log10(xmax)):
+        ticks.append(np.arange(10 ** i, 10 ** (i+1), 10 ** i))
+
+    ticks.append([xmax])
+    ticks = np.concatenate(ticks)
+    return ticks
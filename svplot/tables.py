@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Distributed under terms of the MIT license.
+
+"""
+Column-projected loading of plotting inputs from Arrow-backed tables.
+"""
+
+import os
+
+PARQUET_EXTS = ('.parquet', '.pq')
+FEATHER_EXTS = ('.feather', '.arrow', '.ipc')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('pyarrow is required to plot from Parquet, Feather '
+                          'or Arrow inputs')
+    return pyarrow
+
+
+def _is_arrow_table(data):
+    return type(data).__module__.startswith('pyarrow') and \
+        hasattr(data, 'schema')
+
+
+def is_table_source(data):
+    """
+    Check whether `data` must be loaded before plotting.
+
+    Parameters
+    ----------
+    data : object
+
+    Returns
+    -------
+    bool
+        True if `data` is a path to an Arrow-backed file or a pyarrow Table.
+    """
+
+    return isinstance(data, (str, os.PathLike)) or _is_arrow_table(data)
+
+
+def _read_path(path, columns, filters):
+    _import_pyarrow()
+
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext in PARQUET_EXTS:
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(path, memory_map=True)
+        columns = [c for c in columns if c in schema.names]
+        pq_filters = None
+        if filters:
+            pq_filters = [(col, 'in', list(vals))
+                          for col, vals in filters.items() if col in columns]
+        return pq.read_table(path, columns=columns, filters=pq_filters or None,
+                             memory_map=True)
+
+    elif ext in FEATHER_EXTS:
+        import pyarrow.feather as feather
+
+        table = feather.read_table(path, memory_map=True)
+        return _select(table, columns, filters)
+
+    raise Exception('Unsupported table format: {0}'.format(path))
+
+
+def _select(table, columns, filters):
+    import pyarrow.compute as pc
+    pa = _import_pyarrow()
+
+    columns = [c for c in columns if c in table.schema.names]
+    table = table.select(columns)
+
+    if filters:
+        for col, vals in filters.items():
+            if col not in columns:
+                continue
+            mask = pc.is_in(table[col], value_set=pa.array(list(vals)))
+            table = table.filter(mask)
+
+    return table
+
+
+def load_columns(data, columns, filters=None):
+    """
+    Load only the columns required for a plot.
+
+    DataFrames are passed through untouched. Parquet files are read with
+    column projection and filter pushdown; Feather/Arrow IPC files are
+    memory-mapped so unused columns are never paged in.
+
+    Parameters
+    ----------
+    data : pd.DataFrame, pyarrow.Table, or str
+        Input table, or path to a Parquet/Feather/Arrow IPC file.
+    columns : list of str
+        Columns required by the plot. None entries are ignored; names absent
+        from the table are skipped so callers can report them.
+    filters : dict of {str: list}, optional
+        Restrict rows to those whose column value is in the given list.
+
+    Returns
+    -------
+    df : pd.DataFrame
+    """
+
+    if not is_table_source(data):
+        return data
+
+    columns = list(dict.fromkeys(c for c in columns if c is not None))
+
+    if _is_arrow_table(data):
+        table = _select(data, columns, filters)
+    else:
+        table = _read_path(data, columns, filters)
+
+    # split_blocks avoids consolidating columns into one 2D block, which lets
+    # numeric columns without nulls be handed to pandas without a copy
+    return table.to_pandas(split_blocks=True, self_destruct=True)
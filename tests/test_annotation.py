@@ -0,0 +1,88 @@
+"""
+Collision handling of dense text labels.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from svplot.annotation import avoid_label_overlap
+from svplot.figure import new_figure
+
+
+def _labels(n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    ax = new_figure(figsize=(4, 3), dpi=100).add_subplot(1, 1, 1)
+    ax.set_xlim(0, 10)
+    ax.set_ylim(0, 10)
+    x, y = rng.uniform(1, 9, n), rng.uniform(1, 6, n)
+    texts = [ax.text(xi, yi, str(rng.integers(1, 10 ** 4)), ha='center',
+                     va='bottom', fontsize=10)
+             for xi, yi in zip(x, y)]
+    return ax, texts, rng.uniform(0, 1, n)
+
+
+def _visible_extents(ax, texts):
+    ax.figure.canvas.draw()
+    renderer = ax.figure.canvas.get_renderer()
+    boxes = [t.get_window_extent(renderer) for t in texts if t.get_visible()]
+    return np.array([[b.x0, b.y0, b.x1, b.y1] for b in boxes])
+
+
+def _n_overlaps(boxes, tol=0.5):
+    # Brute force over all pairs; tol absorbs sub-pixel rounding
+    x0, y0, x1, y1 = boxes.T
+    overlap_x = (np.minimum(x1[:, None], x1[None]) -
+                 np.maximum(x0[:, None], x0[None])) > tol
+    overlap_y = (np.minimum(y1[:, None], y1[None]) -
+                 np.maximum(y0[:, None], y0[None])) > tol
+    hits = overlap_x & overlap_y
+    np.fill_diagonal(hits, False)
+    return hits.sum() // 2
+
+
+@pytest.mark.parametrize('how', ['hide', 'shrink', 'nudge'])
+@pytest.mark.parametrize('orient', ['v', 'h'])
+def test_no_visible_labels_overlap(how, orient):
+    ax, texts, priority = _labels()
+    assert _n_overlaps(_visible_extents(ax, texts)) > 0
+
+    adjusted = avoid_label_overlap(ax, texts, priority=priority,
+                                   orient=orient, how=how)
+    boxes = _visible_extents(ax, texts)
+    assert _n_overlaps(boxes) == 0
+    assert adjusted.any()
+
+    # The highest-priority label is placed first and left untouched
+    top = np.argmax(priority)
+    assert not adjusted[top] and texts[top].get_visible()
+    if how == 'nudge':
+        assert boxes.shape[0] == len(texts)
+
+
+def test_shrink_respects_min_fontsize():
+    ax, texts, priority = _labels()
+    adjusted = avoid_label_overlap(ax, texts, priority=priority,
+                                   how='shrink', min_fontsize=8)
+    sizes = np.array([t.get_fontsize() for t in texts])
+    visible = np.array([t.get_visible() for t in texts])
+    assert (sizes[visible] >= 8).all()
+    assert (sizes[~adjusted] == 10).all()
+
+
+def test_hidden_labels_do_not_block():
+    ax, texts, _ = _labels(n=2)
+    texts[1].set_position(texts[0].get_position())
+    texts[0].set_visible(False)
+    adjusted = avoid_label_overlap(ax, texts)
+    assert not adjusted.any() and texts[1].get_visible()
+
+
+def test_invalid_arguments():
+    ax, texts, _ = _labels(n=3)
+    with pytest.raises(Exception, match='Orientation'):
+        avoid_label_overlap(ax, texts, orient='x')
+    with pytest.raises(Exception, match='Overlap handling'):
+        avoid_label_overlap(ax, texts, how='jitter')
@@ -0,0 +1,62 @@
+"""
+Bootstrap bands around plotted distribution curves.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.plotters import plot_svsize_distro, plot_vaf_cum
+
+
+def _frame(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    log_svsize = rng.normal(3.5, 0.8, n)
+    return pd.DataFrame({
+        'log_svsize': log_svsize,
+        'svlen': np.round(10 ** log_svsize).astype(np.int64),
+        'batch': rng.choice(['a', 'b'], n),
+    })
+
+
+@pytest.mark.parametrize('svlen', [None, 'svlen'])
+@pytest.mark.parametrize('hue', [None, 'batch'])
+def test_svsize_band_contains_its_curve(svlen, hue):
+    df = _frame()
+    ax = new_figure().add_subplot(1, 1, 1)
+    # Narrow limits clip part of the data, so the curve must be normalized
+    # over the same range as its band
+    plot_svsize_distro(df, hue=hue, svlen=svlen, ax=ax, xmin=3, xmax=5,
+                       ci=95, ci_kws={'n_boot': 200, 'seed': 0})
+
+    lines = [line for line in ax.get_lines() if len(line.get_xdata()) > 2]
+    bands = ax.collections[1::2]
+    assert len(lines) == len(bands) == (1 if hue is None else 2)
+
+    for line, band in zip(lines, bands):
+        x, y = line.get_xdata(), line.get_ydata()
+        # fill_between traces one edge forward and the other back, so the
+        # band at a grid point spans its two vertices there
+        verts = band.get_paths()[0].vertices
+        grid = np.unique(verts[:, 0])
+        lo = np.array([verts[verts[:, 0] == g, 1].min() for g in grid])
+        hi = np.array([verts[verts[:, 0] == g, 1].max() for g in grid])
+
+        inside = (x >= grid[0]) & (x <= grid[-1])
+        lo = np.interp(x[inside], grid, lo)
+        hi = np.interp(x[inside], grid, hi)
+        tol = 0.02 * y.max()
+        assert (y[inside] >= lo - tol).all()
+        assert (y[inside] <= hi + tol).all()
+
+
+def test_exact_vaf_curves_reject_bands():
+    df = pd.DataFrame({'vf': np.random.default_rng(0).uniform(0, 1, 100)})
+    ax = new_figure().add_subplot(1, 1, 1)
+    with pytest.raises(Exception, match='exact=False'):
+        plot_vaf_cum(df, ax=ax, exact=True, ci=95)
+    assert not ax.lines and not ax.collections
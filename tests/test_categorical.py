@@ -0,0 +1,123 @@
+"""
+Categorical encoding of hue and facet columns.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.categorical import categorical_order, encode
+from svplot.figure import new_figure
+from svplot.jointgrids import JointGrids
+from svplot.plotters import plot_svsize_distro, plot_vaf_cum, \
+    plot_vaf_cum_matrix
+
+
+HUES = {
+    'int': np.array([3, 1, 2, 1, 3, 3]),
+    'float': np.array([0.5, 0.1, 0.5, 0.2, 0.1, 0.2]),
+    'bool': np.array([True, False, True, True, False, True]),
+    'str': np.array(['b', 'a', 'c', 'a', 'b', 'b'], dtype=object),
+}
+
+
+@pytest.mark.parametrize('kind', sorted(HUES))
+@pytest.mark.parametrize('wrap', [np.asarray, pd.Series,
+                                  lambda v: pd.Series(v).array])
+def test_encode_matches_sorted_unique(kind, wrap):
+    values = HUES[kind]
+    cats = encode(wrap(values))
+
+    assert list(cats.categories) == sorted(set(values.tolist()))
+    assert (cats.categories[cats.codes] == values).all()
+
+
+def test_numeric_order_is_sorted_even_without_sort():
+    assert categorical_order(pd.Series([3, 1, 2, 1])) == [1, 2, 3]
+    assert categorical_order(pd.Series(['c', 'a', 'c'])) == ['c', 'a']
+
+
+def test_missing_and_unordered_values_get_negative_codes():
+    cats = encode(pd.Series(['a', None, 'b', 'c']), order=['b', 'a'])
+    assert list(cats.categories) == ['b', 'a']
+    assert list(cats.codes) == [1, -1, 0, -1]
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    n = 600
+    return pd.DataFrame({
+        'vf': rng.beta(1, 20, n),
+        'log_svsize': rng.uniform(2, 6, n),
+        'x': rng.normal(size=n),
+        'y': rng.normal(size=n),
+        'int_hue': rng.integers(0, 3, n),
+        'bool_hue': rng.random(n) < 0.5,
+    })
+
+
+@pytest.mark.parametrize('hue', ['int_hue', 'bool_hue'])
+def test_plots_accept_numeric_and_bool_hue(hue):
+    df = _frame()
+    levels = sorted(df[hue].unique())
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(df, hue=hue, ax=ax)
+    assert [l.get_label() for l in ax.lines] == [str(v) for v in levels]
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_svsize_distro(df, hue=hue, ax=ax)
+
+    grids = JointGrids(df, 'x', 'y', col=hue, panel_size=2,
+                       fig=new_figure())
+    assert grids.grids.shape == (1, len(levels))
+
+
+def test_vaf_cum_matrix_skips_missing_groups():
+    df = _frame()
+    df['sample'] = np.where(df.int_hue == 0, None, df.int_hue.astype(str))
+    df['score'] = 1.0
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum_matrix(df, 'sample', ax=ax, color_by='score')
+    assert len(ax.collections[0].get_segments()) == 2
+
+
+def test_observed_drops_unused_categories():
+    values = pd.Series(pd.Categorical(['b', 'd', None, 'b'],
+                                      categories=list('abcd')))
+    assert list(encode(values).categories) == list('abcd')
+
+    cats = encode(values, observed=True)
+    assert list(cats.categories) == ['b', 'd']
+    assert list(cats.codes) == [0, 1, -1, 0]
+
+
+def test_palette_is_checked_against_plotted_hues():
+    df = _frame()
+    df['many'] = np.arange(df.shape[0]) % 12
+    palette = ['r', 'g']
+
+    # hue_order shorter than the observed levels needs one color per entry
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(df, hue='many', hue_order=[3, 5], palette=palette, ax=ax)
+    assert [l.get_label() for l in ax.lines] == ['3', '5']
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_svsize_distro(df, hue='many', hue_order=[3, 5], palette=palette,
+                       ax=ax, ci=90, ci_kws={'n_boot': 20, 'seed': 0})
+    assert len(ax.lines) == 2
+
+    # Unused categories of a Categorical hue need no color
+    df['cat'] = pd.Categorical(np.where(df.bool_hue, 'a', 'b'),
+                               categories=list('abcdefghijklmnop'))
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(df, hue='cat', palette=palette, ax=ax)
+    assert [l.get_label() for l in ax.lines] == ['a', 'b']
+
+    with pytest.raises(Exception, match='Palette smaller'):
+        plot_vaf_cum(df, hue='many', palette=palette,
+                     ax=new_figure().add_subplot(1, 1, 1))
@@ -0,0 +1,97 @@
+"""
+Count plots reduced with a single bincount.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.plotdata import compute_counts
+from svplot.plotters import countplot
+
+
+def _calls(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'svtype': rng.choice(['DEL', 'DUP', 'INV', 'BND'], n,
+                             p=[0.5, 0.3, 0.15, 0.05]),
+        'caller': rng.choice(['delly', 'lumpy', 'manta'], n),
+        'count': rng.integers(1, 10, n),
+    })
+
+
+def _axes():
+    return new_figure().add_subplot(1, 1, 1)
+
+
+def _heights(ax):
+    return np.array([p.get_height() for p in ax.containers[0].patches])
+
+
+def test_counts_match_value_counts():
+    df = _calls()
+    data = compute_counts(pd.Categorical(df.svtype.values))
+    expected = df.svtype.value_counts().sort_index()
+    assert data.groups.tolist() == expected.index.tolist()
+    assert np.array_equal(data.counts[:, 0], expected.values)
+    assert data.total == df.shape[0]
+
+
+def test_hue_counts_match_crosstab():
+    df = _calls()
+    order = ['INV', 'DEL', 'DUP']
+    hue_order = ['manta', 'delly']
+    data = compute_counts(df.svtype.values, df.caller.values, order,
+                          hue_order)
+
+    expected = df.groupby(['svtype', 'caller']).size()
+    for i, svtype in enumerate(order):
+        for j, caller in enumerate(hue_order):
+            assert data.counts[i, j] == expected[(svtype, caller)]
+    # Rows outside order and hue_order are not counted
+    kept = df.svtype.isin(order) & df.caller.isin(hue_order)
+    assert data.total == kept.sum()
+
+
+def test_weighted_counts_match_grouped_sums():
+    df = _calls()
+    data = compute_counts(df.svtype.values, weights=df['count'].values)
+    expected = df.groupby('svtype')['count'].sum().sort_index()
+    assert np.array_equal(data.counts[:, 0], expected.values)
+
+
+@pytest.mark.parametrize('orient', ['v', 'h'])
+def test_plotted_bars_match_value_counts(orient):
+    df = _calls()
+    order = ['DEL', 'DUP', 'INV', 'BND']
+    ax = _axes()
+    countplot(x='svtype', hue='caller', data=df, order=order, orient=orient,
+              ax=ax)
+
+    patches = ax.containers[0].patches
+    if orient == 'v':
+        heights = np.array([p.get_height() for p in patches])
+    else:
+        heights = np.array([p.get_width() for p in patches])
+
+    # Bars are group-major, hues dodged within each group
+    hues = sorted(df.caller.unique())
+    expected = [((df.svtype == s) & (df.caller == c)).sum()
+                for s in order for c in hues]
+    assert np.array_equal(heights, expected)
+
+    labels = [t.get_text() for t in ax.texts]
+    assert labels == [str(v) for v in expected]
+
+
+def test_percent_stat_sums_to_hundred():
+    df = _calls()
+    ax = _axes()
+    countplot(x='svtype', data=df, stat='percent', labels=False, ax=ax)
+    expected = df.svtype.value_counts(normalize=True).sort_index() * 100
+    assert np.allclose(_heights(ax), expected.values)
+    assert np.isclose(_heights(ax).sum(), 100)
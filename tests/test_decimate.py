@@ -0,0 +1,74 @@
+"""
+Pixel-aware decimation of dense curves.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from svplot.decimate import minmax_indices, plot_decimated
+from svplot.figure import new_figure
+
+
+def _walk(n=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.uniform(0, 10, n))
+    return x, np.cumsum(rng.normal(size=n))
+
+
+def _columns(x, n_columns, xmin, xmax):
+    cols = ((x - xmin) / (xmax - xmin) * n_columns).astype(np.int64)
+    return np.clip(cols, -1, n_columns)
+
+
+@pytest.mark.parametrize('window', [None, (2.5, 7.5)])
+def test_every_column_keeps_its_extremes_and_ends(window):
+    x, y = _walk()
+    n_columns = 200
+    xmin, xmax = window if window is not None else (x[0], x[-1])
+    idx = minmax_indices(x, y, n_columns, *(window or ()))
+
+    assert np.array_equal(idx, np.unique(idx))
+    assert idx.shape[0] <= 4 * (n_columns + 2)
+
+    # One point beyond each visible limit is kept
+    inside = np.flatnonzero((x >= xmin) & (x <= xmax))
+    lo = max(inside[0] - 1, 0)
+    hi = min(inside[-1] + 1, x.shape[0] - 1)
+    assert idx[0] == lo and idx[-1] == hi
+
+    kept = set(idx.tolist())
+    cols = _columns(x[lo:hi + 1], n_columns, xmin, xmax)
+    for col in np.unique(cols):
+        rows = lo + np.flatnonzero(cols == col)
+        assert rows[0] in kept and rows[-1] in kept
+        assert y[rows].max() == y[idx[np.isin(idx, rows)]].max()
+        assert y[rows].min() == y[idx[np.isin(idx, rows)]].min()
+
+
+def test_sparse_curves_are_not_decimated():
+    x, y = _walk(n=300)
+    assert np.array_equal(minmax_indices(x, y, 100), np.arange(300))
+
+
+def test_line_redecimates_to_axes_width_and_keeps_full_data():
+    x, y = _walk()
+    fig = new_figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_subplot(1, 1, 1)
+    line = plot_decimated(ax, x, y)
+    fig.canvas.draw()
+
+    drawn = line.get_xdata().shape[0]
+    assert drawn <= 4 * (int(np.ceil(ax.bbox.width)) + 2)
+    assert line.get_ydata().max() == y.max()
+    assert line.get_ydata().min() == y.min()
+    full_x, full_y = line.get_full_data()
+    assert np.array_equal(full_x, x) and np.array_equal(full_y, y)
+
+    # Zooming in re-decimates from full-resolution data
+    ax.set_xlim(4, 5)
+    fig.canvas.draw()
+    window = (x >= 4) & (x <= 5)
+    assert line.get_ydata().max() >= y[window].max()
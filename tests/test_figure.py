@@ -0,0 +1,101 @@
+"""
+Thread-safety of the pyplot-free figure API.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from svplot.figure import new_figure, render
+from svplot.jointgrids import JointGrids
+from svplot.plotters import plot_svsize_distro, plot_vaf_cum
+from svplot.venn import venn4
+
+
+def _make_data(seed):
+    rng = np.random.default_rng(seed)
+    n = 2000
+    return pd.DataFrame({
+        'vf': rng.beta(1, 20, n),
+        'svlen': rng.integers(50, 10 ** 6, n),
+        'batch': rng.choice(['a', 'b'], n),
+        'x': rng.normal(size=n),
+        'y': rng.normal(size=n),
+    })
+
+
+def _render_one(job):
+    kind, seed = job
+    df = _make_data(seed)
+
+    if kind == 'jointgrids':
+        fig = new_figure()
+        grids = JointGrids(df, 'x', 'y', col='batch', panel_size=2, fig=fig)
+        grids.plot_joint('scatter', s=2)
+        grids.plot_marginals(sns.histplot)
+        return render(fig)
+
+    fig = new_figure(figsize=(4, 3))
+    ax = fig.add_subplot(1, 1, 1)
+    if kind == 'vaf_cum':
+        plot_vaf_cum(df, hue='batch', ax=ax)
+    elif kind == 'svsize_distro':
+        plot_svsize_distro(df, hue='batch', svlen='svlen', ax=ax)
+    else:
+        venn4(list(range(1, 16)), ax=ax)
+    return render(fig)
+
+
+def test_concurrent_render_matches_serial():
+    jobs = [(kind, seed)
+            for kind in ('vaf_cum', 'svsize_distro', 'venn4', 'jointgrids')
+            for seed in range(8)]
+
+    serial = [_render_one(job) for job in jobs]
+    with ThreadPoolExecutor(8) as executor:
+        threaded = list(executor.map(_render_one, jobs))
+
+    assert threaded == serial
+    assert plt.get_fignums() == []
+
+
+def test_marginals_accept_seaborn_and_pyplot_functions():
+    df = _make_data(0)
+    for func in (sns.kdeplot, sns.histplot, plt.hist, 'hist'):
+        fig = new_figure()
+        grids = JointGrids(df, 'x', 'y', col='batch', panel_size=2, fig=fig)
+        grids.plot_joint(sns.scatterplot if func is not plt.hist else
+                         'scatter')
+        grids.plot_marginals(func)
+        for grid in grids.grids.flat:
+            assert grid.ax_marg_x.has_data()
+            assert grid.ax_marg_y.has_data()
+    plt.close('all')
+
+
+def test_joint_callables_stay_off_pyplot(monkeypatch):
+    def _fail(*args, **kwargs):
+        raise AssertionError('pyplot current axes used')
+
+    monkeypatch.setattr(plt, 'sca', _fail)
+
+    def _rug(values, ax=None, **kwargs):
+        ax.plot(values, np.zeros_like(values), '|', **kwargs)
+
+    df = _make_data(0)
+    grids = JointGrids(df, 'x', 'y', col='batch', panel_size=2,
+                       fig=new_figure())
+    grids.plot_joint(plt.scatter, s=2)
+    grids.plot_marginals(plt.hist, bins=10)
+    grids.plot_marginals(_rug)
+    for grid in grids.grids.flat:
+        assert grid.ax_joint.collections
+        assert grid.ax_marg_y.patches[0].get_width() > 0
+        assert grid.ax_marg_x.lines and grid.ax_marg_y.lines
+    assert plt.get_fignums() == []
@@ -0,0 +1,40 @@
+"""
+Bulk layout of JointGrids axes.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.gridspec as gridspec
+import numpy as np
+import pytest
+
+from svplot.figure import new_figure
+from svplot.jointgrids import joint_axes_layout
+
+
+def _nested_gridspec_bounds(fig, n_rows, n_cols, ratio):
+    # The per-panel GridSpecFromSubplotSpec layout joint_axes_layout replaces
+    outer = gridspec.GridSpec(n_rows, n_cols, figure=fig)
+    bounds = np.empty((n_rows, n_cols, 3, 4))
+    for i in range(n_rows):
+        for j in range(n_cols):
+            inner = gridspec.GridSpecFromSubplotSpec(ratio + 1, ratio + 1,
+                                                     subplot_spec=outer[i, j])
+            specs = (inner[1:, :-1], inner[0, :-1], inner[1:, -1])
+            for k, spec in enumerate(specs):
+                bounds[i, j, k] = spec.get_position(fig).bounds
+    return bounds
+
+
+@pytest.mark.parametrize('wspace, hspace', [(0.2, 0.35), (0.4, 0.1)])
+def test_layout_matches_nested_gridspec(wspace, hspace):
+    fig = new_figure(figsize=(9, 6))
+    fig.subplots_adjust(wspace=wspace, hspace=hspace)
+
+    axes = joint_axes_layout(fig, 2, 3, ratio=5)
+    expected = _nested_gridspec_bounds(fig, 2, 3, ratio=5)
+
+    actual = np.array([[[ax.get_position().bounds for ax in panel]
+                        for panel in row] for row in axes])
+    assert np.allclose(actual, expected, rtol=0, atol=1e-12)
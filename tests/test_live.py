@@ -0,0 +1,107 @@
+"""
+Incrementally updated live plots.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.live import LiveSvsizeDistro, LiveVafCum
+from svplot.plotdata import compute_svsize_distro, compute_vaf_cum
+
+
+def _frame(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'vf': rng.uniform(0, 1, n),
+        'log_svsize': rng.uniform(0.5, 8.5, n),
+        'batch': rng.choice(['x', 'y', 'z'], n),
+        'count': rng.integers(1, 4, n),
+    })
+
+
+def _axes():
+    return new_figure().add_subplot(1, 1, 1)
+
+
+def _chunks(df, n=4):
+    bounds = np.linspace(0, df.shape[0], n + 1).astype(int)
+    return [df.iloc[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def test_vaf_chunks_accumulate_to_full_ecdf():
+    df = _frame()
+    live = LiveVafCum(ax=_axes(), hue='batch', weights='count')
+    for chunk in _chunks(df):
+        live.update(chunk)
+
+    data = compute_vaf_cum(df.vf.values, df.batch.values,
+                           weights=df['count'].values.astype(float))
+    assert sorted(live.counts.groups) == list(data.labels)
+    for i, g in enumerate(live.counts.groups):
+        j = list(data.labels).index(g)
+        assert np.allclose(live.artists[i][0].get_ydata(), data.ecdf[j])
+
+    # Each point is the weighted fraction of variants at or below the tick
+    rows = df.batch.values == live.counts.groups[0]
+    w = df['count'].values[rows]
+    vf = df.vf.values[rows]
+    expected = [(w * (vf <= t)).sum() / w.sum() for t in live.xticks]
+    assert np.allclose(live.artists[0][0].get_ydata(), expected)
+
+
+def test_svsize_chunks_accumulate_to_full_density():
+    df = _frame()
+    live = LiveSvsizeDistro(ax=_axes(), hue='batch', hue_order=['y', 'x'])
+    for chunk in _chunks(df):
+        live.update(chunk)
+
+    data = compute_svsize_distro(log_svsize=df.log_svsize.values,
+                                 hue=df.batch.values, hue_order=['y', 'x'])
+    for i in range(2):
+        assert np.allclose(live.artists[i][0].get_ydata(), data.density[i])
+
+    # Rows outside hue_order are dropped, not counted as a listed group
+    assert live.counts.groups == ['y', 'x']
+    assert live.counts.totals.tolist() == [(df.batch == 'y').sum(),
+                                           (df.batch == 'x').sum()]
+
+    # Legend counts include sizes outside [xmin, xmax]
+    labels = [t.get_text() for t in live.ax.get_legend().get_texts()]
+    assert labels == ['y (n={0:,})'.format((df.batch == 'y').sum()),
+                      'x (n={0:,})'.format((df.batch == 'x').sum())]
+
+
+def test_svsize_array_updates_match_dataframe_updates():
+    df = _frame()
+    by_df = LiveSvsizeDistro(ax=_axes(), hue='batch')
+    by_array = LiveSvsizeDistro(ax=_axes())
+    for chunk in _chunks(df):
+        by_df.update(chunk)
+        by_array.update(log_svsize=chunk.log_svsize.values,
+                        hue=chunk.batch.values)
+    assert by_df.counts.groups == by_array.counts.groups
+    assert np.array_equal(by_df.counts.counts, by_array.counts.counts)
+
+
+@pytest.mark.parametrize('hue_order', [None, ['x', 'y']])
+def test_missing_hue_values_raise(hue_order):
+    df = _frame()
+    live = LiveVafCum(ax=_axes(), hue='batch', hue_order=hue_order)
+    with pytest.raises(ValueError):
+        live.update(vf=df.vf.values)
+
+    live = LiveSvsizeDistro(ax=_axes(), hue='batch', hue_order=hue_order)
+    with pytest.raises(ValueError):
+        live.update(log_svsize=df.log_svsize.values)
+
+
+def test_missing_weights_raise():
+    df = _frame()
+    live = LiveVafCum(ax=_axes(), weights='count')
+    with pytest.raises(ValueError):
+        live.update(vf=df.vf.values)
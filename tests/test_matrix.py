@@ -0,0 +1,104 @@
+"""
+Many-group VAF and SV size plots drawn as single collections.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.plotters import plot_svsize_matrix, plot_vaf_cum_matrix
+from svplot.stats import (binned_log_density, log_bin_edges, vaf_ticks,
+                          weighted_ecdf)
+
+
+def _frame(n=4000, n_groups=40, seed=0):
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, n_groups, n)
+    return pd.DataFrame({
+        'sample': np.char.add('s', group.astype(str)),
+        'vf': rng.beta(1, 5 + group % 7, n),
+        'log_svsize': rng.normal(2.5 + group / n_groups * 3, 0.5, n),
+        'depth': rng.uniform(10, 60, n),
+        'count': rng.integers(1, 4, n),
+    })
+
+
+def _axes():
+    return new_figure().add_subplot(1, 1, 1)
+
+
+def test_vaf_matrix_draws_each_group_ecdf_in_one_collection():
+    df = _frame()
+    ax = _axes()
+    plot_vaf_cum_matrix(df, 'sample', ax=ax, weights='count')
+
+    lines = ax.collections[0]
+    samples = sorted(df['sample'].unique())
+    segments = lines.get_segments()
+    assert len(segments) == len(samples)
+
+    xticks = vaf_ticks()
+    for sample, segment in zip(samples, segments):
+        rows = df['sample'] == sample
+        expected = weighted_ecdf(df.vf[rows].values, xticks,
+                                 df['count'][rows].values)
+        assert np.allclose(segment[:, 0], np.log10(xticks))
+        assert np.allclose(segment[:, 1], expected)
+
+
+def test_vaf_matrix_colors_by_group_mean_and_summarizes_quantiles():
+    df = _frame()
+    ax = _axes()
+    plot_vaf_cum_matrix(df, 'sample', ax=ax, color_by='depth',
+                        quantiles=(0.1, 0.5, 0.9))
+
+    samples = sorted(df['sample'].unique())
+    means = df.groupby('sample')['depth'].mean()[samples].values
+    assert np.allclose(ax.collections[0].get_array(), means)
+
+    labels = [t.get_text() for t in ax.get_legend().get_texts()]
+    assert labels == ['10-90%', '50% (n={0})'.format(len(samples))]
+
+
+@pytest.mark.parametrize('kind', ['heatmap', 'ridge'])
+def test_svsize_matrix_matches_per_group_density(kind):
+    df = _frame()
+    order = ['s3', 's1', 's2']
+    ax = _axes()
+    plot_svsize_matrix(df, 'sample', order=order, ax=ax, kind=kind,
+                       bw=0.1)
+
+    log_edges, _ = log_bin_edges(1, 8)
+    expected = []
+    for sample in order:
+        counts, _ = np.histogram(df.log_svsize[df['sample'] == sample],
+                                 log_edges)
+        expected.append(binned_log_density(counts, log_edges, bw=0.1)[1])
+    expected = np.array(expected)
+
+    assert [t.get_text() for t in ax.get_yticklabels()] == order
+    if kind == 'heatmap':
+        density = ax.images[0].get_array()
+        assert np.allclose(density, expected)
+    else:
+        ridges = ax.collections[0].get_paths()
+        assert len(ridges) == len(order)
+        # Ridge heights are densities scaled so the tallest spans `overlap`
+        n_bins = expected.shape[1]
+        heights = np.array([np.arange(len(order))[i] -
+                            path.vertices[:n_bins, 1]
+                            for i, path in enumerate(ridges)])
+        assert np.allclose(heights / heights.max(),
+                           expected / expected.max())
+
+
+def test_svsize_matrix_hides_unreadable_labels():
+    df = _frame(n_groups=80)
+    ax = _axes()
+    plot_svsize_matrix(df, 'sample', ax=ax)
+    assert len(ax.get_yticks()) == 0
+    assert ax.images[0].get_array().shape[0] == df['sample'].nunique()
@@ -0,0 +1,119 @@
+"""
+Venn counts of SV call sets matched by overlap.
+"""
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.overlap import match_calls, venn_counts
+
+
+def _callsets(n_sets, n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    base_start = rng.integers(0, 200000, n)
+    base_len = rng.integers(0, 5000, n)
+    base_chrom = rng.choice(['1', '2'], n)
+    base_type = rng.choice(['DEL', 'DUP'], n)
+    callsets = []
+    for _ in range(n_sets):
+        # Each set sees a jittered subset of a shared pool of variants
+        rows = rng.random(n) < 0.6
+        start = base_start[rows] + rng.integers(-300, 300, rows.sum())
+        length = np.maximum(base_len[rows] +
+                            rng.integers(-300, 300, rows.sum()), 0)
+        callsets.append(pd.DataFrame({
+            'chrom': base_chrom[rows],
+            'start': start,
+            'end': start + length,
+            # A few calls disagree on type and must not match
+            'svtype': np.where(rng.random(rows.sum()) < 0.1, 'INV',
+                               base_type[rows]),
+        }))
+    return callsets
+
+
+def _brute_force_clusters(callsets, min_overlap, window):
+    calls = pd.concat([c.assign(set_id=i) for i, c in enumerate(callsets)],
+                      ignore_index=True)
+    n = calls.shape[0]
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i in range(n):
+        for j in range(i + 1, n):
+            a, b = calls.iloc[i], calls.iloc[j]
+            if a.set_id == b.set_id or a.chrom != b.chrom or \
+                    a.svtype != b.svtype:
+                continue
+            match = False
+            if min_overlap is not None:
+                overlap = min(a.end, b.end) - max(a.start, b.start)
+                match = (overlap > 0 and
+                         overlap >= min_overlap * (a.end - a.start) and
+                         overlap >= min_overlap * (b.end - b.start))
+            if window is not None:
+                match = match or (abs(a.start - b.start) <= window and
+                                  abs(a.end - b.end) <= window)
+            if match:
+                parent[find(j)] = find(i)
+
+    return calls.set_id.values, np.array([find(i) for i in range(n)])
+
+
+def _venn_from_clusters(set_ids, roots, n_sets):
+    masks = {}
+    for s, r in zip(set_ids, roots):
+        masks[r] = masks.get(r, 0) | (1 << s)
+    counts = np.bincount(list(masks.values()), minlength=2 ** n_sets)
+    regions = [sum(1 << i for i in combo)
+               for k in range(1, n_sets + 1)
+               for combo in combinations(range(n_sets), k)]
+    return counts[regions]
+
+
+@pytest.mark.parametrize('min_overlap, window',
+                         [(0.5, None), (None, 500), (0.8, 200)])
+def test_clusters_match_brute_force(min_overlap, window):
+    callsets = _callsets(3, n=60)
+    set_ids, cluster = match_calls(callsets, min_overlap, window,
+                                   chunk_pairs=37)
+    expected_sets, expected = _brute_force_clusters(callsets, min_overlap,
+                                                    window)
+    assert np.array_equal(set_ids, expected_sets)
+
+    # Same partition of calls, whatever the labels
+    pairs = {(a, b) for a, b in zip(cluster, expected)}
+    assert len(pairs) == len(set(cluster)) == len(set(expected))
+
+
+@pytest.mark.parametrize('n_sets', [2, 3, 4])
+def test_venn_counts_match_brute_force(n_sets):
+    callsets = _callsets(n_sets, n=50, seed=n_sets)
+    set_ids, roots = _brute_force_clusters(callsets, 0.5, None)
+    expected = _venn_from_clusters(set_ids, roots, n_sets)
+
+    counts = venn_counts(callsets, min_overlap=0.5)
+    assert counts.shape[0] == 2 ** n_sets - 1
+    assert np.array_equal(counts, expected)
+
+
+def test_tuple_inputs_and_ignored_svtype():
+    a = (np.array(['1', '1']), np.array([100, 5000]), np.array([200, 6000]))
+    b = (np.array(['1', '1']), np.array([120, 9000]), np.array([210, 9100]))
+    # [A only, B only, AB]
+    assert venn_counts([a, b], min_overlap=0.5).tolist() == [1, 1, 1]
+
+
+def test_invalid_arguments():
+    callsets = _callsets(2, n=10)
+    with pytest.raises(Exception, match='2, 3, or 4'):
+        venn_counts(callsets[:1])
+    with pytest.raises(Exception, match='min_overlap'):
+        match_calls(callsets, min_overlap=None, window=None)
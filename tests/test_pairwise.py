@@ -0,0 +1,109 @@
+"""
+Batched pairwise tests checked against scipy.stats.
+"""
+
+import numpy as np
+import pytest
+
+stats = pytest.importorskip('scipy.stats')
+
+from svplot.pairwise import (adjust_pvalues, chi2_contingency, count_tables,
+                             fisher_exact, format_pvalues, mannwhitneyu,
+                             pairwise_pvalues)
+
+
+def _tables(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    totals = rng.integers(1, 120, (n, 2))
+    counts = rng.binomial(totals, rng.uniform(0.05, 0.6, (n, 2)))
+    tables = np.stack([counts, totals - counts], axis=2)
+    # Degenerate margins: an empty row and an empty column
+    tables[0] = [[0, 0], [3, 7]]
+    tables[1] = [[0, 5], [0, 9]]
+    return tables
+
+
+@pytest.mark.parametrize('alternative', ['two-sided', 'less', 'greater'])
+def test_fisher_matches_scipy(alternative):
+    tables = _tables()
+    p = fisher_exact(tables, alternative, chunksize=500)
+    expected = [stats.fisher_exact(t, alternative).pvalue for t in tables]
+    assert np.allclose(p, expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('correction', [True, False])
+def test_chi2_matches_scipy(correction):
+    tables = _tables()
+    p = chi2_contingency(tables, correction)
+    assert np.isnan(p[:2]).all()
+    expected = [stats.chi2_contingency(t, correction).pvalue
+                for t in tables[2:]]
+    assert np.allclose(p[2:], expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('alternative', ['two-sided', 'less', 'greater'])
+def test_mannwhitney_matches_scipy(alternative):
+    rng = np.random.default_rng(1)
+    # Rounded values give many ties
+    samples = [np.round(rng.normal(i % 3 * 0.2, 1, rng.integers(5, 60)), 1)
+               for i in range(20)]
+    p = mannwhitneyu(samples, alternative)
+    expected = [stats.mannwhitneyu(samples[i], samples[i + 1], alternative=
+                                   alternative, method='asymptotic').pvalue
+                for i in range(0, 20, 2)]
+    assert np.allclose(p, expected, rtol=1e-9)
+
+
+def _holm(p):
+    m = p.shape[0]
+    order = np.argsort(p)
+    adjusted = np.empty(m)
+    running = 0
+    for rank, i in enumerate(order):
+        running = max(running, min((m - rank) * p[i], 1))
+        adjusted[i] = running
+    return adjusted
+
+
+def test_corrections_match_reference():
+    p = np.random.default_rng(2).uniform(0, 0.2, 50)
+    assert np.allclose(adjust_pvalues(p, 'bonferroni'),
+                       np.minimum(p * 50, 1))
+    assert np.allclose(adjust_pvalues(p, 'holm'), _holm(p))
+    assert np.allclose(adjust_pvalues(p, 'fdr_bh'),
+                       stats.false_discovery_control(p, method='bh'))
+
+
+def test_corrections_skip_nan():
+    p = np.array([0.01, np.nan, 0.04, 0.03])
+    adjusted = adjust_pvalues(p, 'bonferroni')
+    assert np.isnan(adjusted[1])
+    assert np.allclose(adjusted[[0, 2, 3]], [0.03, 0.12, 0.09])
+
+
+def test_pairwise_pvalues_pairs_adjacent_bars():
+    counts = np.array([12, 30, 5, 5, 40])
+    totals = np.array([100, 100, 50, 60, 80])
+    tables = count_tables(counts, totals)
+    assert tables.shape == (2, 2, 2)
+    assert tables[1].tolist() == [[5, 45], [5, 55]]
+
+    p = pairwise_pvalues('fisher', counts=counts, totals=totals,
+                         correction='holm')
+    raw = [stats.fisher_exact(t).pvalue for t in tables]
+    assert np.allclose(p, _holm(np.array(raw)))
+
+
+def test_invalid_arguments():
+    with pytest.raises(Exception, match='Test must be one of'):
+        pairwise_pvalues('ttest', counts=[1, 2], totals=[3, 4])
+    with pytest.raises(Exception, match='requires `samples`'):
+        pairwise_pvalues('mannwhitney')
+    with pytest.raises(Exception, match='non-negative'):
+        fisher_exact([[[1, -1], [2, 3]]])
+
+
+def test_format_pvalues():
+    p = [0.0004, 0.004, 0.04, 0.4]
+    assert format_pvalues(p, 'stars').tolist() == ['***', '**', '*', 'ns']
+    assert format_pvalues(p[:1]).tolist() == ['p=0.000']
@@ -0,0 +1,51 @@
+"""
+Failure handling of the batch rendering pipeline.
+"""
+
+import io
+import threading
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+from svplot.pipeline import plot_stages, run_batch
+
+
+def _run(jobs, **kwargs):
+    _, compute, plot = plot_stages('vaf_cum')
+    df = pd.DataFrame({'vf': np.random.default_rng(0).beta(1, 20, 500)})
+    jobs = [(job[0], df) if isinstance(job, tuple) else job for job in jobs]
+
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(run_batch(jobs, lambda d: d, compute,
+                                               plot, **kwargs)),
+        daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+    assert not thread.is_alive(), 'run_batch did not finish'
+    return result
+
+
+def test_failed_acquire_is_reported_per_job():
+    report = _run([(io.BytesIO(),)] * 3, layout='bogus')
+    assert report['n_figures'] == 0
+    assert len(report['errors']) == 3
+
+
+def test_malformed_job_is_reported():
+    report = _run([(io.BytesIO(),), 'bad', (io.BytesIO(),)])
+    assert report['n_figures'] == 2
+    assert [output for output, _ in report['errors']] == ['bad']
+
+
+def test_plot_stages_unpack_into_run_batch():
+    df = pd.DataFrame({'vf': np.random.default_rng(0).beta(1, 20, 500)})
+    out = io.BytesIO()
+    report = run_batch([(out, df)], *plot_stages('vaf_cum'))
+    assert report['errors'] == []
+    assert report['n_figures'] == 1
+    assert out.getvalue().startswith(b'\x89PNG')
@@ -0,0 +1,86 @@
+"""
+Compute/render split and .npz round-tripping of plot data.
+"""
+
+import io
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.plotdata import (DensityData, ECDFData, compute_svsize_distro,
+                             compute_vaf_cum)
+from svplot.plotters import (plot_svsize_distro, render_svsize_distro,
+                             render_vaf_cum)
+
+
+def _frame(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    svlen = np.round(10 ** rng.uniform(1.5, 6, n)).astype(np.int64)
+    return pd.DataFrame({'svlen': svlen, 'vf': rng.beta(1, 10, n),
+                         'batch': rng.choice(['a', 'b', 'c'], n)})
+
+
+def _round_trip(data):
+    buf = io.BytesIO()
+    data.save(buf)
+    buf.seek(0)
+    return type(data).load(buf)
+
+
+def _curves(ax):
+    return [line.get_full_data()[1] if hasattr(line, 'get_full_data')
+            else line.get_ydata() for line in ax.lines]
+
+
+def _assert_same(data, loaded):
+    for name, value in data.to_dict().items():
+        if isinstance(value, np.ndarray):
+            assert np.array_equal(getattr(loaded, name), value)
+        else:
+            assert getattr(loaded, name) == value
+
+
+@pytest.mark.parametrize('hue', [None, 'batch'])
+def test_density_npz_round_trip(hue):
+    df = _frame()
+    data = compute_svsize_distro(svlen=df.svlen.values,
+                                 hue=None if hue is None else df[hue].values,
+                                 xmin=1, xmax=7)
+    loaded = _round_trip(data)
+    assert isinstance(loaded, DensityData)
+    _assert_same(data, loaded)
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    render_svsize_distro(data, ax)
+    ref = new_figure().add_subplot(1, 1, 1)
+    render_svsize_distro(loaded, ref)
+    assert all(np.array_equal(a, b) for a, b in zip(_curves(ax),
+                                                     _curves(ref)))
+
+
+def test_ecdf_npz_round_trip():
+    df = _frame()
+    data = compute_vaf_cum(df.vf.values, hue=df.batch.values)
+    loaded = _round_trip(data)
+    assert isinstance(loaded, ECDFData)
+    _assert_same(data, loaded)
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    render_vaf_cum(loaded, ax)
+    assert np.allclose(_curves(ax), data.ecdf)
+
+
+def test_render_reproduces_binned_svlen_plot():
+    df = _frame()
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_svsize_distro(None, svlen=df.svlen.values, ax=ax)
+
+    data = compute_svsize_distro(svlen=df.svlen.values)
+    ref = new_figure().add_subplot(1, 1, 1)
+    render_svsize_distro(data, ref)
+    assert np.allclose(_curves(ax)[0], _curves(ref)[0])
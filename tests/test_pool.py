@@ -0,0 +1,76 @@
+"""
+FigurePool reuse, limits and reset fidelity.
+"""
+
+import threading
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+import seaborn as sns
+
+from svplot.figure import new_figure, render
+from svplot.plotters import plot_svsize_distro, plot_vaf_cum
+from svplot.pool import FigurePool
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    n = 2000
+    return pd.DataFrame({'vf': rng.beta(1, 20, n),
+                         'svlen': rng.integers(50, 10 ** 6, n),
+                         'batch': rng.choice(['a', 'b'], n)})
+
+
+def test_reused_figure_matches_fresh_under_grid_style():
+    df = _data()
+    with sns.axes_style('whitegrid'):
+        fig = new_figure(figsize=(4, 3))
+        plot_vaf_cum(df, hue='batch', ax=fig.add_subplot(1, 1, 1))
+        fresh = render(fig)
+
+        pool = FigurePool()
+        fig, ax = pool.acquire(figsize=(4, 3))
+        plot_svsize_distro(df, hue='batch', svlen='svlen', ax=ax)
+        pool.release(fig)
+
+        fig, ax = pool.acquire(figsize=(4, 3))
+        plot_vaf_cum(df, hue='batch', ax=ax)
+        assert render(fig) == fresh
+
+
+def test_double_release_is_rejected():
+    pool = FigurePool()
+    fig, _ = pool.acquire()
+    pool.release(fig)
+    with pytest.raises(Exception):
+        pool.release(fig)
+    assert pool.n_idle == 1
+
+    first, _ = pool.acquire()
+    second, _ = pool.acquire()
+    assert first is not second
+
+
+def test_concurrent_release_respects_max_idle():
+    pool = FigurePool(max_idle=2)
+    figs = [pool.acquire(figsize=(2, 2))[0] for _ in range(16)]
+
+    barrier = threading.Barrier(len(figs))
+
+    def _release(fig):
+        barrier.wait()
+        pool.release(fig)
+
+    threads = [threading.Thread(target=_release, args=(fig,))
+               for fig in figs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.n_idle == 2
+    assert pool.idle_bytes == 2 * 2 * 2 * 100 ** 2 * 4
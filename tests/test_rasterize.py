@@ -0,0 +1,78 @@
+"""
+Rasterization policy for heavy artists.
+"""
+
+import io
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+from svplot import rasterize
+from svplot.decimate import plot_decimated
+from svplot.figure import new_figure
+from svplot.plotters import plot_vaf_cum_matrix
+from svplot.rasterize import apply_rasterization_policy
+
+
+def _heavy_axes():
+    rng = np.random.default_rng(0)
+    ax = new_figure().add_subplot(1, 1, 1)
+    big = ax.scatter(rng.normal(size=8000), rng.normal(size=8000))
+    small = ax.scatter(rng.normal(size=50), rng.normal(size=50))
+    x = np.linspace(0, 1, 30000)
+    long_line, = ax.plot(x, np.sin(x))
+    short_line, = ax.plot([0, 1], [0, 1])
+    decimated = plot_decimated(ax, x, np.cos(x))
+    text = ax.text(0.5, 0.5, 'n=8,000')
+    return ax, big, small, long_line, short_line, decimated, text
+
+
+def test_policy_is_off_by_default():
+    assert rasterize.RASTER_POLICY['enabled'] is False
+    ax, *artists = _heavy_axes()
+    assert apply_rasterization_policy(ax) == []
+    assert not any(a.get_rasterized() for a in artists)
+
+
+def test_only_heavy_collections_and_lines_are_rasterized():
+    ax, big, small, long_line, short_line, decimated, text = _heavy_axes()
+    rasterized = apply_rasterization_policy(ax, enabled=True)
+
+    assert set(rasterized) == {big, long_line}
+    assert big.get_rasterized() and long_line.get_rasterized()
+    for artist in (small, short_line, decimated, text):
+        assert not artist.get_rasterized()
+
+
+def test_many_collections_are_all_rasterized():
+    ax = new_figure().add_subplot(1, 1, 1)
+    points = [ax.scatter([i], [i]) for i in range(12)]
+    rasterized = apply_rasterization_policy(ax, enabled=True, max_artists=10)
+    assert set(rasterized) == set(points)
+
+
+def test_plotters_apply_policy_only_when_enabled(monkeypatch):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({'vf': rng.uniform(0, 1, 2000),
+                       'sample': rng.integers(0, 300, 2000)})
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum_matrix(df, 'sample', ax=ax)
+    assert not any(c.get_rasterized() for c in ax.collections)
+
+    monkeypatch.setitem(rasterize.RASTER_POLICY, 'enabled', True)
+    monkeypatch.setitem(rasterize.RASTER_POLICY, 'max_vertices', 1000)
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum_matrix(df, 'sample', ax=ax)
+    assert any(c.get_rasterized() for c in ax.collections)
+    assert not any(t.get_rasterized() for t in ax.texts)
+
+
+def test_savefig_applies_policy_when_disabled():
+    ax, big, small, *_ = _heavy_axes()
+    rasterize.savefig(ax.figure, io.BytesIO(), format='pdf')
+    assert big.get_rasterized()
+    assert not small.get_rasterized()
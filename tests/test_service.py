@@ -0,0 +1,129 @@
+"""
+HTTP handling, caching and worker recovery of the render service.
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from svplot import service as service_module
+from svplot.service import RenderService, WorkerCrashed
+
+SPEC = {'plot': 'venn2', 'options': {'subsets': [10, 5, 3]}}
+
+
+def _status(raw):
+    """Send a raw request to a service and return the response status."""
+
+    async def _exchange():
+        service = RenderService(n_workers=1)
+        server = await asyncio.start_server(service._handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(raw)
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), timeout=10)
+            writer.close()
+        return line
+
+    return int(asyncio.run(_exchange()).split()[1])
+
+
+def test_malformed_request_line_gets_400():
+    assert _status(b'GARBAGE\r\n\r\n') == 400
+
+
+def test_invalid_content_length_gets_400():
+    assert _status(b'POST /render HTTP/1.1\r\n'
+                   b'Content-Length: ten\r\n\r\n') == 400
+
+
+def test_invalid_spec_gets_400():
+    body = json.dumps({'plot': 'nope'}).encode()
+    raw = b'POST /render HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body)
+    assert _status(raw + body) == 400
+
+
+def _with_service(coro, **kwargs):
+    async def _run():
+        service = RenderService(**kwargs)
+        await service.start()
+        try:
+            return await asyncio.wait_for(coro(service), timeout=120)
+        finally:
+            await service.close()
+
+    return asyncio.run(_run())
+
+
+def test_render_then_cache_hit():
+    async def _renders(service):
+        first = await service.render(SPEC)
+        second = await service.render(dict(SPEC))
+        return first, second, dict(service.stats)
+
+    first, second, stats = _with_service(_renders, n_workers=1)
+    assert first.startswith(b'\x89PNG')
+    assert second == first
+    assert stats['rendered'] == 1
+    assert stats['cache_hits'] == 1
+
+
+def test_dead_worker_restarts_pool():
+    async def _renders(service):
+        before = await service.render(SPEC)
+        executor = service._executor
+        for process in list(executor._processes.values()):
+            process.kill()
+        # Wait for the executor to notice the dead worker
+        deadline = time.monotonic() + 30
+        while not executor._broken and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        spec = dict(SPEC, options={'subsets': [1, 2, 3]})
+        after = await service.render(spec)
+        return before, after, dict(service.stats), service._executor
+
+    before, after, stats, executor = _with_service(_renders, n_workers=1)
+    assert after.startswith(b'\x89PNG') and after != before
+    assert stats['restarts'] == 1
+    assert not executor._broken
+
+
+class _BrokenExecutor:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool('worker died')
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_pool_that_stays_broken_gets_503(monkeypatch):
+    monkeypatch.setattr(service_module, 'ProcessPoolExecutor',
+                        lambda *args, **kwargs: _BrokenExecutor())
+
+    async def _exchange():
+        service = RenderService(n_workers=1)
+        service._executor = _BrokenExecutor()
+        service._queue = asyncio.Queue()
+        service._slots = asyncio.Semaphore(1)
+        service._idle_slots = 1
+        service._batcher = asyncio.ensure_future(service._run_batches())
+        try:
+            with pytest.raises(WorkerCrashed):
+                await service.render(SPEC)
+            body = json.dumps(dict(SPEC, options={'subsets': [4, 5, 6]}))
+            status, _, _ = await service._route('POST', '/render',
+                                                body.encode())
+            return status, dict(service.stats)
+        finally:
+            await service.close()
+
+    status, stats = asyncio.run(_exchange())
+    assert status == 503
+    # Each batch restarts the pool before its retry and after it fails
+    assert stats['restarts'] == 4
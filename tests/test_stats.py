@@ -0,0 +1,86 @@
+"""
+Weighted and binned reductions behind the distribution plots.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.plotters import _get_weights, plot_vaf_cum
+from svplot.stats import (bin_index, bin_lengths, exact_ecdf, log_bin_edges,
+                          scott_bandwidth, weighted_ecdf, weighted_kde)
+
+
+def _values(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 1, n), rng.integers(1, 6, n)
+
+
+def test_bin_lengths_matches_histogram_including_right_edge():
+    log_edges, int_edges = log_bin_edges(2, 4)
+    rng = np.random.default_rng(0)
+    svlen = np.concatenate([rng.integers(50, 20000, 1000),
+                            [100, 10 ** 4, -10 ** 4, 10 ** 4 + 1]])
+
+    expected, _ = np.histogram(np.abs(svlen), int_edges)
+    assert np.array_equal(bin_lengths(svlen, int_edges, chunksize=128),
+                          expected)
+    # Lengths equal to 10 ** xmax fall in the last bin
+    assert bin_lengths(np.array([10 ** 4]), int_edges)[-1] == 1
+    assert bin_index(np.array([4.0]), log_edges)[0] == log_edges.shape[0] - 2
+
+
+def test_weighted_bin_lengths_match_repeated_lengths():
+    _, int_edges = log_bin_edges(1, 5)
+    rng = np.random.default_rng(1)
+    svlen = rng.integers(10, 10 ** 5, 500)
+    w = rng.integers(1, 5, 500)
+
+    weighted = bin_lengths(svlen, int_edges, w.astype(float), chunksize=64)
+    assert np.array_equal(weighted, bin_lengths(np.repeat(svlen, w),
+                                                int_edges))
+
+
+def test_weighted_ecdf_matches_repeated_values():
+    values, w = _values()
+    points = np.linspace(-3, 3, 25)
+    expected = weighted_ecdf(np.repeat(values, w), points)
+    assert np.allclose(weighted_ecdf(values, points, w), expected)
+
+    x, y = exact_ecdf(values, w)
+    repeated = np.repeat(values, w)
+    assert np.allclose(y, [(repeated <= v).mean() for v in x])
+
+
+def test_weighted_kde_matches_repeated_values():
+    values, w = _values()
+    assert scott_bandwidth(values, w) == \
+        pytest.approx(scott_bandwidth(np.repeat(values, w)))
+
+    grid, density = weighted_kde(values, w)
+    rep_grid, rep_density = weighted_kde(np.repeat(values, w))
+    assert np.allclose(grid, rep_grid)
+    assert np.allclose(density, rep_density)
+    assert np.trapezoid(density, grid) == pytest.approx(1, abs=1e-3)
+
+
+def test_weighted_vaf_plot_matches_repeated_rows():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'vf': rng.beta(1, 10, 300),
+                       'count': rng.integers(1, 5, 300)})
+    expanded = df.loc[df.index.repeat(df['count'])]
+
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(df, weights='count', ax=ax)
+    ref = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(expanded, ax=ref)
+    assert np.allclose(ax.lines[0].get_ydata(), ref.lines[0].get_ydata())
+
+
+def test_weight_column_requires_dataframe():
+    with pytest.raises(Exception, match='Dataframe required'):
+        _get_weights(None, 'count')
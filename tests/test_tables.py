@@ -0,0 +1,80 @@
+"""
+Column-projected loading of Parquet, Feather and Arrow inputs.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from svplot.figure import new_figure
+from svplot.plotters import plot_vaf_cum
+from svplot.tables import is_table_source, load_columns
+
+
+def _frame(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'vf': rng.beta(1, 10, n),
+        'batch': rng.choice(['a', 'b', 'c'], n),
+        'unused': rng.normal(size=n),
+    })
+
+
+@pytest.fixture(params=['parquet', 'feather', 'table'])
+def source(request, tmp_path):
+    df = _frame()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if request.param == 'parquet':
+        path = tmp_path / 'calls.parquet'
+        pq.write_table(table, path)
+        return df, str(path)
+    if request.param == 'feather':
+        path = tmp_path / 'calls.feather'
+        feather.write_feather(table, path)
+        return df, str(path)
+    return df, table
+
+
+def test_only_requested_columns_are_loaded(source):
+    df, data = source
+    loaded = load_columns(data, ['vf', None, 'batch', 'vf', 'missing'])
+    assert list(loaded.columns) == ['vf', 'batch']
+    assert np.array_equal(loaded.vf.values, df.vf.values)
+
+
+def test_filters_keep_matching_rows(source):
+    df, data = source
+    loaded = load_columns(data, ['vf', 'batch'], {'batch': ['a', 'c']})
+    expected = df[df.batch.isin(['a', 'c'])]
+    assert set(loaded.batch) == {'a', 'c'}
+    assert np.allclose(np.sort(loaded.vf.values), np.sort(expected.vf.values))
+
+
+def test_dataframes_pass_through():
+    df = _frame()
+    assert not is_table_source(df)
+    assert load_columns(df, ['vf']) is df
+
+
+def test_plot_from_path_matches_dataframe(source):
+    df, data = source
+    ax = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(data, hue='batch', hue_order=['a', 'b'], ax=ax)
+    ref = new_figure().add_subplot(1, 1, 1)
+    plot_vaf_cum(df, hue='batch', hue_order=['a', 'b'], ax=ref)
+    for line, ref_line in zip(ax.lines, ref.lines):
+        assert np.allclose(line.get_ydata(), ref_line.get_ydata())
+
+
+def test_unsupported_extension_raises(tmp_path):
+    path = tmp_path / 'calls.csv'
+    path.write_text('vf\n0.1\n')
+    with pytest.raises(Exception, match='Unsupported table format'):
+        load_columns(str(path), ['vf'])
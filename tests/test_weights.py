@@ -0,0 +1,66 @@
+"""
+Weighted (counts table) input to the size and VAF plots.
+"""
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from svplot.figure import new_figure
+from svplot.plotters import plot_svsize_distro, plot_vaf_cum
+
+
+def _counts_table(n=200, seed=0):
+    # One row per distinct value, with the number of variants observed
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'log_svsize': np.round(rng.normal(3.5, 0.7, n), 3),
+        'vf': rng.beta(1, 10, n),
+        'batch': rng.choice(['a', 'b'], n),
+        'count': rng.integers(1, 20, n),
+    })
+
+
+def _axes():
+    return new_figure().add_subplot(1, 1, 1)
+
+
+def test_weighted_density_matches_kde_of_expanded_rows():
+    stats = pytest.importorskip('scipy.stats')
+    df = _counts_table()
+    ax = _axes()
+    plot_svsize_distro(df, weights='count', ax=ax)
+
+    grid, density = ax.lines[0].get_full_data()
+    expanded = np.repeat(df.log_svsize.values, df['count'].values)
+    kde = stats.gaussian_kde(expanded)
+    assert np.allclose(density, kde(grid), atol=0.01 * density.max())
+
+
+def test_weighted_labels_count_variants_not_rows():
+    df = _counts_table()
+    ax = _axes()
+    plot_svsize_distro(df, hue='batch', weights='count', ax=ax)
+
+    labels = [t.get_text() for t in ax.get_legend().get_texts()]
+    totals = df.groupby('batch')['count'].sum()
+    assert labels == ['{0} (n={1:,})'.format(b, totals[b]) for b in 'ab']
+
+
+@pytest.mark.parametrize('plot', [plot_svsize_distro, plot_vaf_cum])
+def test_weight_array_matches_weight_column(plot):
+    df = _counts_table()
+    ax, ref = _axes(), _axes()
+    plot(df, hue='batch', weights='count', ax=ax)
+    plot(df, hue='batch', weights=df['count'].values, ax=ref)
+    for line, ref_line in zip(ax.lines, ref.lines):
+        assert np.array_equal(line.get_ydata(), ref_line.get_ydata())
+
+
+def test_weights_must_match_rows():
+    df = _counts_table()
+    with pytest.raises(Exception, match='same length'):
+        plot_vaf_cum(df, weights=np.ones(3), ax=_axes())